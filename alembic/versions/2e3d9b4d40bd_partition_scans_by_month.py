@@ -0,0 +1,132 @@
+"""partition scans by month
+
+Revision ID: 2e3d9b4d40bd
+Revises: 3f9af0f8376f
+Create Date: 2026-10-19 15:21:08.672390
+
+Turns `scans` into a table range-partitioned by month on `created_at`.
+
+Online path: the partitioned table is built next to the old one and the
+existing rows are copied over in id-ordered batches, each committed on its
+own so no long lock is held. The final step locks `scans` against writes
+(reads continue), copies every row not copied yet and swaps the names.
+Rows are never updated by the application, so copying missing ids is
+enough. Missing rows are found by id rather than by "id above the last
+batch": a transaction can take an id from the sequence before a batch is
+copied and commit after it. Row counts are compared before the old table
+is dropped, and the migration aborts if they differ.
+
+Partitions for the following months are created here and then kept ahead
+by app/services/partition_service.py.
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2e3d9b4d40bd'
+down_revision: Union[str, None] = '3f9af0f8376f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COPY_BATCH_SIZE = 50_000
+MONTHS_AHEAD = 3
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(first: date, last: date) -> None:
+    month = first
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS scans_y{month.year:04d}m{month.month:02d} PARTITION OF scans_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+        month = _add_months(month, 1)
+
+
+def _copy_rows(bind, after_id: int, up_to_id: int) -> None:
+    bind.execute(sa.text(
+        "INSERT INTO scans_partitioned SELECT * FROM scans WHERE id > :after AND id <= :up_to"
+    ), {"after": after_id, "up_to": up_to_id})
+
+
+def _copy_missing_rows(bind) -> None:
+    bind.execute(sa.text(
+        "INSERT INTO scans_partitioned SELECT * FROM scans s "
+        "WHERE NOT EXISTS (SELECT 1 FROM scans_partitioned p WHERE p.id = s.id)"
+    ))
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    # The partition key cannot be NULL.
+    op.execute("UPDATE scans SET created_at = COALESCE(updated_at, now()) WHERE created_at IS NULL")
+
+    op.execute("CREATE TABLE scans_partitioned (LIKE scans INCLUDING DEFAULTS) PARTITION BY RANGE (created_at)")
+    op.execute("ALTER TABLE scans_partitioned ALTER COLUMN created_at SET NOT NULL")
+    op.execute("ALTER TABLE scans_partitioned ADD CONSTRAINT scans_partitioned_pkey PRIMARY KEY (id, created_at)")
+    op.execute("ALTER TABLE scans_partitioned ADD CONSTRAINT scans_partitioned_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id)")
+    op.execute("ALTER TABLE scans_partitioned ADD CONSTRAINT scans_partitioned_crawl_id_fkey FOREIGN KEY (crawl_id) REFERENCES crawls (id)")
+    op.execute("CREATE INDEX ix_scans_partitioned_user_id_created_at ON scans_partitioned (user_id, created_at)")
+    op.execute("CREATE INDEX ix_scans_partitioned_crawl_id ON scans_partitioned (crawl_id)")
+
+    oldest, newest = bind.execute(sa.text("SELECT min(created_at), max(created_at) FROM scans")).one()
+    today = datetime.utcnow().date()
+    current = date(today.year, today.month, 1)
+    first = date(oldest.year, oldest.month, 1) if oldest else current
+    last = max(date(newest.year, newest.month, 1), current) if newest else current
+    _create_partitions(min(first, current), _add_months(last, MONTHS_AHEAD))
+
+    # Bulk copy in small committed batches while the application keeps writing.
+    copied = 0
+    with op.get_context().autocommit_block():
+        max_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM scans")).scalar()
+        while copied < max_id:
+            _copy_rows(bind, copied, copied + COPY_BATCH_SIZE)
+            copied += COPY_BATCH_SIZE
+        # Catch up once without the lock, so the locked pass has little to copy.
+        _copy_missing_rows(bind)
+
+    # Short cut-over: block writers, copy the stragglers and swap names.
+    op.execute("LOCK TABLE scans IN EXCLUSIVE MODE")
+    _copy_missing_rows(bind)
+    legacy_rows = bind.execute(sa.text("SELECT count(*) FROM scans")).scalar()
+    partitioned_rows = bind.execute(sa.text("SELECT count(*) FROM scans_partitioned")).scalar()
+    if legacy_rows != partitioned_rows:
+        raise RuntimeError(
+            f"scans has {legacy_rows} rows but scans_partitioned has {partitioned_rows}; not dropping scans"
+        )
+    op.execute("ALTER TABLE scans RENAME TO scans_legacy")
+    op.execute("ALTER TABLE scans_partitioned RENAME TO scans")
+    op.execute("ALTER SEQUENCE scans_id_seq OWNED BY scans.id")
+    op.execute("DROP TABLE scans_legacy")
+    op.execute("ALTER TABLE scans RENAME CONSTRAINT scans_partitioned_pkey TO scans_pkey")
+    op.execute("ALTER TABLE scans RENAME CONSTRAINT scans_partitioned_user_id_fkey TO scans_user_id_fkey")
+    op.execute("ALTER TABLE scans RENAME CONSTRAINT scans_partitioned_crawl_id_fkey TO scans_crawl_id_fkey")
+    op.execute("ALTER INDEX ix_scans_partitioned_user_id_created_at RENAME TO ix_scans_user_id_created_at")
+    op.execute("ALTER INDEX ix_scans_partitioned_crawl_id RENAME TO ix_scans_crawl_id")
+
+
+def downgrade() -> None:
+    op.execute("LOCK TABLE scans IN EXCLUSIVE MODE")
+    op.execute("CREATE TABLE scans_plain (LIKE scans INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE scans_plain ALTER COLUMN created_at DROP NOT NULL")
+    op.execute("INSERT INTO scans_plain SELECT * FROM scans")
+    op.execute("ALTER TABLE scans RENAME TO scans_partitioned")
+    op.execute("ALTER TABLE scans_plain RENAME TO scans")
+    op.execute("ALTER SEQUENCE scans_id_seq OWNED BY scans.id")
+    op.execute("DROP TABLE scans_partitioned CASCADE")
+    op.create_primary_key('scans_pkey', 'scans', ['id'])
+    op.create_foreign_key('scans_user_id_fkey', 'scans', 'users', ['user_id'], ['id'])
+    op.create_foreign_key('scans_crawl_id_fkey', 'scans', 'crawls', ['crawl_id'], ['id'])
+    op.create_index(op.f('ix_scans_id'), 'scans', ['id'], unique=False)
+    op.create_index(op.f('ix_scans_user_id'), 'scans', ['user_id'], unique=False)
+    op.create_index(op.f('ix_scans_crawl_id'), 'scans', ['crawl_id'], unique=False)
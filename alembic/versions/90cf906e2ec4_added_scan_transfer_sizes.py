@@ -0,0 +1,30 @@
+"""added scan transfer sizes
+
+Revision ID: 90cf906e2ec4
+Revises: 2e3d9b4d40bd
+Create Date: 2026-10-19 15:02:11.408215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '90cf906e2ec4'
+down_revision: Union[str, None] = '2e3d9b4d40bd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable columns without defaults: a catalog-only change, also on the
+    # existing partitions.
+    op.add_column('scans', sa.Column('bytes_on_wire', sa.Integer(), nullable=True))
+    op.add_column('scans', sa.Column('bytes_decoded', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scans', 'bytes_decoded')
+    op.drop_column('scans', 'bytes_on_wire')
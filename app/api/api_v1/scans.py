@@ -1,52 +1,264 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.api import deps
-from app.schemas.scan_schemas import ScanCreate, ScanResponse
-from app.services.scan_service import ScanService
-from app.controllers.scans import ScanController
-from app.models.user import User
-
-router = APIRouter()
-
-@router.post("/", response_model=ScanResponse, status_code=status.HTTP_201_CREATED)
-async def create_scan(
-    scan_in: ScanCreate,
-    db: AsyncSession = Depends(deps.get_async_db),
-    current_user: User = Depends(deps.get_current_user),
-) -> Any:
-    """
-    Create a new scan for the given URL.
-    """
-    service = ScanService(db)
-    scan = await service.perform_scan(user_id=current_user.id, url_in=str(scan_in.url))
-    return scan
-
-
-@router.get("/", response_model=list[ScanResponse])
-async def get_scans(
-    db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
-    search: str = None,
-) -> Any:
-    """
-    Get all scans for the current user.
-    """
-    controller = ScanController(db)
-    scans = controller.get_scans(user_id=current_user.id, search=search)
-    return scans
-
-@router.get("/{scan_id}", response_model=ScanResponse)
-async def get_scan(
-    scan_id: int,
-    db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
-) -> Any:
-    """
-    Get a specific scan by ID.
-    """
-    controller = ScanController(db)
-    scan = controller.get_scan(user_id=current_user.id, scan_id=scan_id)
-    return scan
-
-
+from datetime import datetime
+from typing import Any, Literal, Optional
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, File, Form, Header, HTTPException, Query, Request, Response, UploadFile, status
+)
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.db.session import async_session_router
+from app.core.admission import scan_admission
+from app.core.etag import etag_headers, etag_matches, make_etag
+from app.schemas.scan_schemas import (
+    ScanCreate, ScanResponse, CrawlCreate, CrawlResponse, ScheduleCreate, ScheduleResponse, ScanProfileResponse,
+    IngestResponse, RuleProfile,
+)
+from app.services.scan_service import ScanService
+from app.services.crawl_service import CrawlService, run_crawl_in_background
+from app.services.export_service import ScanExportService
+from app.services.schedule_service import ScheduleService
+from app.services.profiling_service import ScanProfileService, PROFILE_ID_HEADER
+from app.services.scan_events import scan_event_hub
+from app.services.ingest_service import IngestService
+from app.services.decompression import MAX_DECODED_BYTES
+from app.controllers.scans import ScanController
+from app.models.user import User
+
+router = APIRouter()
+
+@router.post("/", response_model=ScanResponse, status_code=status.HTTP_201_CREATED)
+async def create_scan(
+    scan_in: ScanCreate,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+    profile: bool = False,
+    x_scan_profile: Optional[str] = Header(None),
+) -> Any:
+    """
+    Create a new scan for the given URL.
+
+    Superusers can profile the scan with `?profile=true` or an `X-Scan-Profile`
+    header; the stored profile's id is returned in `X-Scan-Profile-Id`.
+    """
+    if profile or x_scan_profile not in (None, "", "0", "false"):
+        deps.get_current_superuser(current_user)
+        scan, scan_profile = await ScanProfileService(db).profile_scan(
+            user_id=current_user.id, url=str(scan_in.url),
+            probe_images=scan_in.probe_images, rule_profile=scan_in.rule_profile,
+        )
+        response.headers[PROFILE_ID_HEADER] = str(scan_profile.id)
+        return scan
+
+    # Over the adaptive limit this waits briefly, then answers 503 with Retry-After.
+    async with scan_admission.slot():
+        service = ScanService(db)
+        scan = await service.perform_scan(
+            user_id=current_user.id, url_in=str(scan_in.url),
+            probe_images=scan_in.probe_images, rule_profile=scan_in.rule_profile,
+        )
+    return scan
+
+
+@router.post("/upload", response_model=ScanResponse, status_code=status.HTTP_201_CREATED)
+async def upload_scan(
+    file: UploadFile = File(...),
+    url: str = Form(...),
+    rule_profile: RuleProfile = Form("default"),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Scan an uploaded HTML document instead of fetching it. `url` is stored on
+    the scan and used to resolve relative URLs; it is never requested.
+    """
+    body = await file.read(MAX_DECODED_BYTES + 1)
+    return await IngestService(db).ingest_html(
+        current_user.id, url, body, content_type=file.content_type or "", rule_profile=rule_profile
+    )
+
+
+@router.post("/warc", response_model=IngestResponse, status_code=status.HTTP_201_CREATED)
+async def ingest_warc(
+    request: Request,
+    rule_profile: RuleProfile = "default",
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Scan every HTML page in a WARC file (optionally gzipped) sent as the
+    request body. The body is streamed, not buffered.
+    """
+    return await IngestService(db).ingest_warc(current_user.id, request.stream(), rule_profile=rule_profile)
+
+
+@router.post("/crawls", response_model=CrawlResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_crawl(
+    crawl_in: CrawlCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Start crawling the site at the given URL. Every page scanned is stored as a
+    scan tied to the returned crawl.
+    """
+    service = CrawlService(db)
+    crawl = await service.create_crawl(user_id=current_user.id, crawl_in=crawl_in)
+    background_tasks.add_task(run_crawl_in_background, crawl.id)
+    return crawl
+
+
+@router.get("/crawls/{crawl_id}", response_model=CrawlResponse)
+async def get_crawl(
+    crawl_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get the progress of a crawl.
+    """
+    service = CrawlService(db)
+    return await service.get_crawl(user_id=current_user.id, crawl_id=crawl_id)
+
+
+@router.post("/schedules", response_model=ScheduleResponse, status_code=status.HTTP_201_CREATED)
+async def create_schedule(
+    schedule_in: ScheduleCreate,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Rescan the given URL on a recurring interval.
+    """
+    service = ScheduleService(db)
+    return await service.create_schedule(user_id=current_user.id, schedule_in=schedule_in)
+
+
+@router.get("/schedules", response_model=list[ScheduleResponse])
+async def get_schedules(
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get all scan schedules for the current user.
+    """
+    service = ScheduleService(db)
+    return await service.get_schedules(user_id=current_user.id)
+
+
+@router.delete("/schedules/{schedule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_schedule(
+    schedule_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> None:
+    """
+    Stop and remove a scan schedule.
+    """
+    service = ScheduleService(db)
+    await service.delete_schedule(user_id=current_user.id, schedule_id=schedule_id)
+
+
+@router.get("/profiles/{profile_id}", response_model=ScanProfileResponse)
+async def get_scan_profile(
+    profile_id: int,
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: User = Depends(deps.get_current_superuser),
+) -> Any:
+    """
+    Get a stored scan profile (superusers only).
+    """
+    service = ScanProfileService(db)
+    return await service.get_profile(profile_id=profile_id)
+
+
+@router.get("/", response_model=list[ScanResponse])
+async def get_scans(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_user),
+    search: str = None,
+    since: Optional[datetime] = None,
+) -> Any:
+    """
+    Get all scans for the current user.
+    """
+    controller = ScanController(db)
+    etag = make_etag(current_user.id, controller.scan_version(current_user.id), "list", search, since)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    response.headers.update(etag_headers(etag))
+    scans = controller.get_scans(user_id=current_user.id, search=search, since=since)
+    return scans
+
+@router.get("/export")
+async def export_scans(
+    current_user: User = Depends(deps.get_current_user),
+    export_format: Literal["csv", "ndjson"] = Query("csv", alias="format"),
+    gzip: bool = False,
+    search: str = None,
+    crawl_id: Optional[int] = None,
+) -> Any:
+    """
+    Stream the full scan history of the current user as CSV or NDJSON.
+    """
+    service = ScanExportService(
+        session_factory=async_session_router.reader(current_user.id), router=async_session_router
+    )
+    media_type = "text/csv" if export_format == "csv" else "application/x-ndjson"
+    headers = {"Content-Disposition": f'attachment; filename="scans.{export_format}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        service.stream(current_user.id, export_format, compress=gzip, search=search, crawl_id=crawl_id),
+        media_type=media_type,
+        headers=headers,
+    )
+
+@router.get("/events")
+async def scan_events(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Server-Sent Events stream of the current user's completed scans and crawl progress.
+    """
+    # The stream can stay open for hours; release the connection used for auth now.
+    db.close()
+    try:
+        events = await scan_event_hub.open_stream(current_user.id)
+    except OverflowError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams, try again later",
+            headers={"Retry-After": "30"},
+        )
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{scan_id}", response_model=ScanResponse)
+async def get_scan(
+    scan_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get a specific scan by ID.
+    """
+    controller = ScanController(db)
+    etag = make_etag(current_user.id, controller.scan_version(current_user.id), "scan", scan_id)
+    if etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+    scan = controller.get_scan(user_id=current_user.id, scan_id=scan_id)
+    response.headers.update(etag_headers(etag))
+    return scan
+
+
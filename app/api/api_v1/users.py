@@ -1,19 +1,19 @@
-from typing import Any
-
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-
-from app.api import deps
-from app.models.user import User
-from app.schemas.user import UserResponse
-
-router = APIRouter()
-
-@router.get("/me", response_model=UserResponse)
-def read_user_me(
-    current_user: User = Depends(deps.get_current_user),
-) -> Any:
-    """
-    Get current user.
-    """
-    return current_user
+from typing import Any
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+router = APIRouter()
+
+@router.get("/me", response_model=UserResponse)
+def read_user_me(
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get current user.
+    """
+    return current_user
@@ -1,45 +1,68 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt, JWTError
-from pydantic import ValidationError
-from sqlalchemy.orm import Session
-
-from app.core import security
-from app.core.config import settings
-from app.db.session import SessionLocal, AsyncSessionLocal
-from app.models.user import User
-from app.schemas.user import TokenData
-
-reusable_oauth2 = OAuth2PasswordBearer(
-    tokenUrl=f"{settings.API_V1_STR}/auth/login"
-)
-
-def get_db() -> Generator:
-    try:
-        db = SessionLocal()
-        yield db
-    finally:
-        db.close()
-
-async def get_async_db() -> Generator:
-    async with AsyncSessionLocal() as session:
-        yield session
-
-def get_current_user(
-    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> User:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenData(id=payload.get("sub"))
-    except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
-    user = db.query(User).filter(User.id == token_data.id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+from typing import Generator, Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from jose import jwt, JWTError
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.core.config import settings
+from app.db.session import SessionLocal, AsyncSessionLocal, session_router
+from app.models.user import User
+from app.schemas.user import TokenData
+
+reusable_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/auth/login"
+)
+
+def get_db() -> Generator:
+    try:
+        db = SessionLocal()
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db() -> Generator:
+    async with AsyncSessionLocal() as session:
+        yield session
+
+def get_current_user(
+    db: Session = Depends(get_db), token: str = Depends(reusable_oauth2)
+) -> User:
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+        )
+        token_data = TokenData(id=payload.get("sub"))
+    except (JWTError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+    user = db.query(User).filter(User.id == token_data.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+def get_current_superuser(current_user: User = Depends(get_current_user)) -> User:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges",
+        )
+    return current_user
+
+def get_read_db(current_user: User = Depends(get_current_user)) -> Generator:
+    """
+    Session for read-only endpoints. Served by a replica when configured,
+    except right after the user's own writes.
+    """
+    factory = session_router.reader(current_user.id)
+    db = factory()
+    try:
+        yield db
+    except Exception as e:
+        session_router.report_error(factory, e)
+        raise
+    finally:
+        db.close()
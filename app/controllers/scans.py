@@ -1,35 +1,51 @@
-from sqlalchemy.orm import Session
-from fastapi import HTTPException, status
-from app.models.scans import Scans
-from app.schemas.scan_schemas import ScanResponse
-import logging
-
-logger = logging.getLogger(__name__)
-
-class ScanController:
-    def __init__(self, db: Session):
-        self.db = db
-    
-    def calculate_score(self, scan: Scans):
-        if scan.total_images == 0:
-            return 0
-        return round(scan.alt_images / scan.total_images * 100)
-    
-    def get_scans(self, user_id: int, search: str = None):
-        scans = self.db.query(Scans).filter(Scans.user_id == user_id)
-        if search:
-            scans = scans.filter(Scans.url.contains(search)) 
-        scans = scans.order_by(Scans.id.desc()).limit(10).all()
-        for scan in scans:
-            scan.total_images = scan.alt_images + scan.non_alt_images
-            scan.score = self.calculate_score(scan)
-        return scans
-
-    def get_scan(self, user_id: int, scan_id: int):
-        scan = self.db.query(Scans).filter(Scans.id == scan_id, Scans.user_id == user_id).first()
-        if not scan:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scan not found")
-        scan.total_images = scan.alt_images + scan.non_alt_images
-        scan.score = self.calculate_score(scan)
-        return scan
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from fastapi import HTTPException, status
+from app.models.scans import Scans
+from app.models.user import User
+from app.schemas.scan_schemas import ScanResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ScanController:
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def calculate_score(self, scan: Scans):
+        if scan.total_images == 0:
+            return 0
+        return round(scan.alt_images / scan.total_images * 100)
+    
+    def history_query(self, user_id: int, search: str = None, since: Optional[datetime] = None):
+        scans = self.db.query(Scans).filter(Scans.user_id == user_id)
+        if search:
+            scans = scans.filter(Scans.url.contains(search)) 
+        if since:
+            # Lets the planner prune partitions older than `since`.
+            scans = scans.filter(Scans.created_at >= since)
+        # Ordering on the partition key lets Postgres read the newest
+        # partitions first and stop once the limit is reached.
+        return scans.order_by(Scans.created_at.desc(), Scans.id.desc()).limit(10)
+
+    def scan_version(self, user_id: int) -> int:
+        # Read on the session that serves the body, which may be a lagging
+        # replica, so an ETag never claims a newer version than the rows.
+        return self.db.query(User.scan_version).filter(User.id == user_id).scalar() or 0
+
+    def get_scans(self, user_id: int, search: str = None, since: Optional[datetime] = None):
+        scans = self.history_query(user_id, search=search, since=since).all()
+        for scan in scans:
+            scan.total_images = scan.alt_images + scan.non_alt_images
+            scan.score = self.calculate_score(scan)
+        return scans
+
+    def get_scan(self, user_id: int, scan_id: int):
+        scan = self.db.query(Scans).filter(Scans.id == scan_id, Scans.user_id == user_id).first()
+        if not scan:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scan not found")
+        scan.total_images = scan.alt_images + scan.non_alt_images
+        scan.score = self.calculate_score(scan)
+        return scan
     
\ No newline at end of file
@@ -0,0 +1,213 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+
+# Configuration Helpers
+ADMISSION_INITIAL_LIMIT = 32
+ADMISSION_MIN_LIMIT = 4
+ADMISSION_MAX_LIMIT = 512
+# Scans averaging slower than this are taken as a sign of overload.
+ADMISSION_TARGET_LATENCY = 5.0
+ADMISSION_BACKOFF = 0.8
+ADMISSION_LATENCY_SMOOTHING = 0.2
+ADMISSION_QUEUE_SIZE = 16
+ADMISSION_QUEUE_TIMEOUT = 1.0
+# Share of the limit background work (crawls, schedules) may take.
+ADMISSION_BACKGROUND_SHARE = 0.5
+
+# Priorities, lower first.
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+# Seconds the current slot has spent in uncounted_wait() blocks.
+_slot_waits: ContextVar[Optional[List[float]]] = ContextVar("admission_slot_waits", default=None)
+
+
+class Overloaded(HTTPException):
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many scans in progress, try again shortly",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class AdmissionController:
+    """
+    Adaptive concurrency limit for scans (AIMD). While the smoothed scan
+    latency stays under target_latency, the limit grows by about one per
+    `limit` completed scans; when it goes over, the limit is cut by
+    `backoff`, at most once per target_latency. Scans over the limit wait in
+    a short priority queue (interactive before background) and interactive
+    ones are turned away with Overloaded when the queue is full or their
+    wait times out, instead of piling up until everything times out.
+    Background work never times out but only gets `background_share` of the
+    limit.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = ADMISSION_INITIAL_LIMIT,
+        min_limit: int = ADMISSION_MIN_LIMIT,
+        max_limit: int = ADMISSION_MAX_LIMIT,
+        target_latency: float = ADMISSION_TARGET_LATENCY,
+        backoff: float = ADMISSION_BACKOFF,
+        queue_size: int = ADMISSION_QUEUE_SIZE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        background_share: float = ADMISSION_BACKGROUND_SHARE,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.background_share = background_share
+        self.in_flight = 0
+        self.background_in_flight = 0
+        self.latency: Optional[float] = None
+        self.rejected = 0
+        self._waiters: List[list] = []
+        self._interactive_waiting = 0
+        self._seq = itertools.count()
+        self._last_decrease = 0.0
+
+    @property
+    def saturated(self) -> bool:
+        return self.in_flight >= int(self.limit) and self._interactive_waiting >= self.queue_size
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self.latency or 1))
+
+    def stats(self) -> dict:
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "queued": self._interactive_waiting,
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "rejected": self.rejected,
+        }
+
+    def _can_start(self, priority: int) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        if priority == BACKGROUND:
+            return self.background_in_flight < max(1, int(self.limit * self.background_share))
+        return True
+
+    def _start(self, priority: int):
+        self.in_flight += 1
+        if priority == BACKGROUND:
+            self.background_in_flight += 1
+
+    def _wake(self):
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            # Interactive waiters sort first, so if the head cannot start
+            # nobody behind it can.
+            if not self._can_start(priority):
+                return
+            heapq.heappop(self._waiters)
+            if priority == INTERACTIVE:
+                self._interactive_waiting -= 1
+            self._start(priority)
+            future.set_result(None)
+
+    def _observe(self, latency: float, in_flight: int):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += ADMISSION_LATENCY_SMOOTHING * (latency - self.latency)
+        now = time.monotonic()
+        if self.latency > self.target_latency:
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif in_flight >= self.limit / 2:
+            # Only grow while the limit is actually in use.
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def _release(self, priority: int, latency: Optional[float] = None):
+        in_flight = self.in_flight
+        self.in_flight -= 1
+        if priority == BACKGROUND:
+            self.background_in_flight -= 1
+        if latency is not None:
+            self._observe(latency, in_flight)
+        self._wake()
+
+    async def _acquire(self, priority: int):
+        head = self._waiters[0][0] if self._waiters else None
+        if (head is None or head > priority) and self._can_start(priority):
+            self._start(priority)
+            return
+        if priority == INTERACTIVE and self._interactive_waiting >= self.queue_size:
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, [priority, next(self._seq), future])
+        if priority == INTERACTIVE:
+            self._interactive_waiting += 1
+        timeout = self.queue_timeout if priority == INTERACTIVE else None
+        try:
+            await asyncio.wait((future,), timeout=timeout)
+        except asyncio.CancelledError:
+            self._abandon(priority, future)
+            raise
+        if not future.done():
+            self._abandon(priority, future)
+            self.rejected += 1
+            raise Overloaded(self.retry_after())
+
+    def _abandon(self, priority: int, future: asyncio.Future):
+        if future.done():
+            # Granted a slot just as the wait ended; hand it on.
+            self._release(priority)
+            return
+        future.cancel()
+        if priority == INTERACTIVE:
+            self._interactive_waiting -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: int = INTERACTIVE):
+        await self._acquire(priority)
+        waits = [0.0]
+        token = _slot_waits.set(waits)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            _slot_waits.reset(token)
+            self._release(priority, max(0.0, time.monotonic() - started - waits[0]))
+
+
+@contextmanager
+def uncounted_wait():
+    """
+    Leaves the time spent in the block out of the latency the enclosing slot
+    reports. For deliberate waits (a host's crawl-delay, a lock held by
+    another scan): they say nothing about how loaded this worker is.
+    """
+    waits = _slot_waits.get()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if waits is not None:
+            waits[0] += time.monotonic() - started
+
+
+scan_admission = AdmissionController()
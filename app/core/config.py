@@ -1,56 +1,106 @@
-import os
-from typing import Any, Dict, Optional, List, Union
-from pydantic import AnyHttpUrl, EmailStr, HttpUrl, PostgresDsn, field_validator, ValidationInfo
-from pydantic_settings import BaseSettings
-from dotenv import load_dotenv
-
-load_dotenv()
-
-class Settings(BaseSettings):
-    SENTRY_DSN: Optional[str] = None
-    PROJECT_NAME: str
-    API_V1_STR: str = "/web-image-analyzer/api/v1"
-    
-    SECRET_KEY: str = "your_secret_key" # Change this in production!
-    ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
-    
-    BACKEND_CORS_ORIGINS: List[str] = []
-
-    @field_validator("BACKEND_CORS_ORIGINS", mode='before')
-    @classmethod
-    def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
-        if isinstance(v, str) and not v.startswith("["):
-            return [i.strip() for i in v.split(",")]
-        elif isinstance(v, (list, str)):
-            return v
-        raise ValueError(v)
-    
-    POSTGRES_SERVER: str
-    POSTGRES_USER: str
-    POSTGRES_PASSWORD: str
-    POSTGRES_DB: str
-    SQLALCHEMY_DATABASE_URI: Optional[str] = None
-
-    @field_validator("SQLALCHEMY_DATABASE_URI", mode='after')
-    @classmethod
-    def assemble_db_connection(cls, v: Optional[str], info: ValidationInfo) -> Any:
-        if isinstance(v, str):
-            return v
-        
-        values = info.data
-        return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB') or ''}"
-
-    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
-
-    @field_validator("SQLALCHEMY_ASYNC_DATABASE_URI", mode='after')
-    @classmethod
-    def assemble_async_db_connection(cls, v: Optional[str], info: ValidationInfo) -> Any:
-        if isinstance(v, str):
-            return v
-
-        values = info.data
-        return f"postgresql+asyncpg://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB') or ''}"
-    
+import json
+import os
+from typing import Annotated, Any, Dict, Optional, List, Union
+from pydantic import AnyHttpUrl, EmailStr, HttpUrl, PostgresDsn, field_validator, ValidationInfo
+from pydantic_settings import BaseSettings, NoDecode
+from dotenv import load_dotenv
+
+load_dotenv()
+
+class Settings(BaseSettings):
+    SENTRY_DSN: Optional[str] = None
+    PROJECT_NAME: str
+    API_V1_STR: str = "/web-image-analyzer/api/v1"
+    
+    SECRET_KEY: str = "your_secret_key" # Change this in production!
+    ALGORITHM: str = "HS256"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    
+    BACKEND_CORS_ORIGINS: List[str] = []
+
+    @field_validator("BACKEND_CORS_ORIGINS", mode='before')
+    @classmethod
+    def assemble_cors_origins(cls, v: Union[str, List[str]]) -> Union[List[str], str]:
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",")]
+        elif isinstance(v, (list, str)):
+            return v
+        raise ValueError(v)
+    
+    POSTGRES_SERVER: str
+    POSTGRES_USER: str
+    POSTGRES_PASSWORD: str
+    POSTGRES_DB: str
+    SQLALCHEMY_DATABASE_URI: Optional[str] = None
+
+    @field_validator("SQLALCHEMY_DATABASE_URI", mode='after')
+    @classmethod
+    def assemble_db_connection(cls, v: Optional[str], info: ValidationInfo) -> Any:
+        if isinstance(v, str):
+            return v
+        
+        values = info.data
+        return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB') or ''}"
+
+    SQLALCHEMY_ASYNC_DATABASE_URI: Optional[str] = None
+
+    @field_validator("SQLALCHEMY_ASYNC_DATABASE_URI", mode='after')
+    @classmethod
+    def assemble_async_db_connection(cls, v: Optional[str], info: ValidationInfo) -> Any:
+        if isinstance(v, str):
+            return v
+
+        values = info.data
+        return f"postgresql+asyncpg://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB') or ''}"
+
+    # Optional read replicas. Async URIs are derived from the sync ones if not set.
+    # A JSON list or comma-separated URIs.
+    SQLALCHEMY_REPLICA_URIS: Annotated[List[str], NoDecode] = []
+    SQLALCHEMY_ASYNC_REPLICA_URIS: Annotated[List[str], NoDecode] = []
+    # How long a replica that failed a connection is taken out of rotation.
+    REPLICA_EJECT_SECONDS: float = 30.0
+    # Reads of a user stay on the primary this long after their own scan insert.
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    @field_validator("SQLALCHEMY_REPLICA_URIS", "SQLALCHEMY_ASYNC_REPLICA_URIS", mode='before')
+    @classmethod
+    def split_replica_uris(cls, v: Union[str, List[str]]) -> List[str]:
+        if isinstance(v, str) and v.strip().startswith("["):
+            return json.loads(v)
+        if isinstance(v, str):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        return v
+
+    @field_validator("SQLALCHEMY_ASYNC_REPLICA_URIS", mode='after')
+    @classmethod
+    def assemble_async_replica_uris(cls, v: List[str], info: ValidationInfo) -> List[str]:
+        if v:
+            return v
+        return [
+            uri.replace("postgresql://", "postgresql+asyncpg://", 1)
+            for uri in info.data.get("SQLALCHEMY_REPLICA_URIS") or []
+        ]
+
+    # Coalesce scan inserts from concurrent requests into multi-row INSERTs.
+    SCAN_WRITE_BUFFER_ENABLED: bool = False
+
+    # Create upcoming monthly scan partitions and apply retention in this process.
+    # On by default: inserts fail once no partition covers the current month.
+    # Only one node does the work at a time.
+    SCAN_PARTITION_MAINTENANCE_ENABLED: bool = True
+    # Months of scans kept in the database; older partitions are archived. None keeps everything.
+    SCAN_RETENTION_MONTHS: Optional[int] = None
+    SCAN_ARCHIVE_DIR: str = "archive"
+
+    # Run due scan schedules inside this process. Safe to enable on several nodes.
+    SCAN_SCHEDULER_ENABLED: bool = False
+
+    # Also coalesce concurrent scans of the same URL across workers and nodes,
+    # using Postgres advisory locks.
+    SCAN_COALESCE_CROSS_WORKER: bool = False
+
+    # Check each host's robots.txt before fetching pages from it and honour its crawl-delay.
+    SCAN_RESPECT_ROBOTS: bool = True
+    
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,30 @@
+import hashlib
+from typing import Dict, Optional
+
+from fastapi import Request
+
+
+def make_etag(user_id: int, scan_version: int, *parts) -> str:
+    """
+    Strong ETag for a user's scan data. scan_version changes in the same
+    transaction as every scan insert, so a primary-key lookup is all it takes
+    to compute it.
+    """
+    key = "|".join(str(part) for part in (user_id, scan_version, *parts))
+    digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+    return f'"{scan_version}-{digest}"'
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    # Sent on 200 and 304 alike: a 304 refreshes the cached headers, and
+    # without Cache-Control shared caches could start storing the response.
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match: Optional[str] = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
@@ -0,0 +1,64 @@
+import cProfile
+import io
+import pstats
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+from typing import Dict
+
+# Configuration Helpers
+PROFILE_TOP_N = 40
+
+_NULL_STAGE = nullcontext()
+
+
+class NullProfiler:
+    """Default profiler for perform_scan: every stage is a shared no-op context."""
+
+    enabled = False
+
+    def stage(self, name: str, cpu: bool = False):
+        return _NULL_STAGE
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class ScanProfiler(NullProfiler):
+    """
+    Records wall time per scan stage and runs cProfile over the CPU-bound
+    stages (cpu=True). Stages that await (fetch, commit) are only timed: while
+    they wait the event loop runs other requests, which a profiler enabled
+    across the await would attribute to this scan.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._profile = cProfile.Profile()
+        self._started = perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, cpu: bool = False):
+        start = perf_counter()
+        if cpu:
+            self._profile.enable()
+        try:
+            yield
+        finally:
+            if cpu:
+                self._profile.disable()
+            self.timings[name] = self.timings.get(name, 0.0) + perf_counter() - start
+
+    @property
+    def total_seconds(self) -> float:
+        return perf_counter() - self._started
+
+    def report(self, top: int = PROFILE_TOP_N) -> str:
+        out = io.StringIO()
+        try:
+            pstats.Stats(self._profile, stream=out).sort_stats("cumulative").print_stats(top)
+        except TypeError:
+            # No CPU stage ran (e.g. the URL failed validation).
+            return ""
+        return out.getvalue()
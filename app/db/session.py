@@ -1,11 +1,89 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import NullPool
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from app.core.config import settings
-
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, poolclass=NullPool)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-async_engine = create_async_engine(settings.SQLALCHEMY_ASYNC_DATABASE_URI, pool_pre_ping=True, poolclass=NullPool)
-AsyncSessionLocal = sessionmaker(class_=AsyncSession, expire_on_commit=False, bind=async_engine)
\ No newline at end of file
+import itertools
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import create_engine
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from app.core.config import settings
+
+engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True, poolclass=NullPool)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+async_engine = create_async_engine(settings.SQLALCHEMY_ASYNC_DATABASE_URI, pool_pre_ping=True, poolclass=NullPool)
+AsyncSessionLocal = sessionmaker(class_=AsyncSession, expire_on_commit=False, bind=async_engine)
+
+
+class RecentWrites:
+    """Remembers which users wrote recently, for read-your-writes stickiness."""
+
+    MAX_TRACKED = 10_000
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._last_write: Dict[int, float] = {}
+
+    def note(self, user_id: int):
+        now = time.monotonic()
+        if len(self._last_write) >= self.MAX_TRACKED:
+            cutoff = now - self.window_seconds
+            self._last_write = {k: t for k, t in self._last_write.items() if t > cutoff}
+        self._last_write[user_id] = now
+
+    def is_recent(self, user_id: Optional[int]) -> bool:
+        if user_id is None:
+            return False
+        written_at = self._last_write.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < self.window_seconds
+
+
+class SessionRouter:
+    """
+    Picks the session factory for read-only work: replicas in round-robin,
+    skipping any ejected after a connection failure, and the primary when no
+    replica is usable or the user has just written.
+    """
+
+    def __init__(self, primary, replicas: List, recent_writes: RecentWrites, eject_seconds: float):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.recent_writes = recent_writes
+        self.eject_seconds = eject_seconds
+        self._ejected_until = [0.0] * len(self.replicas)
+        self._next = itertools.count()
+
+    def reader(self, user_id: Optional[int] = None):
+        if not self.replicas or self.recent_writes.is_recent(user_id):
+            return self.primary
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            index = next(self._next) % len(self.replicas)
+            if self._ejected_until[index] <= now:
+                return self.replicas[index]
+        return self.primary
+
+    def eject(self, factory):
+        if factory in self.replicas:
+            self._ejected_until[self.replicas.index(factory)] = time.monotonic() + self.eject_seconds
+
+    def report_error(self, factory, exc: BaseException):
+        # Only connectivity problems take a replica out of rotation; query
+        # errors would fail the same way on any node.
+        if isinstance(exc, (OperationalError, InterfaceError, OSError)) or getattr(exc, "connection_invalidated", False):
+            self.eject(factory)
+
+
+recent_writes = RecentWrites(settings.READ_YOUR_WRITES_SECONDS)
+
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=create_engine(uri, pool_pre_ping=True, poolclass=NullPool))
+    for uri in settings.SQLALCHEMY_REPLICA_URIS
+]
+AsyncReplicaSessionLocals = [
+    sessionmaker(class_=AsyncSession, expire_on_commit=False, bind=create_async_engine(uri, pool_pre_ping=True, poolclass=NullPool))
+    for uri in settings.SQLALCHEMY_ASYNC_REPLICA_URIS
+]
+
+session_router = SessionRouter(SessionLocal, ReplicaSessionLocals, recent_writes, settings.REPLICA_EJECT_SECONDS)
+async_session_router = SessionRouter(AsyncSessionLocal, AsyncReplicaSessionLocals, recent_writes, settings.REPLICA_EJECT_SECONDS)
@@ -1,71 +1,108 @@
-from fastapi import FastAPI
-from starlette.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
-from slowapi import _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from app.core.config import settings
-from app.core.rate_limiter import limiter
-from fastapi.responses import JSONResponse
-
-import sentry_sdk
-
-sentry_sdk.init(
-    dsn=settings.SENTRY_DSN,
-    # Add data like request headers and IP for users,
-    # see https://docs.sentry.io/platforms/python/data-management/data-collected/ for more info
-    send_default_pii=True,
-)
-
-
-app = FastAPI(
-    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    docs_url="/web-image-analyzer/docs"
-)
-
-from slowapi.middleware import SlowAPIMiddleware
-
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-app.add_middleware(SlowAPIMiddleware)
-
-# Security Headers Middleware
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request, call_next):
-        response = await call_next(request)
-        if "/docs" in request.url.path or "/openapi.json" in request.url.path:
-            return response
-        response.headers["X-Frame-Options"] = "DENY"
-        response.headers["X-Content-Type-Options"] = "nosniff"
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
-            "style-src 'self' 'unsafe-inline';"
-        )
-        return response
-
-app.add_middleware(SecurityHeadersMiddleware)
-
-
-@app.get("/health")
-def health_check():
-    return {"status": "ok"}
-
-# Set all CORS enabled origins
-if settings.BACKEND_CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-
-from app.api.api_v1.registration_and_login import router as auth_router
-app.include_router(auth_router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
-
-from app.api.api_v1.users import router as users_router
-app.include_router(users_router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
-
-from app.api.api_v1.scans import router as scans_router
-app.include_router(scans_router, prefix=f"{settings.API_V1_STR}/scans", tags=["scans"])
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from app.core.config import settings
+from app.core.rate_limiter import limiter
+from app.core.admission import scan_admission
+from fastapi.responses import JSONResponse
+from app.services.schedule_service import scan_scheduler
+from app.services.scan_writer import scan_write_buffer
+from app.services.partition_service import partition_maintenance
+from app.services.image_probe import image_prober
+from app.services.robots import robots_policy
+from app.services.ingest_service import ingest_pool
+from app.services.scan_events import scan_event_hub
+
+import sentry_sdk
+
+sentry_sdk.init(
+    dsn=settings.SENTRY_DSN,
+    # Add data like request headers and IP for users,
+    # see https://docs.sentry.io/platforms/python/data-management/data-collected/ for more info
+    send_default_pii=True,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.SCAN_WRITE_BUFFER_ENABLED:
+        scan_write_buffer.start()
+    if settings.SCAN_SCHEDULER_ENABLED:
+        scan_scheduler.start()
+    if settings.SCAN_PARTITION_MAINTENANCE_ENABLED:
+        partition_maintenance.start()
+    yield
+    await scan_event_hub.stop()
+    await partition_maintenance.stop()
+    await scan_scheduler.stop()
+    # Last, so scans finished during shutdown are still written.
+    await scan_write_buffer.stop()
+    await image_prober.close()
+    await robots_policy.close()
+    ingest_pool.close()
+
+
+app = FastAPI(
+    title=settings.PROJECT_NAME, openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    docs_url="/web-image-analyzer/docs", lifespan=lifespan
+)
+
+from slowapi.middleware import SlowAPIMiddleware
+
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+app.add_middleware(SlowAPIMiddleware)
+
+# Security Headers Middleware
+class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        response = await call_next(request)
+        if "/docs" in request.url.path or "/openapi.json" in request.url.path:
+            return response
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
+        response.headers["Content-Security-Policy"] = (
+            "default-src 'self'; "
+            "script-src 'self' 'unsafe-inline' 'unsafe-eval'; "
+            "style-src 'self' 'unsafe-inline';"
+        )
+        return response
+
+app.add_middleware(SecurityHeadersMiddleware)
+
+
+@app.get("/health")
+def health_check():
+    return {"status": "ok"}
+
+
+@app.get("/ready")
+def readiness_check():
+    # Not ready while scans are being turned away, so load balancers can
+    # send new work elsewhere; /health stays ok.
+    if scan_admission.saturated:
+        return JSONResponse(status_code=503, content={"status": "saturated", **scan_admission.stats()})
+    return {"status": "ready", **scan_admission.stats()}
+
+# Set all CORS enabled origins
+if settings.BACKEND_CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=[str(origin) for origin in settings.BACKEND_CORS_ORIGINS],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+from app.api.api_v1.registration_and_login import router as auth_router
+app.include_router(auth_router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
+
+from app.api.api_v1.users import router as users_router
+app.include_router(users_router, prefix=f"{settings.API_V1_STR}/users", tags=["users"])
+
+from app.api.api_v1.scans import router as scans_router
+app.include_router(scans_router, prefix=f"{settings.API_V1_STR}/scans", tags=["scans"])
@@ -1,2 +1,6 @@
-from .user import User
-from .scans import Scans
\ No newline at end of file
+from .user import User
+from .scans import Scans
+from .crawls import Crawl
+from .scan_schedules import ScanSchedule
+from .scan_profiles import ScanProfile
+from .robots_rules import RobotsRule
\ No newline at end of file
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.db.base_class import Base
+from sqlalchemy.orm import relationship
+from sqlalchemy import ForeignKey
+
+class Crawl(Base):
+    __tablename__ = "crawls"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    root_url = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")
+    max_depth = Column(Integer, nullable=False)
+    max_pages = Column(Integer, nullable=False)
+    concurrency = Column(Integer, nullable=False)
+    pages_scanned = Column(Integer, nullable=False, default=0)
+    pages_failed = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    user = relationship("User", back_populates="crawls")
+    scans = relationship("Scans", back_populates="crawl")
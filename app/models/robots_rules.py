@@ -0,0 +1,13 @@
+from sqlalchemy import Column, String, DateTime, Float, JSON
+from datetime import datetime
+from app.db.base_class import Base
+
+class RobotsRule(Base):
+    __tablename__ = "robots_rules"
+    # scheme://host[:port]
+    origin = Column(String, primary_key=True)
+    # [[allow, pattern], ...] from the groups that apply to us
+    rules = Column(JSON, nullable=False)
+    crawl_delay = Column(Float, nullable=True)
+    fetched_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
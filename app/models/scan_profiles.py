@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, JSON
+from datetime import datetime
+from app.db.base_class import Base
+from sqlalchemy.orm import relationship
+from sqlalchemy import ForeignKey
+
+class ScanProfile(Base):
+    __tablename__ = "scan_profiles"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    url = Column(String, nullable=False)
+    # Not a foreign key: scans is partitioned and keyed on (id, created_at).
+    scan_id = Column(Integer, nullable=True)
+    status_code = Column(Integer, nullable=False)
+    total_seconds = Column(Float, nullable=False)
+    # {"validation": 0.0012, "fetch": 0.84, ...}, in seconds
+    stage_timings = Column(JSON, nullable=False)
+    profile = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    user = relationship("User", back_populates="scan_profiles")
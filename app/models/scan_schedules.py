@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, UniqueConstraint
+from datetime import datetime
+from app.db.base_class import Base
+from sqlalchemy.orm import relationship
+from sqlalchemy import ForeignKey
+
+class ScanSchedule(Base):
+    __tablename__ = "scan_schedules"
+    __table_args__ = (UniqueConstraint("user_id", "url", name="uq_scan_schedules_user_id_url"),)
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    url = Column(String, nullable=False)
+    interval_seconds = Column(Integer, nullable=False)
+    is_active = Column(Boolean, nullable=False, default=True)
+    next_run_at = Column(DateTime, nullable=False, index=True)
+    last_run_at = Column(DateTime, nullable=True)
+    last_scan_id = Column(Integer, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", back_populates="scan_schedules")
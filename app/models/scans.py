@@ -1,18 +1,37 @@
-from sqlalchemy import Column, Integer, String, DateTime
-from datetime import datetime
-from app.db.base_class import Base
-from sqlalchemy.orm import relationship
-from sqlalchemy import ForeignKey
-
-class Scans(Base):
-    __tablename__ = "scans"
-    id = Column(Integer, primary_key=True, index=True)
-    url = Column(String, nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
-    alt_images = Column(Integer, nullable=False)
-    non_alt_images = Column(Integer, nullable=False)
-    total_images = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-
-    user = relationship("User", back_populates="scans")
\ No newline at end of file
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from datetime import datetime
+from app.db.base_class import Base
+from sqlalchemy.orm import relationship
+from sqlalchemy import ForeignKey
+
+class Scans(Base):
+    __tablename__ = "scans"
+    # Range-partitioned by month on created_at (see partition_service). The
+    # table's primary key is (id, created_at); id alone identifies a row here.
+    __table_args__ = (
+        Index("ix_scans_user_id_created_at", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+    id = Column(Integer, primary_key=True)
+    url = Column(String, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    crawl_id = Column(Integer, ForeignKey("crawls.id"), nullable=True, index=True)
+    alt_images = Column(Integer, nullable=False)
+    non_alt_images = Column(Integer, nullable=False)
+    total_images = Column(Integer, nullable=False)
+    # Response size as transferred and after decompression; null for scans
+    # that did not fetch the page themselves.
+    bytes_on_wire = Column(Integer, nullable=True)
+    bytes_decoded = Column(Integer, nullable=True)
+    # Only set when the scan probed its images.
+    probed_images = Column(Integer, nullable=True)
+    broken_images = Column(Integer, nullable=True)
+    # Accessibility rule profile the counts were made with; null means legacy.
+    rule_profile = Column(String, nullable=True)
+    # Where the page was fetched from after redirects; null for older scans.
+    final_url = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    user = relationship("User", back_populates="scans")
+    crawl = relationship("Crawl", back_populates="scans")
\ No newline at end of file
@@ -1,14 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime
-from datetime import datetime
-from app.db.base_class import Base
-from sqlalchemy.orm import relationship
-
-class User(Base):
-    __tablename__ = "users"
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, nullable=False)
-    name = Column(String, nullable=False)
-    hashed_password = Column(String, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
-
-    scans = relationship("Scans", back_populates="user")
\ No newline at end of file
+from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from datetime import datetime
+from app.db.base_class import Base
+from sqlalchemy.orm import relationship
+
+class User(Base):
+    __tablename__ = "users"
+    id = Column(Integer, primary_key=True, index=True)
+    email = Column(String, unique=True, nullable=False)
+    name = Column(String, nullable=False)
+    hashed_password = Column(String, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Bumped in the same transaction as every scan insert; used for ETags.
+    scan_version = Column(Integer, nullable=False, default=0, server_default="0")
+    is_superuser = Column(Boolean, nullable=False, default=False, server_default="false")
+
+    scans = relationship("Scans", back_populates="user")
+    crawls = relationship("Crawl", back_populates="user")
+    scan_schedules = relationship("ScanSchedule", back_populates="user")
+    scan_profiles = relationship("ScanProfile", back_populates="user")
\ No newline at end of file
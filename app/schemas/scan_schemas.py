@@ -1,21 +1,102 @@
-from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, HttpUrl
-
-class ScanBase(BaseModel):
-    url: HttpUrl
-
-class ScanCreate(ScanBase):
-    pass
-
-class ScanResponse(ScanBase):
-    id: int
-    total_images: int = 0
-    alt_images: int
-    non_alt_images: int
-    created_at: datetime
-    score: int = 0
-
-    
-    class Config:
-        from_attributes = True
+from datetime import datetime
+from typing import Dict, Literal, Optional
+from pydantic import BaseModel, Field, HttpUrl
+
+# Accessibility rules to count images with, see app/services/a11y_rules.py.
+RuleProfile = Literal["legacy", "default", "strict"]
+
+class ScanBase(BaseModel):
+    url: HttpUrl
+
+class ScanCreate(ScanBase):
+    # Also check that every image on the page loads.
+    probe_images: bool = False
+    rule_profile: RuleProfile = "default"
+
+class ScanResponse(ScanBase):
+    id: int
+    total_images: int = 0
+    alt_images: int
+    non_alt_images: int
+    created_at: datetime
+    score: int = 0
+    bytes_on_wire: Optional[int] = None
+    bytes_decoded: Optional[int] = None
+    probed_images: Optional[int] = None
+    broken_images: Optional[int] = None
+    rule_profile: Optional[str] = None
+    final_url: Optional[str] = None
+
+    
+    class Config:
+        from_attributes = True
+
+
+class CrawlCreate(BaseModel):
+    url: HttpUrl
+    max_depth: int = Field(default=3, ge=0, le=10)
+    max_pages: int = Field(default=100, ge=1, le=100_000)
+    concurrency: int = Field(default=5, ge=1, le=20)
+
+
+class CrawlResponse(BaseModel):
+    id: int
+    root_url: str
+    status: str
+    max_depth: int
+    max_pages: int
+    concurrency: int
+    pages_scanned: int = 0
+    pages_failed: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ScheduleCreate(BaseModel):
+    url: HttpUrl
+    # One hour to 90 days; weekly by default.
+    interval_seconds: int = Field(default=7 * 24 * 3600, ge=3600, le=90 * 24 * 3600)
+
+
+class ScheduleResponse(BaseModel):
+    id: int
+    url: str
+    interval_seconds: int
+    is_active: bool
+    next_run_at: datetime
+    last_run_at: Optional[datetime] = None
+    last_scan_id: Optional[int] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class ScanProfileResponse(BaseModel):
+    id: int
+    url: str
+    scan_id: Optional[int] = None
+    status_code: int
+    total_seconds: float
+    stage_timings: Dict[str, float]
+    profile: str
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class IngestResponse(BaseModel):
+    # WARC records read, scans stored, and response/resource records that
+    # were not scanned (not HTML, not a 2xx, too large or unparseable).
+    records: int
+    scans: int
+    skipped: int
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,265 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+# Configuration Helpers
+TREAT_EMPTY_ALT_AS_PRESENT = True
+MAX_IMAGE_ELEMENTS = 500
+DEFAULT_RULE_PROFILE = "default"
+
+# Outcomes of a rule
+ACCESSIBLE = "accessible"
+INACCESSIBLE = "inaccessible"
+IGNORE = "ignore"
+
+Predicate = Callable[[Tag], bool]
+
+
+def _always(el: Tag) -> bool:
+    return True
+
+
+@dataclass(frozen=True)
+class Rule:
+    """
+    One image rule. The selector (tag and/or attribute) decides which elements
+    the rule is looked up for, `when` narrows that down, and `accessible`
+    classifies a match. IGNORE rules drop the element from the counts.
+    With `consume`, nothing inside a matched element is looked at, so e.g.
+    the <img> of a <picture> is not counted a second time.
+    """
+
+    name: str
+    tag: Optional[str] = None
+    attribute: Optional[str] = None
+    when: Predicate = _always
+    accessible: Optional[Predicate] = None
+    ignore: bool = False
+    consume: bool = False
+
+    def classify(self, el: Tag) -> str:
+        if self.ignore:
+            return IGNORE
+        return ACCESSIBLE if self.accessible is not None and self.accessible(el) else INACCESSIBLE
+
+
+@dataclass
+class RuleResult:
+    total_images: int = 0
+    alt_images: int = 0
+    non_alt_images: int = 0
+    # Elements counted as images, only kept when asked for.
+    elements: List[Tag] = field(default_factory=list)
+
+
+class RuleSet:
+    """
+    Rules compiled into dispatch tables keyed by tag name and by attribute
+    name, so one walk of the tree evaluates all of them: per element only the
+    rules whose selector can match are tried. Rules are tried in declaration
+    order; the first match classifies the element unless `match_all` is set,
+    in which case every matching rule counts it (how the old separate
+    traversals behaved).
+    """
+
+    def __init__(self, name: str, rules: Sequence[Rule], match_all: bool = False):
+        self.name = name
+        self.rules = tuple(rules)
+        self.match_all = match_all
+        by_tag: Dict[str, List[Tuple[int, Rule]]] = {}
+        by_attribute: Dict[str, List[Tuple[int, Rule]]] = {}
+        for index, rule in enumerate(self.rules):
+            if rule.tag is not None:
+                by_tag.setdefault(rule.tag, []).append((index, rule))
+            elif rule.attribute is not None:
+                by_attribute.setdefault(rule.attribute, []).append((index, rule))
+            else:
+                raise ValueError(f"Rule {rule.name} needs a tag or an attribute selector")
+        self._by_tag = {tag: tuple(rules) for tag, rules in by_tag.items()}
+        self._by_attribute = {attr: tuple(rules) for attr, rules in by_attribute.items()}
+
+    def _candidates(self, el: Tag):
+        candidates = self._by_tag.get(el.name, ())
+        extra = None
+        for attr in el.attrs:
+            rules = self._by_attribute.get(attr)
+            if rules:
+                extra = rules if extra is None else extra + rules
+        if extra is None:
+            return candidates
+        if not candidates:
+            return sorted(extra) if len(extra) > 1 else extra
+        return sorted(candidates + extra, key=lambda item: item[0])
+
+    def evaluate(self, root: Tag, limit: int = MAX_IMAGE_ELEMENTS, keep_elements: bool = False) -> RuleResult:
+        result = RuleResult()
+        stack = [child for child in reversed(root.contents) if isinstance(child, Tag)]
+        while stack and result.total_images < limit:
+            el = stack.pop()
+            consumed = False
+            for _, rule in self._candidates(el):
+                if rule.tag is not None and rule.attribute is not None and rule.attribute not in el.attrs:
+                    continue
+                if not rule.when(el):
+                    continue
+                outcome = rule.classify(el)
+                consumed = rule.consume
+                if outcome != IGNORE and result.total_images < limit:
+                    result.total_images += 1
+                    if outcome == ACCESSIBLE:
+                        result.alt_images += 1
+                    else:
+                        result.non_alt_images += 1
+                    if keep_elements:
+                        result.elements.append(el)
+                if not self.match_all:
+                    break
+            if not consumed:
+                stack.extend(child for child in reversed(el.contents) if isinstance(child, Tag))
+        return result
+
+
+# Predicates
+
+def _nonempty(value) -> bool:
+    if isinstance(value, list):
+        value = " ".join(value)
+    return bool(value and value.strip())
+
+
+def legacy_alt(el: Tag) -> bool:
+    alt = el.get("alt")
+    if alt is None:
+        return False
+    return bool(alt.strip()) or TREAT_EMPTY_ALT_AS_PRESENT
+
+
+def is_decorative(el: Tag) -> bool:
+    return el.get("role") in ("presentation", "none")
+
+
+def has_label(el: Tag) -> bool:
+    return _nonempty(el.get("aria-label")) or _nonempty(el.get("aria-labelledby")) or _nonempty(el.get("title"))
+
+
+def img_alt(el: Tag) -> bool:
+    return legacy_alt(el) or is_decorative(el) or has_label(el)
+
+
+def img_alt_strict(el: Tag) -> bool:
+    # An empty alt only counts when the image is also marked decorative.
+    alt = el.get("alt")
+    if alt is not None and alt.strip():
+        return True
+    if alt is not None and is_decorative(el):
+        return True
+    return _nonempty(el.get("aria-label")) or _nonempty(el.get("aria-labelledby"))
+
+
+def _picture_img(el: Tag) -> Optional[Tag]:
+    return el.find("img")
+
+
+def picture_alt(check: Predicate) -> Predicate:
+    def accessible(el: Tag) -> bool:
+        img = _picture_img(el)
+        return img is not None and check(img)
+    return accessible
+
+
+def svg_is_image(el: Tag) -> bool:
+    return el.get("role") == "img" or el.find(("image", "img")) is not None
+
+
+def svg_label(el: Tag) -> bool:
+    if has_label(el):
+        return True
+    title = el.find("title")
+    return title is not None and bool(title.get_text(strip=True))
+
+
+def legacy_svg_is_image(el: Tag) -> bool:
+    return bool(el.find("image") or el.find("img"))
+
+
+def legacy_svg_label(el: Tag) -> bool:
+    return bool(el.get("aria-label") or el.get("title"))
+
+
+def has_background_image(el: Tag) -> bool:
+    style = el.get("style") or ""
+    return "background-image" in style and "url(" in style
+
+
+def is_aria_hidden(el: Tag) -> bool:
+    return el.get("aria-hidden") == "true"
+
+
+def is_image_input(el: Tag) -> bool:
+    return (el.get("type") or "").lower() == "image"
+
+
+def input_alt(el: Tag) -> bool:
+    return _nonempty(el.get("alt")) or _nonempty(el.get("aria-label")) or _nonempty(el.get("aria-labelledby"))
+
+
+def is_role_img(el: Tag) -> bool:
+    return el.get("role") == "img"
+
+
+def is_lazy_image(el: Tag) -> bool:
+    # <img data-src> is handled by the img rule; this catches lazy-loaded
+    # images on other elements (div/span placeholders swapped in by JS).
+    return el.name != "img"
+
+
+# Rules
+
+LEGACY_RULES = (
+    Rule("img", tag="img", accessible=legacy_alt),
+    Rule("background-image", attribute="style", when=has_background_image),
+    Rule("svg", tag="svg", when=legacy_svg_is_image, accessible=legacy_svg_label),
+)
+
+DEFAULT_RULES = (
+    Rule("aria-hidden", attribute="aria-hidden", when=is_aria_hidden, ignore=True, consume=True),
+    Rule("picture", tag="picture", accessible=picture_alt(img_alt), consume=True),
+    Rule("img", tag="img", accessible=img_alt),
+    Rule("input-image", tag="input", when=is_image_input, accessible=input_alt),
+    Rule("svg", tag="svg", when=svg_is_image, accessible=svg_label, consume=True),
+    Rule("role-img", attribute="role", when=is_role_img, accessible=has_label, consume=True),
+    Rule("lazy-image", attribute="data-src", when=is_lazy_image, accessible=has_label),
+    Rule("lazy-srcset", attribute="data-srcset", when=is_lazy_image, accessible=has_label),
+    Rule("background-image", attribute="style", when=has_background_image),
+)
+
+STRICT_RULES = (
+    Rule("aria-hidden", attribute="aria-hidden", when=is_aria_hidden, ignore=True, consume=True),
+    Rule("picture", tag="picture", accessible=picture_alt(img_alt_strict), consume=True),
+    Rule("img", tag="img", accessible=img_alt_strict),
+    Rule("input-image", tag="input", when=is_image_input, accessible=input_alt),
+    Rule("svg", tag="svg", when=svg_is_image, accessible=svg_label, consume=True),
+    Rule("role-img", attribute="role", when=is_role_img, accessible=has_label, consume=True),
+    Rule("lazy-image", attribute="data-src", when=is_lazy_image, accessible=has_label),
+    Rule("lazy-srcset", attribute="data-srcset", when=is_lazy_image, accessible=has_label),
+    Rule("background-image", attribute="style", when=has_background_image),
+)
+
+# Compiled once, at import.
+RULE_PROFILES: Dict[str, RuleSet] = {
+    "legacy": RuleSet("legacy", LEGACY_RULES, match_all=True),
+    "default": RuleSet("default", DEFAULT_RULES),
+    "strict": RuleSet("strict", STRICT_RULES),
+}
+
+
+def get_rule_set(name: Optional[str] = None) -> RuleSet:
+    try:
+        return RULE_PROFILES[name or DEFAULT_RULE_PROFILE]
+    except KeyError:
+        raise ValueError(f"Unknown rule profile: {name}")
+
+
+def evaluate(soup: BeautifulSoup, profile: Optional[str] = None, keep_elements: bool = False) -> RuleResult:
+    return get_rule_set(profile).evaluate(soup, keep_elements=keep_elements)
@@ -0,0 +1,276 @@
+import asyncio
+import hashlib
+import logging
+import math
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Optional, Set, Tuple
+from urllib.parse import urlparse
+
+import aiohttp
+from fastapi import HTTPException, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.admission import BACKGROUND, scan_admission
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal, recent_writes
+from app.services.scan_events import crawl_event, notify_statement
+from app.models.crawls import Crawl
+from app.schemas.scan_schemas import CrawlCreate
+from app.services.scan_service import (
+    ScanService,
+    ScanError,
+    PageAnalysis,
+    normalize_url,
+    TIMEOUT_CONNECT,
+    TIMEOUT_READ,
+    TIMEOUT_TOTAL,
+)
+
+# Configuration Helpers
+CRAWL_MAX_FRONTIER = 10_000
+CRAWL_LINKS_PER_PAGE_ESTIMATE = 20
+CRAWL_MAX_SEEN_CAPACITY = 5_000_000
+CRAWL_SEEN_ERROR_RATE = 0.001
+CRAWL_MAX_ACTIVE_PER_USER = 2
+# A crawl not updated for this long is taken to have died with its worker
+# and no longer counts against the user's active crawls.
+CRAWL_STALE_AFTER = timedelta(minutes=15)
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set. Memory is decided up front from the expected
+    capacity, so the seen-set does not grow with the number of discovered URLs.
+    False positives mean a small fraction of URLs are skipped, never rescanned.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = CRAWL_SEEN_ERROR_RATE):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        """Add an item, returning True if it was not (probably) seen before."""
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        return added
+
+
+class CrawlFrontier:
+    """Bounded FIFO of (url, depth); new URLs are dropped once it is full."""
+
+    def __init__(self, max_size: int = CRAWL_MAX_FRONTIER):
+        self.max_size = max_size
+        self.queue = deque()
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def push(self, url: str, depth: int) -> bool:
+        if len(self.queue) >= self.max_size:
+            self.dropped += 1
+            return False
+        self.queue.append((url, depth))
+        return True
+
+    def pop(self) -> Tuple[str, int]:
+        return self.queue.popleft()
+
+
+def _origin(url: str) -> Tuple[str, Optional[str], Optional[int]]:
+    parsed = urlparse(url)
+    return parsed.scheme, parsed.hostname, parsed.port
+
+
+class CrawlService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def active_crawls(self, user_id: int) -> int:
+        result = await self.db.execute(
+            select(func.count(Crawl.id)).filter(
+                Crawl.user_id == user_id,
+                Crawl.status.in_(("pending", "running")),
+                Crawl.updated_at >= datetime.utcnow() - CRAWL_STALE_AFTER,
+            )
+        )
+        return result.scalar() or 0
+
+    async def create_crawl(self, user_id: int, crawl_in: CrawlCreate) -> Crawl:
+        root_url = normalize_url(str(crawl_in.url))
+        scanner = ScanService(self.db)
+        try:
+            await asyncio.to_thread(scanner.validate_url, root_url)
+        except ScanError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.message)
+
+        if await self.active_crawls(user_id) >= CRAWL_MAX_ACTIVE_PER_USER:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"At most {CRAWL_MAX_ACTIVE_PER_USER} crawls can run at a time; wait for one to finish",
+            )
+
+        crawl = Crawl(
+            user_id=user_id,
+            root_url=root_url,
+            status="pending",
+            max_depth=crawl_in.max_depth,
+            max_pages=crawl_in.max_pages,
+            concurrency=crawl_in.concurrency,
+            pages_scanned=0,
+            pages_failed=0,
+        )
+        self.db.add(crawl)
+        try:
+            await self.db.commit()
+            await self.db.refresh(crawl)
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Database error saving crawl: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        return crawl
+
+    async def get_crawl(self, user_id: int, crawl_id: int) -> Crawl:
+        result = await self.db.execute(
+            select(Crawl).filter(Crawl.id == crawl_id, Crawl.user_id == user_id)
+        )
+        crawl = result.scalars().first()
+        if not crawl:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Crawl not found")
+        return crawl
+
+    async def _scan_page(self, scanner: ScanService, url: str, depth: int, collect_links: bool):
+        try:
+            await asyncio.to_thread(scanner.validate_url, url)
+            # Waits out the host's crawl-delay before taking a slot, so pages
+            # queued behind a slow host do not hold capacity scans could use.
+            if settings.SCAN_RESPECT_ROBOTS:
+                await scanner.check_robots(url)
+            async with scan_admission.slot(BACKGROUND):
+                page = await scanner.fetch_html(url, robots_checked=settings.SCAN_RESPECT_ROBOTS)
+                analysis = await asyncio.to_thread(
+                    scanner.parse_page, page.body, page.final_url or url, collect_links, page.encoding
+                )
+            analysis.bytes_on_wire = page.bytes_on_wire
+            analysis.bytes_decoded = len(page.body)
+            analysis.final_url = page.final_url
+        except ScanError as e:
+            logger.info(f"Crawl page {url} failed: {e.message}")
+            return url, depth, None
+        except Exception as e:
+            logger.warning(f"Crawl page {url} failed: {e}")
+            return url, depth, None
+        return url, depth, analysis
+
+    async def run_crawl(self, crawl_id: int):
+        crawl = await self.db.get(Crawl, crawl_id)
+        if crawl is None or crawl.status != "pending":
+            return
+        crawl.status = "running"
+        await self.db.commit()
+
+        root_url = normalize_url(crawl.root_url)
+        # Links may point at the submitted origin or, when the root page
+        # redirects (http -> https, apex -> www), at the one it ended up on.
+        origins = {_origin(root_url)}
+        seen = BloomFilter(
+            min(max(crawl.max_pages * CRAWL_LINKS_PER_PAGE_ESTIMATE, 1000), CRAWL_MAX_SEEN_CAPACITY)
+        )
+        frontier = CrawlFrontier()
+        seen.add(root_url)
+        frontier.push(root_url, 0)
+
+        timeout = aiohttp.ClientTimeout(total=TIMEOUT_TOTAL, connect=TIMEOUT_CONNECT, sock_read=TIMEOUT_READ)
+        connector = aiohttp.TCPConnector(limit=crawl.concurrency)
+        try:
+            async with aiohttp.ClientSession(timeout=timeout, connector=connector) as client:
+                # Background work: a page waits for its turn on a host with
+                # a crawl-delay rather than failing, behind interactive scans.
+                scanner = ScanService(self.db, client=client, max_pacing_wait=None, priority=BACKGROUND)
+                pending = set()
+                dispatched = 0
+                try:
+                    while frontier or pending:
+                        while frontier and len(pending) < crawl.concurrency and dispatched < crawl.max_pages:
+                            url, depth = frontier.pop()
+                            pending.add(asyncio.create_task(
+                                self._scan_page(scanner, url, depth, collect_links=depth < crawl.max_depth)
+                            ))
+                            dispatched += 1
+                        if not pending:
+                            break
+
+                        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                        scanned_before = crawl.pages_scanned
+                        for task in done:
+                            url, depth, analysis = task.result()
+                            if analysis is None:
+                                crawl.pages_failed += 1
+                                continue
+                            # Rows are written as pages complete so nothing
+                            # accumulates in memory for the lifetime of the crawl.
+                            self.db.add(scanner.build_scan(crawl.user_id, url, analysis, crawl_id=crawl.id))
+                            crawl.pages_scanned += 1
+                            if depth == 0 and analysis.final_url:
+                                origins.add(_origin(normalize_url(analysis.final_url)))
+                            if dispatched >= crawl.max_pages:
+                                continue
+                            self._enqueue_links(analysis, depth + 1, origins, seen, frontier)
+                        if crawl.pages_scanned > scanned_before:
+                            await scanner.bump_scan_version(crawl.user_id)
+                            await self.db.execute(notify_statement([
+                                crawl_event(crawl.user_id, crawl.id, crawl.pages_scanned - scanned_before)
+                            ]))
+                        await self.db.commit()
+                        if crawl.pages_scanned > scanned_before:
+                            recent_writes.note(crawl.user_id)
+                finally:
+                    # On failure, stop the pages still in flight before their
+                    # HTTP session closes under them.
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+
+            crawl.status = "completed"
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Crawl {crawl_id} failed: {e}")
+            crawl.status = "failed"
+            crawl.error = str(e)[:500]
+        crawl.finished_at = datetime.utcnow()
+        await self.db.commit()
+
+    @staticmethod
+    def _enqueue_links(analysis: PageAnalysis, depth: int, origins: Set, seen: BloomFilter, frontier: CrawlFrontier):
+        for link in analysis.links:
+            normalized = normalize_url(link)
+            if _origin(normalized) not in origins:
+                continue
+            if seen.add(normalized):
+                frontier.push(normalized, depth)
+
+
+async def run_crawl_in_background(crawl_id: int):
+    # The request's session is closed once the response is sent, so the
+    # crawl gets a session of its own.
+    async with AsyncSessionLocal() as session:
+        await CrawlService(session).run_crawl(crawl_id)
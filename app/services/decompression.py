@@ -0,0 +1,214 @@
+import zlib
+from typing import List
+
+try:
+    import brotli
+except ImportError:  # optional, enables "br"
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, enables "zstd"
+    zstandard = None
+
+# Configuration Helpers
+MAX_DECODED_BYTES = 10 * 1024 * 1024
+MAX_EXPANSION_RATIO = 100
+# Small pages compress very well; the ratio is only enforced past this size.
+EXPANSION_CHECK_MIN_BYTES = 1024 * 1024
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+class DecodeError(Exception):
+    pass
+
+
+class BodyTooLarge(DecodeError):
+    pass
+
+
+def accept_encoding() -> str:
+    encodings = ["gzip", "deflate"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return ", ".join(encodings)
+
+
+class _Sink:
+    def __init__(self, decoder: "StreamDecoder"):
+        self.decoder = decoder
+
+    def write(self, data: bytes) -> int:
+        self.decoder._emit(data)
+        return len(data)
+
+
+class _ZstdFrames:
+    """
+    Follows the frame and block headers of a zstd stream, skipping their
+    contents, so a truncated stream can be told from a complete one; the
+    streaming decompressor does not report where frames end.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self._state = "magic"
+        self._want = 4
+        self._header = b""
+        self._skip = 0
+        self._checksum = False
+
+    @property
+    def complete(self) -> bool:
+        return self.frames > 0 and self._state == "magic" and not self._header and not self._skip
+
+    def feed(self, data: bytes):
+        pos = 0
+        while pos < len(data):
+            if self._skip:
+                step = min(self._skip, len(data) - pos)
+                self._skip -= step
+                pos += step
+                continue
+            step = min(self._want - len(self._header), len(data) - pos)
+            self._header += data[pos:pos + step]
+            pos += step
+            if len(self._header) == self._want:
+                header, self._header = self._header, b""
+                self._advance(int.from_bytes(header, "little"))
+
+    def _advance(self, value: int):
+        if self._state == "magic":
+            if value == 0xFD2FB528:
+                self._state, self._want = "descriptor", 1
+            elif 0x184D2A50 <= value <= 0x184D2A5F:
+                self._state, self._want = "skippable", 4
+            else:
+                raise ValueError("not a zstd frame")
+        elif self._state == "skippable":
+            self._skip = value
+            self._state, self._want = "magic", 4
+            self.frames += 1
+        elif self._state == "descriptor":
+            single_segment = value >> 5 & 1
+            self._checksum = bool(value & 4)
+            content_size = (single_segment, 2, 4, 8)[value >> 6]
+            self._skip = (not single_segment) + (0, 1, 2, 4)[value & 3] + content_size
+            self._state, self._want = "block", 3
+        else:
+            # Block header: last-block bit, 2-bit type, 21-bit size. RLE
+            # blocks (type 1) carry a single byte.
+            self._skip = 1 if value >> 1 & 3 == 1 else value >> 3
+            if value & 1:
+                self._skip += 4 if self._checksum else 0
+                self._state, self._want = "magic", 4
+                self.frames += 1
+
+
+class StreamDecoder:
+    """
+    Incrementally decodes a response body with the given Content-Encoding.
+    Output is produced at most DECODE_CHUNK_SIZE bytes at a time and checked
+    against max_bytes and max_ratio (decoded bytes per byte on the wire) as
+    it is produced, so a decompression bomb is stopped after a bounded amount
+    of work and memory.
+    """
+
+    def __init__(
+        self,
+        content_encoding: str = "",
+        max_bytes: int = MAX_DECODED_BYTES,
+        max_ratio: float = MAX_EXPANSION_RATIO,
+    ):
+        self.content_encoding = (content_encoding or "identity").strip().lower()
+        self.max_bytes = max_bytes
+        self.max_ratio = max_ratio
+        self.bytes_on_wire = 0
+        self.bytes_decoded = 0
+        self._parts: List[bytes] = []
+        self._zlib = None
+        self._brotli = None
+        self._zstd = None
+        self._zstd_frames = None
+
+        if self.content_encoding in ("gzip", "x-gzip"):
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.content_encoding == "deflate":
+            self._zlib = None  # zlib-wrapped or raw, decided on the first chunk
+        elif self.content_encoding == "br" and brotli is not None:
+            self._brotli = brotli.Decompressor()
+        elif self.content_encoding == "zstd" and zstandard is not None:
+            self._zstd = zstandard.ZstdDecompressor().stream_writer(_Sink(self), write_size=DECODE_CHUNK_SIZE)
+            self._zstd_frames = _ZstdFrames()
+        elif self.content_encoding != "identity":
+            raise DecodeError(f"Unsupported Content-Encoding: {content_encoding}")
+
+    def _emit(self, data: bytes):
+        if not data:
+            return
+        self.bytes_decoded += len(data)
+        if self.bytes_decoded > self.max_bytes:
+            raise BodyTooLarge(f"Page exceeds {self.max_bytes} bytes")
+        if (
+            self.bytes_decoded > EXPANSION_CHECK_MIN_BYTES
+            and self.bytes_decoded > self.bytes_on_wire * self.max_ratio
+        ):
+            raise BodyTooLarge(f"Page expands more than {self.max_ratio}x when decompressed")
+        self._parts.append(data)
+
+    def _feed_zlib(self, data: bytes):
+        while data:
+            self._emit(self._zlib.decompress(data, DECODE_CHUNK_SIZE))
+            data = self._zlib.unconsumed_tail
+
+    def feed(self, chunk: bytes):
+        self.bytes_on_wire += len(chunk)
+        try:
+            if self.content_encoding == "deflate" and self._zlib is None:
+                # Some servers send raw deflate despite the spec asking for zlib.
+                wbits = zlib.MAX_WBITS if chunk[:1] and (chunk[0] & 0x0F) == 8 else -zlib.MAX_WBITS
+                self._zlib = zlib.decompressobj(wbits)
+            if self._zlib is not None:
+                self._feed_zlib(chunk)
+            elif self._brotli is not None:
+                # Output past the limit stays buffered in the decompressor;
+                # drain it with empty input until nothing more comes out.
+                # can_accept_more_data() is not a reliable signal for this.
+                data = self._brotli.process(chunk, output_buffer_limit=DECODE_CHUNK_SIZE)
+                while data:
+                    self._emit(data)
+                    data = self._brotli.process(b"", output_buffer_limit=DECODE_CHUNK_SIZE)
+            elif self._zstd is not None:
+                self._zstd.write(chunk)
+                self._zstd_frames.feed(chunk)
+            else:
+                self._emit(chunk)
+        except BodyTooLarge:
+            raise
+        except Exception as e:
+            raise DecodeError(f"Could not decode {self.content_encoding} body: {e}")
+
+    def finish(self) -> bytes:
+        try:
+            complete = True
+            if self._zlib is not None:
+                self._emit(self._zlib.flush())
+                complete = self._zlib.eof
+            elif self._brotli is not None:
+                complete = self._brotli.is_finished()
+            elif self._zstd is not None:
+                self._zstd.flush()
+                complete = self._zstd_frames.complete
+        except BodyTooLarge:
+            raise
+        except Exception as e:
+            raise DecodeError(f"Could not decode {self.content_encoding} body: {e}")
+        # An empty body (204, HEAD) is not a truncated stream.
+        if self.bytes_on_wire and not complete:
+            raise DecodeError(f"Truncated {self.content_encoding} stream")
+        body = b"".join(self._parts)
+        self._parts = []
+        return body
+
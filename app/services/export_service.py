@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal, SessionRouter
+from app.models.scans import Scans
+
+# Configuration Helpers
+EXPORT_YIELD_PER = 1000
+EXPORT_CHUNK_SIZE = 64 * 1024
+EXPORT_COLUMNS = ("id", "url", "total_images", "alt_images", "non_alt_images", "score", "crawl_id", "created_at")
+
+logger = logging.getLogger(__name__)
+
+
+class ScanExportService:
+    """
+    Streams a user's full scan history without materialising it. Rows come off
+    a server-side cursor in batches of EXPORT_YIELD_PER as plain tuples (no ORM
+    identity map), are encoded into ~EXPORT_CHUNK_SIZE chunks and optionally
+    gzipped on the fly, so memory use does not depend on the number of rows.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, router: Optional[SessionRouter] = None):
+        # The export outlives the request dependencies, so it opens its own session.
+        self.session_factory = session_factory
+        self.router = router
+
+    async def iter_rows(self, user_id: int, search: Optional[str] = None, crawl_id: Optional[int] = None):
+        stmt = (
+            select(Scans.id, Scans.url, Scans.alt_images, Scans.non_alt_images, Scans.crawl_id, Scans.created_at)
+            .filter(Scans.user_id == user_id)
+        )
+        if search:
+            stmt = stmt.filter(Scans.url.contains(search))
+        if crawl_id is not None:
+            stmt = stmt.filter(Scans.crawl_id == crawl_id)
+        stmt = stmt.order_by(Scans.id).execution_options(yield_per=EXPORT_YIELD_PER)
+
+        async with self.session_factory() as session:
+            try:
+                result = await session.stream(stmt)
+            except Exception as e:
+                if self.router is not None:
+                    self.router.report_error(self.session_factory, e)
+                raise
+            async for scan_id, url, alt, non_alt, row_crawl_id, created_at in result:
+                total = alt + non_alt
+                score = round(alt / total * 100) if total else 0
+                yield (scan_id, url, total, alt, non_alt, score, row_crawl_id,
+                       created_at.isoformat() if created_at else None)
+
+    async def iter_csv(self, rows) -> AsyncIterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        async for row in rows:
+            writer.writerow(row)
+            if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    async def iter_ndjson(self, rows) -> AsyncIterator[str]:
+        parts = []
+        size = 0
+        async for row in rows:
+            line = json.dumps(dict(zip(EXPORT_COLUMNS, row)), separators=(",", ":")) + "\n"
+            parts.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_SIZE:
+                yield "".join(parts)
+                parts = []
+                size = 0
+        yield "".join(parts)
+
+    async def stream(
+        self,
+        user_id: int,
+        export_format: str = "csv",
+        compress: bool = False,
+        search: Optional[str] = None,
+        crawl_id: Optional[int] = None,
+    ) -> AsyncIterator[bytes]:
+        rows = self.iter_rows(user_id, search=search, crawl_id=crawl_id)
+        chunks = self.iter_csv(rows) if export_format == "csv" else self.iter_ndjson(rows)
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        async for chunk in chunks:
+            data = chunk.encode()
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if compressor is not None:
+            yield compressor.flush()
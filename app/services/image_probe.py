@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Tuple
+
+import aiohttp
+
+# Configuration Helpers
+MAX_PROBES_PER_PAGE = 200
+PROBE_CONCURRENCY = 64
+PROBE_PER_HOST = 6
+PROBE_TIMEOUT = 5.0
+PROBE_CACHE_SIZE = 50_000
+PROBE_CACHE_TTL = 3600.0
+# Network failures may be transient, so they are retried sooner.
+PROBE_ERROR_TTL = 300.0
+PROBE_USER_AGENT = "Mozilla/5.0 (compatible; WebImageAnalyzer/1.0; image check)"
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeCache:
+    """Bounded LRU of image URL -> reachable, with a per-entry TTL."""
+
+    def __init__(self, max_size: int = PROBE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[bool, float]]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[bool]:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        ok, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[url]
+            return None
+        self._entries.move_to_end(url)
+        return ok
+
+    def set(self, url: str, ok: bool, ttl: float):
+        self._entries[url] = (ok, time.monotonic() + ttl)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ImageProber:
+    """
+    Checks whether image URLs load. All scans share one HTTP session whose
+    connector caps connections overall and per host, so a page with hundreds
+    of images on one CDN is probed a few requests at a time. Results are
+    cached per image URL across scans.
+    """
+
+    def __init__(self, cache: Optional[ProbeCache] = None, per_host: int = PROBE_PER_HOST):
+        self.cache = cache or ProbeCache()
+        self.per_host = per_host
+        self._client: Optional[aiohttp.ClientSession] = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self._client is None or self._client.closed:
+            self._client = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=PROBE_CONCURRENCY, limit_per_host=self.per_host),
+                timeout=aiohttp.ClientTimeout(total=PROBE_TIMEOUT),
+                headers={"User-Agent": PROBE_USER_AGENT},
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def _check(self, url: str) -> Tuple[bool, float]:
+        client = self._session()
+        # Redirects are not followed: the target was never validated, and an
+        # image that redirects almost always resolves.
+        try:
+            async with client.head(url, allow_redirects=False) as response:
+                status = response.status
+            if status in (405, 501):
+                # HEAD not supported; ask for the first byte only.
+                async with client.get(url, headers={"Range": "bytes=0-0"}, allow_redirects=False) as response:
+                    status = response.status
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return False, PROBE_ERROR_TTL
+        return status < 400, PROBE_CACHE_TTL
+
+    async def _probe_one(self, url: str, validate: Callable[[str], None]) -> Optional[bool]:
+        try:
+            # Same SSRF rules as the page itself; resolving the host blocks.
+            await asyncio.to_thread(validate, url)
+        except Exception:
+            return None
+        ok, ttl = await self._check(url)
+        self.cache.set(url, ok, ttl)
+        return ok
+
+    async def probe(self, urls: Iterable[str], validate: Callable[[str], None]) -> Tuple[int, int]:
+        """
+        Probes up to MAX_PROBES_PER_PAGE distinct URLs. URLs that fail
+        validation are skipped. Returns (probed, broken).
+        """
+        pending = []
+        probed = broken = 0
+        for url in list(dict.fromkeys(urls))[:MAX_PROBES_PER_PAGE]:
+            cached = self.cache.get(url)
+            if cached is None:
+                pending.append(url)
+                continue
+            probed += 1
+            broken += not cached
+
+        results = await asyncio.gather(*(self._probe_one(url, validate) for url in pending))
+        for ok in results:
+            if ok is None:
+                continue
+            probed += 1
+            broken += not ok
+        return probed, broken
+
+
+image_prober = ImageProber()
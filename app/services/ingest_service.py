@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import recent_writes
+from app.models.scans import Scans
+from app.services.a11y_rules import DEFAULT_RULE_PROFILE
+from app.services.decompression import MAX_DECODED_BYTES
+from app.services.scan_events import notify_statement, scan_event
+from app.services.scan_service import MAX_URL_LENGTH, PageAnalysis, ScanService, sniff_encoding
+from app.services.warc import WarcFormatError, WarcReader, WarcRecord, read_http_response
+
+# Configuration Helpers
+INGEST_WORKERS = min(4, os.cpu_count() or 1)
+# Documents handed to the pool but not parsed yet. Reading the upload
+# pauses while this many are queued.
+INGEST_MAX_IN_FLIGHT = 2 * INGEST_WORKERS
+INGEST_BATCH_SIZE = 500
+INGEST_MAX_RECORDS = 100_000
+
+logger = logging.getLogger(__name__)
+
+_HTML_TYPES = ("text/html", "application/xhtml+xml")
+
+
+def parse_document(body: bytes, url: str, declared_encoding: Optional[str], rule_profile: str) -> Tuple[int, int, int]:
+    """Runs in a pool process: the image counts of one HTML document."""
+    return ScanService(db=None).parse_images(body, url, sniff_encoding(body, declared_encoding), rule_profile)
+
+
+class IngestPool:
+    """
+    Process pool shared by all ingestion requests of a worker, started on
+    first use. Parsing is CPU-bound, so threads would serialize on the GIL.
+    """
+
+    def __init__(self, workers: int = INGEST_WORKERS):
+        self.workers = workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Not forked: the parent runs an event loop and holds connections.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def reset(self, broken: Optional[Executor] = None):
+        # A pool whose process died cannot be used again. Failures reported
+        # late by an already replaced pool leave the new one alone.
+        if self._executor is not None and broken in (None, self._executor):
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+ingest_pool = IngestPool()
+
+
+@dataclass
+class HtmlDocument:
+    url: str
+    body: bytes
+    declared_encoding: Optional[str] = None
+
+
+@dataclass
+class IngestResult:
+    records: int = 0
+    scans: int = 0
+    skipped: int = 0
+
+
+def _charset(content_type: str) -> Optional[str]:
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset":
+            return value.strip().strip("\"'") or None
+    return None
+
+
+def _is_html(content_type: str) -> bool:
+    return content_type.split(";", 1)[0].strip().lower() in _HTML_TYPES
+
+
+def _valid_url(url: str) -> bool:
+    if not url or len(url) > MAX_URL_LENGTH:
+        return False
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and bool(parsed.hostname)
+
+
+def html_document(record: WarcRecord) -> Optional[HtmlDocument]:
+    """
+    The HTML page in a WARC record: the body of a successful "response"
+    record, or a "resource" record stored as HTML. None for anything else.
+    """
+    if record.block is None or not _valid_url(record.target_uri):
+        return None
+    if record.type == "response" and record.content_type.startswith("application/http"):
+        response = read_http_response(record.block)
+        if response is None or not 200 <= response.status < 300 or not _is_html(response.content_type):
+            return None
+        return HtmlDocument(record.target_uri, response.body, _charset(response.content_type))
+    if record.type == "resource" and _is_html(record.content_type):
+        return HtmlDocument(record.target_uri, record.block, _charset(record.content_type))
+    return None
+
+
+class IngestService:
+    """
+    Scans pages that are uploaded instead of fetched: single HTML documents
+    and WARC archives. Nothing is fetched, so this works without network
+    access.
+    """
+
+    def __init__(self, db: AsyncSession, executor: Optional[Executor] = None):
+        self.db = db
+        self.executor = executor
+        self.scanner = ScanService(db)
+
+    def _executor(self) -> Executor:
+        return self.executor or ingest_pool.executor()
+
+    def _row(self, user_id: int, document: HtmlDocument, counts: Tuple[int, int, int], rule_profile: str) -> dict:
+        total, alt, non_alt = counts
+        analysis = PageAnalysis(
+            total_images=total, alt_images=alt, non_alt_images=non_alt,
+            rule_profile=rule_profile, bytes_decoded=len(document.body),
+        )
+        scan = self.scanner.build_scan(user_id, document.url, analysis)
+        return {column.key: getattr(scan, column.key) for column in Scans.__table__.columns if column.key != "id"}
+
+    async def _save(self, user_id: int, rows: List[dict]) -> List[int]:
+        if not rows:
+            return []
+        try:
+            result = await self.db.execute(insert(Scans).returning(Scans.id, sort_by_parameter_order=True), rows)
+            ids = result.scalars().all()
+            await self.scanner.bump_scan_version(user_id)
+            await self.db.execute(notify_statement(
+                scan_event(user_id, scan_id, row["url"]) for row, scan_id in zip(rows, ids)
+            ))
+            await self.db.commit()
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Database error saving {len(rows)} ingested scans: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        recent_writes.note(user_id)
+        return ids
+
+    async def ingest_html(
+        self, user_id: int, url: str, body: bytes, content_type: str = "", rule_profile: str = DEFAULT_RULE_PROFILE
+    ) -> Scans:
+        if not _valid_url(url):
+            raise HTTPException(status_code=400, detail="Invalid URL. Only http and https URLs are allowed.")
+        if len(body) > MAX_DECODED_BYTES:
+            raise HTTPException(status_code=413, detail=f"Document exceeds {MAX_DECODED_BYTES} bytes")
+        document = HtmlDocument(url, body, _charset(content_type))
+        loop = asyncio.get_running_loop()
+        executor = self._executor()
+        try:
+            counts = await loop.run_in_executor(
+                executor, parse_document, document.body, document.url, document.declared_encoding, rule_profile
+            )
+        except BrokenProcessPool:
+            ingest_pool.reset(executor)
+            raise HTTPException(status_code=500, detail="Error parsing page content")
+        except Exception as e:
+            logger.error(f"Error parsing uploaded HTML for {url}: {e}")
+            raise HTTPException(status_code=500, detail="Error parsing page content")
+        row = self._row(user_id, document, counts, rule_profile)
+        (scan_id,) = await self._save(user_id, [row])
+        return Scans(id=scan_id, **row)
+
+    async def ingest_warc(
+        self, user_id: int, chunks: AsyncIterator[bytes], rule_profile: str = DEFAULT_RULE_PROFILE
+    ) -> IngestResult:
+        """
+        Scans every HTML response in a WARC streamed in as `chunks`. Records
+        are parsed in the process pool as they arrive, with at most
+        INGEST_MAX_IN_FLIGHT waiting, and saved in batches of
+        INGEST_BATCH_SIZE. Batches saved before an error are kept.
+        """
+        loop = asyncio.get_running_loop()
+        reader = WarcReader()
+        result = IngestResult()
+        # Each parse remembers the executor it went to, to tell whether a
+        # BrokenProcessPool is about the current pool or one already replaced.
+        pending: Dict[asyncio.Future, Tuple[HtmlDocument, Executor]] = {}
+        rows: List[dict] = []
+
+        def submit(document: HtmlDocument):
+            # Looked up every time: the pool is replaced after a crash.
+            executor = self._executor()
+            args = (document.body, document.url, document.declared_encoding, rule_profile)
+            try:
+                future = loop.run_in_executor(executor, parse_document, *args)
+            except BrokenProcessPool:
+                ingest_pool.reset(executor)
+                executor = self._executor()
+                future = loop.run_in_executor(executor, parse_document, *args)
+            pending[future] = (document, executor)
+
+        async def collect(return_when):
+            done, _ = await asyncio.wait(pending, return_when=return_when)
+            for future in done:
+                document, executor = pending.pop(future)
+                try:
+                    rows.append(self._row(user_id, document, future.result(), rule_profile))
+                except BrokenProcessPool:
+                    ingest_pool.reset(executor)
+                    result.skipped += 1
+                except Exception as e:
+                    logger.info(f"Skipping WARC record {document.url}: {e}")
+                    result.skipped += 1
+
+        async def flush():
+            if rows:
+                batch = rows[:]
+                rows.clear()
+                await self._save(user_id, batch)
+                result.scans += len(batch)
+
+        try:
+            async for chunk in chunks:
+                for record in reader.feed(chunk):
+                    result.records += 1
+                    if result.records > INGEST_MAX_RECORDS:
+                        raise HTTPException(
+                            status_code=413, detail=f"WARC has more than {INGEST_MAX_RECORDS} records"
+                        )
+                    document = html_document(record)
+                    if document is None:
+                        if record.type in ("response", "resource"):
+                            result.skipped += 1
+                        continue
+                    while len(pending) >= INGEST_MAX_IN_FLIGHT:
+                        await collect(asyncio.FIRST_COMPLETED)
+                    submit(document)
+                    if len(rows) >= INGEST_BATCH_SIZE:
+                        await flush()
+            reader.finish()
+            if pending:
+                await collect(asyncio.ALL_COMPLETED)
+            await flush()
+        except WarcFormatError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid WARC file: {e}")
+        finally:
+            for future in pending:
+                future.cancel()
+        return result
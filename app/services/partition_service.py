@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+
+# Configuration Helpers
+PARTITIONED_TABLE = "scans"
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_MAINTENANCE_INTERVAL = 6 * 3600
+# Arbitrary constant key so only one node runs maintenance at a time.
+PARTITION_ADVISORY_LOCK_ID = 7_241_032
+
+_PARTITION_NAME = re.compile(rf"^{PARTITIONED_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    match = _PARTITION_NAME.match(name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_ddl(month: date) -> str:
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def detach_ddl(name: str, pending: bool = False) -> str:
+    # A DETACH ... CONCURRENTLY that was interrupted leaves the partition
+    # "detach pending"; it can only be finished, not started again.
+    mode = "FINALIZE" if pending else "CONCURRENTLY"
+    return f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name} {mode}"
+
+
+def expired_partitions(names: List[str], today: date, retention_months: int) -> List[str]:
+    """Partitions whose whole month is older than the retention window."""
+    cutoff = add_months(date(today.year, today.month, 1), -retention_months)
+    expired = []
+    for name in names:
+        month = partition_month(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+class PartitionManager:
+    """
+    Maintains the monthly range partitions of the scans table: creates them
+    ahead of time and, when a retention period is set, detaches expired ones,
+    archives them to gzipped CSV and drops them.
+    """
+
+    def __init__(self, bind=engine, archive_dir: str = None, retention_months: Optional[int] = None):
+        self.bind = bind
+        self.archive_dir = archive_dir or settings.SCAN_ARCHIVE_DIR
+        self.retention_months = retention_months
+
+    def list_partitions(self, conn) -> List[str]:
+        rows = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent"
+        ), {"parent": PARTITIONED_TABLE})
+        return [row[0] for row in rows]
+
+    def list_detach_pending(self, conn) -> List[str]:
+        rows = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :parent AND i.inhdetachpending"
+        ), {"parent": PARTITIONED_TABLE})
+        return [row[0] for row in rows]
+
+    def list_detached(self, conn) -> List[str]:
+        # Partitions left detached by an interrupted retention run.
+        rows = conn.execute(text(
+            "SELECT c.relname FROM pg_class c "
+            "WHERE c.relkind = 'r' AND c.relname ~ :pattern "
+            "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid)"
+        ), {"pattern": _PARTITION_NAME.pattern})
+        return [row[0] for row in rows]
+
+    def ensure_partitions(self, months_ahead: int = PARTITION_MONTHS_AHEAD, today: Optional[date] = None) -> List[str]:
+        today = today or datetime.utcnow().date()
+        current = date(today.year, today.month, 1)
+        with self.bind.begin() as conn:
+            existing = set(self.list_partitions(conn))
+            created = []
+            for offset in range(months_ahead + 1):
+                month = add_months(current, offset)
+                if partition_name(month) not in existing:
+                    conn.execute(text(partition_ddl(month)))
+                    created.append(partition_name(month))
+        if created:
+            logger.info(f"Created scan partitions: {', '.join(created)}")
+        return created
+
+    def archive_partition(self, name: str) -> str:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{name}.csv.gz")
+        raw = self.bind.raw_connection()
+        try:
+            with gzip.open(path + ".tmp", "wb") as archive:
+                cursor = raw.cursor()
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH (FORMAT csv, HEADER)", archive)
+                cursor.close()
+            raw.commit()
+        finally:
+            raw.close()
+        os.replace(path + ".tmp", path)
+        return path
+
+    def apply_retention(self, today: Optional[date] = None) -> List[str]:
+        if not self.retention_months:
+            return []
+        today = today or datetime.utcnow().date()
+        with self.bind.connect() as conn:
+            expired = expired_partitions(self.list_partitions(conn), today, self.retention_months)
+            detached = expired_partitions(self.list_detached(conn), today, self.retention_months)
+            pending = set(self.list_detach_pending(conn))
+
+        archived = []
+        for name in sorted(expired + detached):
+            if name in expired:
+                # DETACH ... CONCURRENTLY only blocks other sessions briefly but
+                # cannot run inside a transaction block; nor can FINALIZE.
+                with self.bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    conn.execute(text(detach_ddl(name, pending=name in pending)))
+            path = self.archive_partition(name)
+            with self.bind.begin() as conn:
+                conn.execute(text(f"DROP TABLE {name}"))
+            logger.info(f"Archived scan partition {name} to {path}")
+            archived.append(name)
+        return archived
+
+    def run(self) -> Tuple[List[str], List[str]]:
+        with self.bind.connect() as lock_conn:
+            if not lock_conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": PARTITION_ADVISORY_LOCK_ID}).scalar():
+                return [], []
+            try:
+                return self.ensure_partitions(), self.apply_retention()
+            finally:
+                lock_conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": PARTITION_ADVISORY_LOCK_ID})
+
+
+class PartitionMaintenance:
+    """Runs PartitionManager in the background every PARTITION_MAINTENANCE_INTERVAL seconds."""
+
+    def __init__(self, manager: PartitionManager, interval: float = PARTITION_MAINTENANCE_INTERVAL):
+        self.manager = manager
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.manager.run)
+            except Exception as e:
+                logger.error(f"Scan partition maintenance failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+partition_maintenance = PartitionMaintenance(PartitionManager(retention_months=settings.SCAN_RETENTION_MONTHS))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create upcoming scan partitions and archive expired ones.")
+    parser.add_argument("--retention-months", type=int, default=settings.SCAN_RETENTION_MONTHS)
+    parser.add_argument("--archive-dir", default=settings.SCAN_ARCHIVE_DIR)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    created, archived = PartitionManager(archive_dir=args.archive_dir, retention_months=args.retention_months).run()
+    print(f"created={created} archived={archived}")
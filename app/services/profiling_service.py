@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.scan_profiles import ScanProfile
+from app.models.scans import Scans
+from app.core.profiling import ScanProfiler
+from app.services.a11y_rules import DEFAULT_RULE_PROFILE
+from app.services.scan_service import ScanService
+
+# Configuration Helpers
+PROFILE_MAX_CONCURRENT = 1
+PROFILE_ID_HEADER = "X-Scan-Profile-Id"
+
+logger = logging.getLogger(__name__)
+
+# Profiles run one at a time per worker: cProfile slows the profiled code
+# down a lot and only one profiler can be active per thread.
+_profile_slots = asyncio.Semaphore(PROFILE_MAX_CONCURRENT)
+
+
+class ScanProfileService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def profile_scan(
+        self, user_id: int, url: str, probe_images: bool = False, rule_profile: str = DEFAULT_RULE_PROFILE
+    ) -> Tuple[Scans, ScanProfile]:
+        """
+        Runs perform_scan under a ScanProfiler and stores the result, also when
+        the scan fails. The failure is re-raised with the profile id attached.
+        """
+        if _profile_slots.locked():
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Another scan is being profiled, try again shortly",
+                headers={"Retry-After": "5"},
+            )
+        async with _profile_slots:
+            profiler = ScanProfiler()
+            scan = None
+            error = None
+            try:
+                scan = await ScanService(self.db).perform_scan(
+                    user_id=user_id, url_in=url, profiler=profiler,
+                    probe_images=probe_images, rule_profile=rule_profile,
+                )
+            except HTTPException as e:
+                error = e
+
+            record = ScanProfile(
+                user_id=user_id,
+                url=url,
+                scan_id=scan.id if scan is not None else None,
+                status_code=error.status_code if error else status.HTTP_201_CREATED,
+                total_seconds=profiler.total_seconds,
+                stage_timings=profiler.timings,
+                profile=profiler.report(),
+            )
+            self.db.add(record)
+            try:
+                await self.db.commit()
+                await self.db.refresh(record)
+            except Exception as e:
+                await self.db.rollback()
+                logger.error(f"Database error saving scan profile: {e}")
+                raise error or HTTPException(status_code=500, detail="Database error")
+
+        if error is not None:
+            headers = dict(error.headers or {})
+            headers[PROFILE_ID_HEADER] = str(record.id)
+            raise HTTPException(status_code=error.status_code, detail=error.detail, headers=headers)
+        return scan, record
+
+    async def get_profile(self, profile_id: int) -> ScanProfile:
+        result = await self.db.execute(select(ScanProfile).filter(ScanProfile.id == profile_id))
+        profile = result.scalars().first()
+        if not profile:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+        return profile
@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+# Configuration Helpers
+REDIRECT_CACHE_SIZE = 10_000
+REDIRECT_CACHE_TTL = 24 * 3600.0
+
+
+class RedirectCache:
+    """
+    Bounded LRU of permanent (301/308) redirects, normalized source URL ->
+    target URL, with a TTL so a site that changes its redirects is followed
+    again within a day. Per worker.
+    """
+
+    def __init__(self, max_size: int = REDIRECT_CACHE_SIZE, ttl: float = REDIRECT_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+
+    def get(self, url: str) -> Optional[str]:
+        entry = self._entries.get(url)
+        if entry is None:
+            return None
+        target, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[url]
+            return None
+        self._entries.move_to_end(url)
+        return target
+
+    def set(self, url: str, target: str):
+        self._entries[url] = (target, time.monotonic() + self.ttl)
+        self._entries.move_to_end(url)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def forget(self, url: str):
+        self._entries.pop(url, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+redirect_cache = RedirectCache()
@@ -0,0 +1,408 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urljoin, urlparse
+
+import aiohttp
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.admission import INTERACTIVE, uncounted_wait
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.robots_rules import RobotsRule
+from app.services.single_flight import SingleFlight, advisory_lock
+
+# Configuration Helpers
+ROBOTS_USER_AGENT_TOKEN = "WebImageAnalyzer"
+ROBOTS_CACHE_TTL = 24 * 3600.0
+# Unreachable robots.txt (5xx, network error) disallows the host; retried sooner.
+ROBOTS_ERROR_TTL = 300.0
+ROBOTS_CACHE_SIZE = 10_000
+ROBOTS_MAX_BYTES = 500 * 1024
+ROBOTS_MAX_REDIRECTS = 5
+ROBOTS_TIMEOUT = 5.0
+ROBOTS_MAX_CRAWL_DELAY = 10.0
+# How long a scan waits for its turn on a host with a crawl-delay.
+ROBOTS_MAX_PACING_WAIT = 30.0
+PACER_MAX_HOSTS = 10_000
+
+logger = logging.getLogger(__name__)
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+# Characters left alone when percent-encoding paths and patterns.
+_PATH_SAFE = "/?=&;:@+,!~'()*$%"
+
+
+class RobotsDisallowed(Exception):
+    pass
+
+
+class PacingTimeout(Exception):
+    pass
+
+
+def _encode(value: str) -> str:
+    return quote(value, safe=_PATH_SAFE)
+
+
+def _compile(pattern: str):
+    # Plain prefixes are matched with startswith; only patterns using the
+    # "*" and "$" operators need a regex.
+    if "*" not in pattern and not pattern.endswith("$"):
+        return pattern
+    anchored = pattern.endswith("$")
+    body = pattern[:-1] if anchored else pattern
+    regex = ".*".join(re.escape(part) for part in body.split("*"))
+    return re.compile(regex + ("$" if anchored else ""))
+
+
+class RobotsRules:
+    """
+    The allow/disallow rules of one host that apply to us, compiled for
+    matching. Rules are kept ordered by specificity (pattern length, allow
+    first on ties), so the first matching rule is the longest match and
+    decides, as RFC 9309 asks.
+    """
+
+    __slots__ = ("rules", "crawl_delay", "_matchers")
+
+    def __init__(self, rules: Sequence[Tuple[bool, str]] = (), crawl_delay: Optional[float] = None):
+        self.rules = sorted(
+            ((bool(allow), _encode(pattern)) for allow, pattern in rules),
+            key=lambda rule: (-len(rule[1]), not rule[0]),
+        )
+        self.crawl_delay = crawl_delay
+        self._matchers = tuple((allow, _compile(pattern)) for allow, pattern in self.rules)
+
+    def allowed(self, path: str) -> bool:
+        if path == "/robots.txt":
+            return True
+        path = _encode(path or "/")
+        for allow, matcher in self._matchers:
+            if matcher.__class__ is str:
+                if path.startswith(matcher):
+                    return allow
+            elif matcher.match(path):
+                return allow
+        return True
+
+    @classmethod
+    def parse(cls, text: str, token: str = ROBOTS_USER_AGENT_TOKEN) -> "RobotsRules":
+        """
+        Keeps the groups naming our product token, or the "*" groups when none
+        does. Several matching groups are combined.
+        """
+        groups: List[_Group] = []
+        current = None
+        in_agents = False
+        for raw in text.splitlines():
+            line = raw.split("#", 1)[0].strip()
+            if ":" not in line:
+                continue
+            key, value = line.split(":", 1)
+            key, value = key.strip().lower(), value.strip()
+            if key == "user-agent":
+                if current is None or not in_agents:
+                    current = _Group()
+                    groups.append(current)
+                current.agents.add(value.split("/", 1)[0].strip().lower())
+                in_agents = True
+                continue
+            in_agents = False
+            if current is None:
+                continue
+            if key in ("allow", "disallow"):
+                # An empty Disallow allows everything, same as no rule.
+                if value:
+                    current.rules.append((key == "allow", value))
+            elif key == "crawl-delay":
+                try:
+                    current.crawl_delay = float(value)
+                except ValueError:
+                    pass
+
+        token = token.lower()
+        matched = [g for g in groups if token in g.agents] or [g for g in groups if "*" in g.agents]
+        delays = [g.crawl_delay for g in matched if g.crawl_delay is not None and g.crawl_delay > 0]
+        return cls(
+            [rule for g in matched for rule in g.rules],
+            min(max(delays), ROBOTS_MAX_CRAWL_DELAY) if delays else None,
+        )
+
+
+@dataclass
+class _Group:
+    agents: set = field(default_factory=set)
+    rules: List[Tuple[bool, str]] = field(default_factory=list)
+    crawl_delay: Optional[float] = None
+
+
+ALLOW_ALL = RobotsRules()
+DISALLOW_ALL = RobotsRules([(False, "/")])
+
+
+class RobotsCache:
+    """Bounded LRU of origin -> RobotsRules, with a per-entry TTL."""
+
+    def __init__(self, max_size: int = ROBOTS_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[RobotsRules, float]]" = OrderedDict()
+
+    def get(self, origin: str) -> Optional[RobotsRules]:
+        entry = self._entries.get(origin)
+        if entry is None:
+            return None
+        rules, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[origin]
+            return None
+        self._entries.move_to_end(origin)
+        return rules
+
+    def set(self, origin: str, rules: RobotsRules, ttl: float):
+        self._entries[origin] = (rules, time.monotonic() + ttl)
+        self._entries.move_to_end(origin)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class HostPacer:
+    """
+    Spaces out fetches to a host by its crawl-delay. Each caller reserves the
+    next free slot and sleeps until it, so concurrent scans of one host go
+    out one per delay without a lock. Callers whose slot is more than
+    max_wait away are turned down instead of queueing.
+
+    Interactive scans only queue behind each other and the last background
+    fetch that went out, not behind the slots a crawl has reserved ahead;
+    a background caller whose slot was taken meanwhile reserves again.
+    """
+
+    def __init__(self, max_hosts: int = PACER_MAX_HOSTS):
+        self.max_hosts = max_hosts
+        # Next free slot per host, counting every reservation.
+        self._next_slot: Dict[str, float] = {}
+        # Next free slot per host for interactive callers.
+        self._next_interactive: Dict[str, float] = {}
+        # When each host's latest background fetch went out.
+        self._background_sent: Dict[str, float] = {}
+
+    def _evict(self, now: float, delay: float):
+        if len(self._next_slot) >= self.max_hosts:
+            self._next_slot = {h: t for h, t in self._next_slot.items() if t > now}
+            self._next_interactive = {h: t for h, t in self._next_interactive.items() if t > now}
+            self._background_sent = {h: t for h, t in self._background_sent.items() if t + delay > now}
+
+    async def wait(
+        self,
+        host: str,
+        delay: Optional[float],
+        max_wait: Optional[float] = ROBOTS_MAX_PACING_WAIT,
+        priority: int = INTERACTIVE,
+    ):
+        if not delay:
+            return
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if priority == INTERACTIVE:
+            start = max(now, self._next_interactive.get(host, now), self._background_sent.get(host, now - delay) + delay)
+        else:
+            start = max(now, self._next_slot.get(host, now), self._next_interactive.get(host, now))
+        if max_wait is not None and start - now > max_wait:
+            raise PacingTimeout(f"{host} asks for {delay:g}s between requests")
+        self._evict(now, delay)
+        if priority == INTERACTIVE:
+            self._next_interactive[host] = start + delay
+            self._next_slot[host] = max(self._next_slot.get(host, now), start + delay)
+            if start > now:
+                with uncounted_wait():
+                    await asyncio.sleep(start - now)
+            return
+
+        with uncounted_wait():
+            while True:
+                self._next_slot[host] = start + delay
+                if start > now:
+                    await asyncio.sleep(start - now)
+                now = loop.time()
+                # An interactive scan took a slot within delay of ours.
+                if self._next_interactive.get(host, now) <= now:
+                    break
+                start = max(now, self._next_slot.get(host, now), self._next_interactive[host])
+        self._background_sent[host] = now
+
+
+def _origin(url: str) -> Tuple[str, str]:
+    parsed = urlparse(url)
+    host = (parsed.hostname or "").lower()
+    if parsed.port:
+        host = f"{host}:{parsed.port}"
+    path = parsed.path or "/"
+    if parsed.query:
+        path = f"{path}?{parsed.query}"
+    return f"{parsed.scheme.lower()}://{host}", path
+
+
+class RobotsPolicy:
+    """
+    Allow/deny decisions from each host's robots.txt. A host's robots.txt is
+    fetched at most once per ROBOTS_CACHE_TTL: concurrent scans in a worker
+    share one fetch, and with `shared` the parsed rules are stored in the
+    robots_rules table so other workers and nodes reuse them.
+    """
+
+    def __init__(self, cache: Optional[RobotsCache] = None, pacer: Optional[HostPacer] = None, shared: bool = True):
+        self.cache = cache or RobotsCache()
+        self.pacer = pacer or HostPacer()
+        self.shared = shared
+        self._flight = SingleFlight()
+        self._client: Optional[aiohttp.ClientSession] = None
+
+    def _session(self) -> aiohttp.ClientSession:
+        if self._client is None or self._client.closed:
+            self._client = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=ROBOTS_TIMEOUT),
+                headers={"User-Agent": f"Mozilla/5.0 (compatible; {ROBOTS_USER_AGENT_TOKEN}/1.0)"},
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def check(
+        self,
+        url: str,
+        validate: Callable[[str], None],
+        max_wait: Optional[float] = ROBOTS_MAX_PACING_WAIT,
+        priority: int = INTERACTIVE,
+    ):
+        """
+        Raises RobotsDisallowed if the URL may not be fetched, otherwise waits
+        out the host's crawl-delay (PacingTimeout if that takes longer than
+        max_wait).
+        """
+        origin, path = _origin(url)
+        rules = await self.rules_for(origin, validate)
+        if not rules.allowed(path):
+            raise RobotsDisallowed(f"{url} is disallowed by robots.txt")
+        await self.pacer.wait(origin, rules.crawl_delay, max_wait, priority)
+
+    async def rules_for(self, origin: str, validate: Callable[[str], None]) -> RobotsRules:
+        rules = self.cache.get(origin)
+        if rules is not None:
+            return rules
+        return await self._flight.do(origin, lambda: self._load(origin, validate))
+
+    async def _load(self, origin: str, validate: Callable[[str], None]) -> RobotsRules:
+        if not self.shared:
+            rules, ttl = await self._fetch(origin, validate)
+        else:
+            stored = await self._load_stored(origin)
+            if stored is not None:
+                rules, ttl = stored
+            else:
+                # Only one worker fetches; the others wait and read its row.
+                async with self._cross_worker_lock(origin) as locked:
+                    stored = await self._load_stored(origin) if locked else None
+                    if stored is not None:
+                        rules, ttl = stored
+                    else:
+                        rules, ttl = await self._fetch(origin, validate)
+                        await self._store(origin, rules, ttl)
+        self.cache.set(origin, rules, ttl)
+        return rules
+
+    def _cross_worker_lock(self, origin: str):
+        if settings.SCAN_COALESCE_CROSS_WORKER:
+            return advisory_lock(f"robots {origin}")
+        return nullcontext(False)
+
+    async def _load_stored(self, origin: str) -> Optional[Tuple[RobotsRules, float]]:
+        try:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    select(RobotsRule).filter(RobotsRule.origin == origin, RobotsRule.expires_at > datetime.utcnow())
+                )
+                row = result.scalars().first()
+        except Exception as e:
+            logger.warning(f"Could not read stored robots rules for {origin}: {e}")
+            return None
+        if row is None:
+            return None
+        ttl = (row.expires_at - datetime.utcnow()).total_seconds()
+        return RobotsRules([tuple(rule) for rule in row.rules], row.crawl_delay), ttl
+
+    async def _store(self, origin: str, rules: RobotsRules, ttl: float):
+        now = datetime.utcnow()
+        values = {
+            "origin": origin,
+            "rules": [list(rule) for rule in rules.rules],
+            "crawl_delay": rules.crawl_delay,
+            "fetched_at": now,
+            "expires_at": now + timedelta(seconds=ttl),
+        }
+        stmt = insert(RobotsRule).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RobotsRule.origin],
+            set_={key: stmt.excluded[key] for key in values if key != "origin"},
+        )
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(stmt)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Could not store robots rules for {origin}: {e}")
+
+    async def _fetch(self, origin: str, validate: Callable[[str], None]) -> Tuple[RobotsRules, float]:
+        """
+        Fetches and parses robots.txt, following RFC 9309 on failures: a 4xx
+        means there are no rules, a 5xx or network error means the whole host
+        is disallowed until the next try.
+        """
+        client = self._session()
+        url = f"{origin}/robots.txt"
+        try:
+            for _ in range(ROBOTS_MAX_REDIRECTS + 1):
+                async with client.get(url, allow_redirects=False) as response:
+                    location = response.headers.get("Location")
+                    if response.status in _REDIRECTS and location:
+                        url = urljoin(url, location)
+                        try:
+                            # Redirect targets get the same SSRF checks as pages.
+                            await asyncio.to_thread(validate, url)
+                        except Exception:
+                            return ALLOW_ALL, ROBOTS_ERROR_TTL
+                        continue
+                    if response.status >= 500:
+                        return DISALLOW_ALL, ROBOTS_ERROR_TTL
+                    if response.status >= 400:
+                        return ALLOW_ALL, ROBOTS_CACHE_TTL
+                    if response.status >= 300:
+                        return ALLOW_ALL, ROBOTS_ERROR_TTL
+                    body = bytearray()
+                    async for chunk in response.content.iter_chunked(64 * 1024):
+                        body += chunk
+                        if len(body) >= ROBOTS_MAX_BYTES:
+                            break
+                    text = bytes(body[:ROBOTS_MAX_BYTES]).decode("utf-8", errors="replace")
+                    return RobotsRules.parse(text), ROBOTS_CACHE_TTL
+            # Too many redirects: treated as unavailable.
+            return ALLOW_ALL, ROBOTS_ERROR_TTL
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.info(f"robots.txt for {origin} unreachable: {e}")
+            return DISALLOW_ALL, ROBOTS_ERROR_TTL
+
+
+robots_policy = RobotsPolicy()
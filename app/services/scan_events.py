@@ -0,0 +1,208 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, Optional, Set
+
+import asyncpg
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import Text
+
+from app.core.config import settings
+
+# Configuration Helpers
+SCAN_EVENTS_CHANNEL = "scan_completed"
+SSE_HEARTBEAT_SECONDS = 15.0
+SSE_CLIENT_BUFFER = 100
+SSE_MAX_SUBSCRIBERS = 1000
+LISTENER_RETRY_SECONDS = 5.0
+
+logger = logging.getLogger(__name__)
+
+_LAGGED = object()
+
+
+def scan_event(user_id: int, scan_id: int, url: str, crawl_id: Optional[int] = None) -> str:
+    return json.dumps(
+        {"type": "scan", "user_id": user_id, "scan_id": scan_id, "url": url, "crawl_id": crawl_id},
+        separators=(",", ":"),
+    )
+
+
+def crawl_event(user_id: int, crawl_id: int, scans: int) -> str:
+    return json.dumps(
+        {"type": "crawl", "user_id": user_id, "crawl_id": crawl_id, "scans": scans},
+        separators=(",", ":"),
+    )
+
+
+def notify_statement(payloads: Iterable[str]):
+    """
+    One statement sending every payload on SCAN_EVENTS_CHANNEL. Run it inside
+    the transaction that writes the scans: Postgres delivers the
+    notifications only when, and if, that transaction commits.
+    """
+    rows = func.unnest(bindparam("payloads", list(payloads), type_=ARRAY(Text))).table_valued("payload")
+    return select(func.pg_notify(SCAN_EVENTS_CHANNEL, rows.c.payload))
+
+
+class Subscriber:
+    def __init__(self, user_id: int, buffer: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer)
+
+    def push(self, event) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            # Too slow to keep up: drop what is buffered and tell the client
+            # to reload instead of buffering without bound.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_LAGGED)
+            return False
+
+
+class ScanEventHub:
+    """
+    Fans scan-completed notifications out to the SSE clients of this process.
+    A single LISTEN connection per process receives the notifications of all
+    workers and nodes and hands each to the subscribers of its user. Each
+    subscriber has a bounded buffer; one that falls behind is sent a
+    "lagged" event and disconnected.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        buffer: int = SSE_CLIENT_BUFFER,
+        max_subscribers: int = SSE_MAX_SUBSCRIBERS,
+        heartbeat_seconds: float = SSE_HEARTBEAT_SECONDS,
+    ):
+        self.dsn = dsn
+        self.buffer = buffer
+        self.max_subscribers = max_subscribers
+        self.heartbeat_seconds = heartbeat_seconds
+        self._subscribers: Dict[int, Set[Subscriber]] = defaultdict(set)
+        self._count = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _dsn(self) -> str:
+        return self.dsn or settings.SQLALCHEMY_ASYNC_DATABASE_URI.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _listen(self):
+        while True:
+            conn = None
+            try:
+                conn = await asyncpg.connect(self._dsn())
+                lost = asyncio.Event()
+                conn.add_termination_listener(lambda _: lost.set())
+                await conn.add_listener(SCAN_EVENTS_CHANNEL, self._on_notify)
+                await lost.wait()
+                logger.warning("Scan event listener connection lost, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scan event listener failed: {e}")
+            finally:
+                if conn is not None and not conn.is_closed():
+                    await asyncio.shield(conn.close())
+            await asyncio.sleep(LISTENER_RETRY_SECONDS)
+
+    def _on_notify(self, connection, pid, channel, payload: str):
+        try:
+            event = json.loads(payload)
+            user_id, event_type = event["user_id"], event.get("type", "scan")
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Ignoring malformed scan event: {payload[:200]}")
+            return
+        self.publish(user_id, event_type, payload)
+
+    def publish(self, user_id: int, event_type: str, payload: str):
+        for subscriber in list(self._subscribers.get(user_id, ())):
+            if not subscriber.push((event_type, payload)):
+                self.unsubscribe(subscriber)
+
+    @property
+    def full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    def subscribe(self, user_id: int) -> Subscriber:
+        if self.full:
+            raise OverflowError("Too many event subscribers")
+        self.start()
+        subscriber = Subscriber(user_id, self.buffer)
+        self._subscribers[user_id].add(subscriber)
+        self._count += 1
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self._subscribers.get(subscriber.user_id)
+        if subscribers is None or subscriber not in subscribers:
+            return
+        subscribers.discard(subscriber)
+        self._count -= 1
+        if not subscribers:
+            del self._subscribers[subscriber.user_id]
+
+    async def stream(self, user_id: int) -> AsyncIterator[str]:
+        """
+        SSE body for one client: events as they arrive, comments as
+        heartbeats. Subscribes on the first iteration, so a response that is
+        never sent leaves nothing behind.
+        """
+        subscriber = self.subscribe(user_id)
+        try:
+            yield f"retry: {int(LISTENER_RETRY_SECONDS * 1000)}\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(subscriber.queue.get(), timeout=self.heartbeat_seconds)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if payload is _LAGGED:
+                    yield "event: lagged\ndata: {}\n\n"
+                    return
+                event_type, data = payload
+                yield f"event: {event_type}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    async def open_stream(self, user_id: int) -> AsyncIterator[str]:
+        """
+        stream() with the subscriber slot taken now: raises OverflowError when
+        the hub is full, before any response has started. The stream is
+        already running when returned, so if it is never sent the event
+        loop's async generator finalizer still closes it and frees the slot.
+        """
+        stream = self.stream(user_id)
+        first = await stream.__anext__()
+        return _prepend(first, stream)
+
+
+async def _prepend(first: str, stream: AsyncIterator[str]) -> AsyncIterator[str]:
+    try:
+        yield first
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
+
+
+scan_event_hub = ScanEventHub()
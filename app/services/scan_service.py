@@ -1,208 +1,602 @@
-import socket
-import ipaddress
-import logging
-import asyncio
-from urllib.parse import urlparse
-import aiohttp
-from bs4 import BeautifulSoup
-from fastapi import HTTPException, status
-from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.scans import Scans
-from datetime import datetime
-
-# Configuration Helpers
-TREAT_EMPTY_ALT_AS_PRESENT = True
-MAX_URL_LENGTH = 2048
-MAX_IMAGE_ELEMENTS = 500
-TIMEOUT_CONNECT = 5.0
-TIMEOUT_READ = 10.0
-TIMEOUT_TOTAL = 15.0
-USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-
-logger = logging.getLogger(__name__)
-
-class ScanError(Exception):
-    def __init__(self, message: str, status_code: int = 400):
-        self.message = message
-        self.status_code = status_code
-        super().__init__(message)
-
-class ScanService:
-    def __init__(self, db: AsyncSession):
-        self.db = db
-
-    @staticmethod
-    def _is_private_ip(hostname: str) -> bool:
-        try:
-            # Resolve hostname to IP
-            ip_list = socket.getaddrinfo(hostname, None)
-            for item in ip_list:
-                ip_addr = item[4][0]
-                ip_obj = ipaddress.ip_address(ip_addr)
-                if ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local or ip_obj.is_multicast:
-                    return True
-            return False
-        except socket.gaierror:
-            # If DNS fails, we treat it as unsafe/invalid
-            return True
-
-    def validate_url(self, url: str):
-        if len(url) > MAX_URL_LENGTH:
-            raise ScanError("URL too long")
-        
-        parsed = urlparse(url)
-        if parsed.scheme not in ("http", "https"):
-            raise ScanError("Invalid URL scheme. Only http and https are allowed.")
-        
-        if not parsed.hostname:
-            raise ScanError("Invalid URL: missing hostname.")
-        
-        if parsed.username or parsed.password:
-            raise ScanError("URLs with credentials are not allowed.")
-
-        if self._is_private_ip(parsed.hostname):
-            raise ScanError("Target resolves to a private or disallowed IP address.", status_code=400)
-
-    async def fetch_html(self, url: str) -> str:
-        headers = {
-            "User-Agent": USER_AGENT,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
-            "Accept-Language": "en-US,en;q=0.9",
-        }
-        
-        timeout = aiohttp.ClientTimeout(total=TIMEOUT_TOTAL, connect=TIMEOUT_CONNECT, sock_read=TIMEOUT_READ)
-        
-        try:
-            async with aiohttp.ClientSession(timeout=timeout) as client:
-                for attempt in range(3): # Try 0, 1, 2
-                    try:
-                        async with client.get(url, headers=headers, ssl=True, allow_redirects=True) as response:
-                            if response.status == 403:
-                                # Cloudflare or generic WAF block
-                                raise ScanError("Access forbidden by upstream server. The site may be blocking automated scans (Cloudflare/Bot protection).", status_code=424)
-                            
-                            if response.status >= 400:
-                                raise ScanError(f"Upstream server returned {response.status}", status_code=502 if response.status >= 500 else 424)
-                            
-                            content_type = response.headers.get("Content-Type", "")
-                            # Read content first to check for lazy checks if needed, but aiohttp reads on text()
-                            # But we want to fail fast if not html?
-                            # Replicating original logic:
-                            if "text/html" not in content_type and "application/xhtml+xml" not in content_type:
-                                # Lax check needs content peek. aiohttp allows reading prefix?
-                                # We'll just read text.
-                                text = await response.text()
-                                if not content_type and text.strip().startswith("<"):
-                                     pass 
-                                else:
-                                    raise ScanError(f"Unsupported Media Type: {content_type}", status_code=415)
-                            else:
-                                text = await response.text()
-                            
-                            return text
-                            
-                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                        if attempt == 2:
-                            raise ScanError(f"Network error fetching URL: {str(e)}", status_code=502)
-                        continue 
-                    except ScanError:
-                        raise
-                    except Exception as e:
-                            raise ScanError(f"Error fetching URL: {str(e)}", status_code=502)
-        except ScanError:
-            raise
-        except Exception as e:
-             raise ScanError(f"Unexpected error: {str(e)}", status_code=500)
-        return ""
-
-    def parse_images(self, html_content: str, base_url: str):
-        soup = BeautifulSoup(html_content, "lxml")
-        
-        total_images = 0
-        alt_images = 0
-        non_alt_images = 0
-        
-        def process_element(has_alt: bool):
-            nonlocal total_images, alt_images, non_alt_images
-            if total_images >= MAX_IMAGE_ELEMENTS:
-                return
-            
-            total_images += 1
-            if has_alt:
-                alt_images += 1
-            else:
-                non_alt_images += 1
-
-        # 1. <img> tags
-        for img in soup.find_all("img"):
-            if total_images >= MAX_IMAGE_ELEMENTS: break
-            
-            alt = img.get("alt")
-            has_alt = False
-            if alt is not None:
-                if alt.strip():
-                    has_alt = True
-                elif TREAT_EMPTY_ALT_AS_PRESENT:
-                    has_alt = True
-                else:
-                    has_alt = False
-            else:
-                has_alt = False
-                
-            process_element(has_alt)
-
-        # 2. Inline styles with background-image
-        if total_images < MAX_IMAGE_ELEMENTS:
-            for tag in soup.find_all(True, style=True):
-                if total_images >= MAX_IMAGE_ELEMENTS: break
-                style = tag["style"]
-                if "background-image" in style and "url(" in style:
-                    process_element(False)
-
-        # 3. <svg> with <image> child
-        if total_images < MAX_IMAGE_ELEMENTS:
-            for svg in soup.find_all("svg"):
-                if total_images >= MAX_IMAGE_ELEMENTS: break
-                if svg.find("image") or svg.find("img"): 
-                     has_alt = bool(svg.get("aria-label") or svg.get("title"))
-                     process_element(has_alt)
-            
-        return total_images, alt_images, non_alt_images
-
-    async def perform_scan(self, user_id: int, url_in: str) -> Scans:
-        # 1. Validate
-        self.validate_url(url_in)
-        
-        # 2. Fetch
-        try:
-            html_content = await self.fetch_html(url_in)
-        except ScanError as e:
-            raise HTTPException(status_code=e.status_code, detail=e.message)
-
-        # 3. Parse
-        try:
-            total, alt, non_alt = self.parse_images(html_content, url_in)
-        except Exception as e:
-            logger.error(f"Error parsing HTML for {url_in}: {e}")
-            raise HTTPException(status_code=500, detail="Error parsing page content")
-
-        # 4. Save
-        scan = Scans(
-            user_id=user_id,
-            url=url_in,
-            total_images=total,
-            alt_images=alt,
-            non_alt_images=non_alt,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-        self.db.add(scan)
-        try:
-            await self.db.commit()
-            await self.db.refresh(scan)
-        except Exception as e:
-            await self.db.rollback()
-            logger.error(f"Database error saving scan: {e}")
-            raise HTTPException(status_code=500, detail="Database error")
-            
-        return scan
+import socket
+import ipaddress
+import logging
+import asyncio
+import codecs
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse, urlunparse, urljoin, parse_qsl, urlencode
+import aiohttp
+from bs4 import BeautifulSoup
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from fastapi import HTTPException
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.scans import Scans
+from app.models.user import User
+from app.core.admission import INTERACTIVE, uncounted_wait
+from app.core.config import settings
+from app.core.profiling import NULL_PROFILER, NullProfiler
+from app.db.session import recent_writes
+from app.services.decompression import (
+    DECODE_CHUNK_SIZE,
+    MAX_DECODED_BYTES,
+    BodyTooLarge,
+    DecodeError,
+    StreamDecoder,
+    accept_encoding,
+)
+from app.services import a11y_rules
+from app.services.a11y_rules import DEFAULT_RULE_PROFILE, MAX_IMAGE_ELEMENTS, TREAT_EMPTY_ALT_AS_PRESENT
+from app.services.image_probe import image_prober
+from app.services.redirect_cache import redirect_cache
+from app.services.robots import ROBOTS_MAX_PACING_WAIT, PacingTimeout, RobotsDisallowed, robots_policy
+from app.services.scan_events import notify_statement, scan_event
+from app.services.scan_writer import scan_write_buffer
+from app.services.single_flight import advisory_lock, scan_flight
+from datetime import datetime
+
+# Configuration Helpers
+MAX_URL_LENGTH = 2048
+MAX_LINKS_PER_PAGE = 1000
+TIMEOUT_CONNECT = 5.0
+TIMEOUT_READ = 10.0
+TIMEOUT_TOTAL = 15.0
+COALESCE_REUSE_SECONDS = 10
+MAX_REDIRECTS = 5
+# Bytes searched for a <meta charset> declaration, and checked for valid
+# UTF-8 when nothing is declared.
+ENCODING_SNIFF_BYTES = 4096
+UTF8_CHECK_BYTES = 64 * 1024
+FALLBACK_ENCODING = "cp1252"
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+logger = logging.getLogger(__name__)
+
+class ScanError(Exception):
+    def __init__(self, message: str, status_code: int = 400):
+        self.message = message
+        self.status_code = status_code
+        super().__init__(message)
+
+@dataclass
+class PageAnalysis:
+    total_images: int = 0
+    alt_images: int = 0
+    non_alt_images: int = 0
+    rule_profile: Optional[str] = None
+    links: List[str] = field(default_factory=list)
+    image_urls: List[str] = field(default_factory=list)
+    bytes_on_wire: Optional[int] = None
+    bytes_decoded: Optional[int] = None
+    probed_images: Optional[int] = None
+    broken_images: Optional[int] = None
+    final_url: Optional[str] = None
+
+
+@dataclass
+class FetchResult:
+    body: bytes
+    encoding: Optional[str] = None
+    bytes_on_wire: int = 0
+    # URL the body came from, after redirects.
+    final_url: Optional[str] = None
+
+
+@dataclass
+class Redirect:
+    location: str
+    permanent: bool
+
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+)
+_META_CHARSET = re.compile(rb"<meta[^>]+charset\s*=\s*[\"']?\s*([a-zA-Z0-9_.:-]+)", re.IGNORECASE)
+
+
+def _known_encoding(name: Optional[str]) -> Optional[str]:
+    if not name:
+        return None
+    try:
+        encoding = codecs.lookup(name.strip()).name
+    except LookupError:
+        return None
+    # Browsers read pages labelled latin-1 or ascii as windows-1252.
+    return FALLBACK_ENCODING if encoding in ("iso8859-1", "ascii") else encoding
+
+
+def sniff_encoding(body: bytes, declared: Optional[str] = None) -> str:
+    """
+    Picks the encoding of an HTML body without decoding it: BOM, then the
+    Content-Type charset, then a <meta charset> in the first
+    ENCODING_SNIFF_BYTES, then UTF-8 if the start of the body is valid UTF-8,
+    else FALLBACK_ENCODING.
+    """
+    for bom, name in _BOMS:
+        if body.startswith(bom):
+            return name
+    encoding = _known_encoding(declared)
+    if encoding:
+        return encoding
+    match = _META_CHARSET.search(body, 0, ENCODING_SNIFF_BYTES)
+    if match:
+        encoding = _known_encoding(match.group(1).decode("ascii"))
+        if encoding:
+            return encoding
+    try:
+        # Not final, so a multi-byte character cut off at the end is fine.
+        codecs.getincrementaldecoder("utf-8")().decode(body[:UTF8_CHECK_BYTES], final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form used for deduplication: lowercased scheme/host, default
+    ports and fragments dropped, empty path as "/", query params sorted.
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parsed.path or "/"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, host, path, "", query, ""))
+
+
+def flight_key(url: str, probe_images: bool = False, rule_profile: str = DEFAULT_RULE_PROFILE) -> str:
+    """Key under which scans of the same page with the same options are coalesced."""
+    return f"{normalize_url(url)} {rule_profile}" + (" +probe" if probe_images else "")
+
+
+# Keys whose advisory lock a caller in this worker holds or is waiting for,
+# set once that caller's scan is saved (or has failed).
+_lock_holders: Dict[str, asyncio.Event] = {}
+
+
+class ScanService:
+    def __init__(
+        self,
+        db: AsyncSession,
+        client: Optional[aiohttp.ClientSession] = None,
+        max_pacing_wait: Optional[float] = ROBOTS_MAX_PACING_WAIT,
+        priority: int = INTERACTIVE,
+    ):
+        self.db = db
+        # Optional shared HTTP session, so callers scanning many pages of the
+        # same host (crawls) can reuse connections.
+        self.client = client
+        # How long a fetch may wait out a host's crawl-delay; None waits as
+        # long as it takes (background crawls).
+        self.max_pacing_wait = max_pacing_wait
+        # BACKGROUND fetches give way to interactive ones on paced hosts.
+        self.priority = priority
+
+    @staticmethod
+    def _is_private_ip(hostname: str) -> bool:
+        try:
+            # Resolve hostname to IP
+            ip_list = socket.getaddrinfo(hostname, None)
+            for item in ip_list:
+                ip_addr = item[4][0]
+                ip_obj = ipaddress.ip_address(ip_addr)
+                if ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local or ip_obj.is_multicast:
+                    return True
+            return False
+        except socket.gaierror:
+            # If DNS fails, we treat it as unsafe/invalid
+            return True
+
+    def validate_url(self, url: str):
+        if len(url) > MAX_URL_LENGTH:
+            raise ScanError("URL too long")
+        
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https"):
+            raise ScanError("Invalid URL scheme. Only http and https are allowed.")
+        
+        if not parsed.hostname:
+            raise ScanError("Invalid URL: missing hostname.")
+        
+        if parsed.username or parsed.password:
+            raise ScanError("URLs with credentials are not allowed.")
+
+        if self._is_private_ip(parsed.hostname):
+            raise ScanError("Target resolves to a private or disallowed IP address.", status_code=400)
+
+    async def check_robots(self, url: str):
+        try:
+            await robots_policy.check(url, self.validate_url, self.max_pacing_wait, self.priority)
+        except RobotsDisallowed:
+            raise ScanError("The site's robots.txt does not allow scanning this page.", status_code=424)
+        except PacingTimeout as e:
+            raise ScanError(f"Too many scans of this site right now: {e}. Try again later.", status_code=429)
+
+    async def fetch_html(self, url: str, robots_checked: bool = False) -> FetchResult:
+        """
+        Fetches a page, following up to MAX_REDIRECTS redirects. `url` must
+        already be validated; every URL redirected to is validated here.
+        With `robots_checked` the caller has already run check_robots(url).
+        """
+        headers = {
+            "User-Agent": USER_AGENT,
+            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
+            "Accept-Language": "en-US,en;q=0.9",
+            "Accept-Encoding": accept_encoding(),
+        }
+        
+        timeout = aiohttp.ClientTimeout(total=TIMEOUT_TOTAL, connect=TIMEOUT_CONNECT, sock_read=TIMEOUT_READ)
+        
+        try:
+            if self.client is not None:
+                return await self._fetch_following_redirects(self.client, url, headers, robots_checked)
+            async with aiohttp.ClientSession(timeout=timeout) as client:
+                return await self._fetch_following_redirects(client, url, headers, robots_checked)
+        except ScanError:
+            raise
+        except Exception as e:
+             raise ScanError(f"Unexpected error: {str(e)}", status_code=500)
+
+    @staticmethod
+    def _memoized_target(url: str) -> Tuple[str, int]:
+        # Skips the permanent redirects seen before, counting them as hops.
+        hops = 0
+        target = redirect_cache.get(normalize_url(url))
+        while target is not None and hops < MAX_REDIRECTS:
+            url = target
+            hops += 1
+            target = redirect_cache.get(normalize_url(url))
+        return url, hops
+
+    async def _fetch_following_redirects(
+        self, client: aiohttp.ClientSession, url: str, headers: dict, robots_checked: bool = False
+    ) -> FetchResult:
+        current, hops = self._memoized_target(url)
+        try:
+            while True:
+                if current != url:
+                    # aiohttp would follow redirects without our SSRF checks.
+                    await asyncio.to_thread(self.validate_url, current)
+                if settings.SCAN_RESPECT_ROBOTS and not (robots_checked and current == url):
+                    await self.check_robots(current)
+                robots_checked = False
+                result = await self._fetch_with_retries(client, current, headers)
+                if isinstance(result, FetchResult):
+                    result.final_url = current
+                    return result
+                if hops >= MAX_REDIRECTS:
+                    raise ScanError(f"Too many redirects (more than {MAX_REDIRECTS})", status_code=502)
+                if result.permanent:
+                    redirect_cache.set(normalize_url(current), result.location)
+                current = result.location
+                hops += 1
+        except ScanError:
+            # A remembered redirect may be stale; follow it afresh next time.
+            redirect_cache.forget(normalize_url(url))
+            raise
+
+    async def _fetch_with_retries(
+        self, client: aiohttp.ClientSession, url: str, headers: dict
+    ) -> Union[FetchResult, Redirect]:
+        for attempt in range(3): # Try 0, 1, 2
+            try:
+                # Decompression is done here rather than by aiohttp so the
+                # decoded size can be capped while the body streams in.
+                async with client.get(url, headers=headers, ssl=True, allow_redirects=False, auto_decompress=False) as response:
+                    if response.status in (301, 302, 303, 307, 308):
+                        location = response.headers.get("Location")
+                        if not location:
+                            raise ScanError(f"Upstream server returned {response.status} without a Location", status_code=502)
+                        target = urljoin(url, location.strip())
+                        if urlparse(target).scheme not in ("http", "https"):
+                            raise ScanError("Redirected to a URL that is not http or https.", status_code=400)
+                        return Redirect(target, permanent=response.status in (301, 308))
+
+                    if response.status == 403:
+                        # Cloudflare or generic WAF block
+                        raise ScanError("Access forbidden by upstream server. The site may be blocking automated scans (Cloudflare/Bot protection).", status_code=424)
+                    
+                    if response.status >= 400:
+                        raise ScanError(f"Upstream server returned {response.status}", status_code=502 if response.status >= 500 else 424)
+                    
+                    content_type = response.headers.get("Content-Type", "")
+                    if content_type and "text/html" not in content_type and "application/xhtml+xml" not in content_type:
+                        raise ScanError(f"Unsupported Media Type: {content_type}", status_code=415)
+                    if response.content_length and response.content_length > MAX_DECODED_BYTES:
+                        raise ScanError(f"Page exceeds {MAX_DECODED_BYTES} bytes", status_code=413)
+
+                    # The body stays bytes all the way to the parser; only the
+                    # encoding is worked out here, from the first few KB.
+                    try:
+                        decoder = StreamDecoder(response.headers.get("Content-Encoding", ""))
+                        async for chunk in response.content.iter_chunked(DECODE_CHUNK_SIZE):
+                            decoder.feed(chunk)
+                        body = decoder.finish()
+                    except BodyTooLarge as e:
+                        raise ScanError(str(e), status_code=413)
+                    except DecodeError as e:
+                        raise ScanError(str(e), status_code=502)
+
+                    # Lax check: no Content-Type but the body looks like markup.
+                    if not content_type and not body.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"<"):
+                        raise ScanError(f"Unsupported Media Type: {content_type}", status_code=415)
+
+                    return FetchResult(
+                        body=body,
+                        encoding=sniff_encoding(body, response.charset),
+                        bytes_on_wire=decoder.bytes_on_wire,
+                    )
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == 2:
+                    raise ScanError(f"Network error fetching URL: {str(e)}", status_code=502)
+                continue 
+            except ScanError:
+                raise
+            except Exception as e:
+                    raise ScanError(f"Error fetching URL: {str(e)}", status_code=502)
+        return FetchResult(body=b"")
+
+    def parse_images(
+        self,
+        html_content: Union[str, bytes],
+        base_url: str,
+        encoding: Optional[str] = None,
+        rule_profile: str = DEFAULT_RULE_PROFILE,
+    ):
+        analysis = self.parse_page(html_content, base_url, encoding=encoding, rule_profile=rule_profile)
+        return analysis.total_images, analysis.alt_images, analysis.non_alt_images
+
+    def parse_page(
+        self,
+        html_content: Union[str, bytes],
+        base_url: str,
+        collect_links: bool = False,
+        encoding: Optional[str] = None,
+        collect_images: bool = False,
+        rule_profile: str = DEFAULT_RULE_PROFILE,
+    ) -> PageAnalysis:
+        if isinstance(html_content, bytes):
+            # lxml decodes while it parses, so no str copy of the page is made.
+            # The soup tree still dominates memory; see docs/SCANS.md.
+            soup = BeautifulSoup(html_content, "lxml", from_encoding=encoding or sniff_encoding(html_content))
+        else:
+            soup = BeautifulSoup(html_content, "lxml")
+
+        # 1. Images, classified by the rule profile in a single tree walk
+        result = a11y_rules.evaluate(soup, rule_profile, keep_elements=collect_images)
+
+        # 2. Image URLs, only needed when probing
+        image_urls = []
+        if collect_images:
+            image_base = base_url
+            base_tag = soup.find("base", href=True)
+            if base_tag:
+                image_base = urljoin(base_url, base_tag["href"].strip())
+            for el in result.elements:
+                img = el if el.name in ("img", "input") else el.find("img") or el
+                src = (img.get("src") or img.get("data-src") or "").strip()
+                if src and not src.startswith("data:"):
+                    absolute = urljoin(image_base, src)
+                    if urlparse(absolute).scheme in ("http", "https"):
+                        image_urls.append(absolute)
+
+        # 3. Outgoing links, only needed when crawling
+        links = []
+        if collect_links:
+            for a in soup.find_all("a", href=True):
+                if len(links) >= MAX_LINKS_PER_PAGE: break
+                href = a["href"].strip()
+                if not href or href.startswith(("#", "javascript:", "mailto:", "tel:", "data:")):
+                    continue
+                absolute = urljoin(base_url, href)
+                if urlparse(absolute).scheme in ("http", "https"):
+                    links.append(absolute)
+
+        return PageAnalysis(
+            total_images=result.total_images,
+            alt_images=result.alt_images,
+            non_alt_images=result.non_alt_images,
+            rule_profile=rule_profile,
+            links=links,
+            # Deduplicated, in page order
+            image_urls=list(dict.fromkeys(image_urls)),
+        )
+
+    def build_scan(self, user_id: int, url: str, analysis: PageAnalysis, crawl_id: Optional[int] = None) -> Scans:
+        now = datetime.utcnow()
+        return Scans(
+            user_id=user_id,
+            url=url,
+            crawl_id=crawl_id,
+            total_images=analysis.total_images,
+            alt_images=analysis.alt_images,
+            non_alt_images=analysis.non_alt_images,
+            bytes_on_wire=analysis.bytes_on_wire,
+            bytes_decoded=analysis.bytes_decoded,
+            probed_images=analysis.probed_images,
+            broken_images=analysis.broken_images,
+            rule_profile=analysis.rule_profile,
+            final_url=analysis.final_url,
+            created_at=now,
+            updated_at=now
+        )
+
+    async def bump_scan_version(self, user_id: int):
+        # Must run in the transaction that inserts the user's scans so the
+        # ETags of the read endpoints change exactly when the data does.
+        await self.db.execute(
+            update(User).where(User.id == user_id).values(scan_version=User.scan_version + 1)
+        )
+
+    async def _fetch_and_parse(
+        self,
+        url: str,
+        profiler: NullProfiler = NULL_PROFILER,
+        probe_images: bool = False,
+        rule_profile: str = DEFAULT_RULE_PROFILE,
+    ) -> PageAnalysis:
+        with profiler.stage("fetch"):
+            page = await self.fetch_html(url)
+        try:
+            with profiler.stage("parse", cpu=True):
+                # Relative links and images resolve against where the page ended up.
+                analysis = self.parse_page(
+                    page.body, page.final_url or url, encoding=page.encoding,
+                    collect_images=probe_images, rule_profile=rule_profile,
+                )
+        except Exception as e:
+            logger.error(f"Error parsing HTML for {url}: {e}")
+            raise ScanError("Error parsing page content", status_code=500)
+        analysis.bytes_on_wire = page.bytes_on_wire
+        analysis.bytes_decoded = len(page.body)
+        analysis.final_url = page.final_url
+        if probe_images:
+            with profiler.stage("probe"):
+                analysis.probed_images, analysis.broken_images = await image_prober.probe(
+                    analysis.image_urls, self.validate_url
+                )
+        return analysis
+
+    async def _recent_analysis(
+        self, url: str, probe_images: bool = False, rule_profile: str = DEFAULT_RULE_PROFILE
+    ) -> Optional[PageAnalysis]:
+        # Scans store the URL as submitted; narrow down by origin in SQL and
+        # compare normalized forms here, the way the flight key does.
+        normalized = normalize_url(url)
+        parsed = urlparse(normalized)
+        since = datetime.utcnow() - timedelta(seconds=COALESCE_REUSE_SECONDS)
+        stmt = (
+            select(
+                Scans.url, Scans.total_images, Scans.alt_images, Scans.non_alt_images,
+                Scans.probed_images, Scans.broken_images, Scans.final_url,
+            )
+            .filter(
+                Scans.created_at >= since,
+                Scans.rule_profile == rule_profile,
+                func.lower(Scans.url).startswith(f"{parsed.scheme}://{parsed.hostname}", autoescape=True),
+            )
+        )
+        if probe_images:
+            stmt = stmt.filter(Scans.probed_images.isnot(None))
+        else:
+            stmt = stmt.filter(Scans.probed_images.is_(None))
+        result = await self.db.execute(stmt.order_by(Scans.created_at.desc()).limit(20))
+        for row in result.all():
+            if normalize_url(row[0]) == normalized:
+                return PageAnalysis(
+                    total_images=row[1], alt_images=row[2], non_alt_images=row[3],
+                    probed_images=row[4], broken_images=row[5], final_url=row[6], rule_profile=rule_profile,
+                )
+        return None
+
+    @asynccontextmanager
+    async def _cross_worker_lock(self, key: str, enabled: bool = True):
+        """
+        Yields whether a scan saved for `key` in the last
+        COALESCE_REUSE_SECONDS may be reused. Only the first local caller
+        takes the advisory lock, and holds it until its scan is committed, so
+        a worker that waited on it finds that row instead of fetching again.
+        Later local callers wait for that caller rather than each holding a
+        lock and a connection of their own.
+        """
+        if not enabled or not settings.SCAN_COALESCE_CROSS_WORKER:
+            yield False
+            return
+        holder = _lock_holders.get(key)
+        if holder is not None:
+            with uncounted_wait():
+                await holder.wait()
+            yield True
+            return
+        if key in scan_flight:
+            # A crawl is already fetching the page here; join it.
+            yield False
+            return
+        done = _lock_holders[key] = asyncio.Event()
+        try:
+            async with advisory_lock(key) as conn:
+                yield conn is not None
+        finally:
+            del _lock_holders[key]
+            done.set()
+
+    async def analyze(
+        self, url_in: str, probe_images: bool = False, rule_profile: str = DEFAULT_RULE_PROFILE
+    ) -> PageAnalysis:
+        """
+        Fetches and parses a page. Concurrent calls for the same normalized URL
+        (and options) share one fetch and parse; each caller still saves its
+        own scan.
+        """
+        return await scan_flight.do(
+            flight_key(url_in, probe_images, rule_profile), lambda: self._fetch_and_parse(url_in, probe_images=probe_images, rule_profile=rule_profile)
+        )
+
+    async def perform_scan(
+        self,
+        user_id: int,
+        url_in: str,
+        profiler: NullProfiler = NULL_PROFILER,
+        probe_images: bool = False,
+        rule_profile: str = DEFAULT_RULE_PROFILE,
+    ) -> Scans:
+        # 1. Validate
+        try:
+            with profiler.stage("validation", cpu=True):
+                self.validate_url(url_in)
+        except ScanError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.message)
+
+        # A profiled scan does its own fetch rather than joining another one.
+        key = flight_key(url_in, probe_images, rule_profile)
+        async with self._cross_worker_lock(key, enabled=not profiler.enabled) as reuse:
+            # 2. Fetch and parse
+            analysis = await self._recent_analysis(url_in, probe_images, rule_profile) if reuse else None
+            if analysis is None:
+                try:
+                    if profiler.enabled:
+                        analysis = await self._fetch_and_parse(url_in, profiler, probe_images, rule_profile)
+                    else:
+                        analysis = await self.analyze(url_in, probe_images, rule_profile)
+                except ScanError as e:
+                    raise HTTPException(status_code=e.status_code, detail=e.message)
+
+            # 3. Save
+            scan = self.build_scan(user_id, url_in, analysis)
+            with profiler.stage("commit"):
+                if scan_write_buffer.running:
+                    return await self._save_buffered(scan)
+
+                self.db.add(scan)
+                try:
+                    await self.bump_scan_version(user_id)
+                    await self.db.flush()
+                    await self.db.execute(notify_statement([scan_event(user_id, scan.id, url_in)]))
+                    await self.db.commit()
+                    recent_writes.note(user_id)
+                    await self.db.refresh(scan)
+                except Exception as e:
+                    await self.db.rollback()
+                    logger.error(f"Database error saving scan: {e}")
+                    raise HTTPException(status_code=500, detail="Database error")
+
+        return scan
+
+    async def _save_buffered(self, scan: Scans) -> Scans:
+        values = {column.key: getattr(scan, column.key) for column in Scans.__table__.columns if column.key != "id"}
+        try:
+            scan.id = await scan_write_buffer.submit(values)
+        except Exception as e:
+            logger.error(f"Database error saving scan: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        recent_writes.note(scan.user_id)
+        return scan
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.db.session import AsyncSessionLocal
+from app.models.scans import Scans
+from app.models.user import User
+from app.services.scan_events import notify_statement, scan_event
+
+# Configuration Helpers
+WRITE_BUFFER_MAX_ROWS = 200
+WRITE_BUFFER_MAX_DELAY = 0.005
+WRITE_BUFFER_MAX_PENDING = 2000
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ScanWriteBuffer:
+    """
+    Group commit for scan inserts. Completed scans from concurrent requests are
+    queued and written by a single flusher as one multi-row INSERT ... RETURNING
+    (plus the users.scan_version bumps and completion notifications) per
+    transaction. A batch is flushed once
+    it has max_rows rows or its first row has waited max_delay seconds; while a
+    flush is running the next batch keeps filling up. submit() blocks once
+    max_pending rows are queued, which pushes back on the callers. A batch
+    rejected because of its data (a constraint violation, a row with no
+    partition) is split and retried, so only the offending row's caller
+    gets the error.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        max_rows: int = WRITE_BUFFER_MAX_ROWS,
+        max_delay: float = WRITE_BUFFER_MAX_DELAY,
+        max_pending: int = WRITE_BUFFER_MAX_PENDING,
+    ):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self):
+        if self._task is None:
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything already submitted, then stop."""
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(_STOP)
+        await task
+
+    async def submit(self, values: dict) -> int:
+        """Queue one scan row and wait for its new id."""
+        if self._task is None:
+            raise RuntimeError("Scan write buffer is not running")
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((values, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_rows:
+                try:
+                    item = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+    async def _write(self, rows: List[dict]) -> List[int]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                insert(Scans).returning(Scans.id, sort_by_parameter_order=True), rows
+            )
+            ids = result.scalars().all()
+            versions = Counter(row["user_id"] for row in rows)
+            await session.execute(
+                update(User.__table__)
+                .where(User.__table__.c.id == bindparam("uid"))
+                .values(scan_version=User.__table__.c.scan_version + bindparam("n")),
+                [{"uid": user_id, "n": count} for user_id, count in versions.items()],
+            )
+            await session.execute(notify_statement(
+                scan_event(row["user_id"], scan_id, row["url"], row.get("crawl_id"))
+                for row, scan_id in zip(rows, ids)
+            ))
+            await session.commit()
+        return ids
+
+    async def _flush(self, batch: List[Tuple[dict, asyncio.Future]]):
+        try:
+            ids = await self._write([values for values, _ in batch])
+        except (IntegrityError, DataError) as e:
+            if len(batch) > 1:
+                # Bisect down to the bad rows; the others still get written.
+                middle = len(batch) // 2
+                await self._flush(batch[:middle])
+                await self._flush(batch[middle:])
+                return
+            logger.error(f"Database error writing buffered scan: {e}")
+            self._fail(batch, e)
+            return
+        except Exception as e:
+            logger.error(f"Database error flushing {len(batch)} buffered scans: {e}")
+            self._fail(batch, e)
+            return
+
+        for (_, future), scan_id in zip(batch, ids):
+            if not future.done():
+                future.set_result(scan_id)
+
+    @staticmethod
+    def _fail(batch: List[Tuple[dict, asyncio.Future]], error: Exception):
+        for _, future in batch:
+            if not future.done():
+                future.set_exception(error)
+
+
+scan_write_buffer = ScanWriteBuffer()
@@ -0,0 +1,225 @@
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+from fastapi import HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.admission import BACKGROUND, scan_admission
+from app.db.session import AsyncSessionLocal
+from app.models.scan_schedules import ScanSchedule
+from app.schemas.scan_schemas import ScheduleCreate
+from app.services.scan_service import (
+    ScanService,
+    ScanError,
+    TIMEOUT_CONNECT,
+    TIMEOUT_READ,
+    TIMEOUT_TOTAL,
+)
+
+# Configuration Helpers
+SCHEDULER_POLL_SECONDS = 30.0
+SCHEDULER_BATCH_SIZE = 50
+SCHEDULER_CONCURRENCY = 5
+SCHEDULE_JITTER_RATIO = 0.05
+SCHEDULE_MAX_JITTER_SECONDS = 3600
+# A claimed run not finished within this long (its node died) is claimed
+# again by the next poll on any node.
+SCHEDULER_LEASE_SECONDS = 15 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def _jitter(interval_seconds: int) -> timedelta:
+    spread = min(interval_seconds * SCHEDULE_JITTER_RATIO, SCHEDULE_MAX_JITTER_SECONDS)
+    return timedelta(seconds=random.uniform(0, spread))
+
+
+class ScheduleService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def create_schedule(self, user_id: int, schedule_in: ScheduleCreate) -> ScanSchedule:
+        url = str(schedule_in.url)
+        try:
+            await asyncio.to_thread(ScanService(self.db).validate_url, url)
+        except ScanError as e:
+            raise HTTPException(status_code=e.status_code, detail=e.message)
+
+        # The first run lands anywhere within one interval, so schedules
+        # created together do not all come due in the same minute.
+        now = datetime.utcnow()
+        schedule = ScanSchedule(
+            user_id=user_id,
+            url=url,
+            interval_seconds=schedule_in.interval_seconds,
+            is_active=True,
+            next_run_at=now + timedelta(seconds=random.uniform(0, schedule_in.interval_seconds)),
+        )
+        self.db.add(schedule)
+        try:
+            await self.db.commit()
+            await self.db.refresh(schedule)
+        except IntegrityError:
+            await self.db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="URL is already scheduled")
+        except Exception as e:
+            await self.db.rollback()
+            logger.error(f"Database error saving schedule: {e}")
+            raise HTTPException(status_code=500, detail="Database error")
+        return schedule
+
+    async def get_schedules(self, user_id: int) -> List[ScanSchedule]:
+        result = await self.db.execute(
+            select(ScanSchedule).filter(ScanSchedule.user_id == user_id).order_by(ScanSchedule.id.desc())
+        )
+        return result.scalars().all()
+
+    async def delete_schedule(self, user_id: int, schedule_id: int):
+        result = await self.db.execute(
+            select(ScanSchedule).filter(ScanSchedule.id == schedule_id, ScanSchedule.user_id == user_id)
+        )
+        schedule = result.scalars().first()
+        if not schedule:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Schedule not found")
+        await self.db.delete(schedule)
+        await self.db.commit()
+
+
+class ScanScheduler:
+    """
+    Runs due schedules in-process. Several nodes may run it at once: due rows
+    are claimed with FOR UPDATE SKIP LOCKED and their next_run_at is pushed
+    forward by a lease of SCHEDULER_LEASE_SECONDS in the same transaction, so
+    each run is picked up by one node only. The next real run is set once the
+    scan is recorded; if the node dies first, the lease expires and the run is
+    picked up again, so runs are at-least-once.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        batch_size: int = SCHEDULER_BATCH_SIZE,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        poll_seconds: float = SCHEDULER_POLL_SECONDS,
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.poll_seconds = poll_seconds
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    def start(self):
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=TIMEOUT_TOTAL)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            claimed = 0
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Scan scheduler iteration failed: {e}")
+            # A full batch means more are probably due; go again straight away.
+            if claimed >= self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def claim_due(self):
+        async with self.session_factory() as session:
+            now = datetime.utcnow()
+            result = await session.execute(
+                select(ScanSchedule.id, ScanSchedule.user_id, ScanSchedule.url, ScanSchedule.interval_seconds)
+                .filter(ScanSchedule.is_active.is_(True), ScanSchedule.next_run_at <= now)
+                .order_by(ScanSchedule.next_run_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows = result.all()
+            if rows:
+                await session.execute(
+                    update(ScanSchedule),
+                    [
+                        {
+                            "id": row.id,
+                            "last_run_at": now,
+                            "next_run_at": now + timedelta(seconds=SCHEDULER_LEASE_SECONDS),
+                        }
+                        for row in rows
+                    ],
+                )
+            await session.commit()
+            return rows
+
+    async def run_once(self) -> int:
+        rows = await self.claim_due()
+        if not rows:
+            return 0
+
+        by_host = defaultdict(list)
+        for row in rows:
+            by_host[urlparse(row.url).hostname].append(row)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._run_host(items, semaphore) for items in by_host.values()))
+        return len(rows)
+
+    async def _run_host(self, rows, semaphore: asyncio.Semaphore):
+        # One HTTP session per host group, so its URLs reuse the same connections.
+        async with semaphore:
+            timeout = aiohttp.ClientTimeout(total=TIMEOUT_TOTAL, connect=TIMEOUT_CONNECT, sock_read=TIMEOUT_READ)
+            async with aiohttp.ClientSession(timeout=timeout) as client:
+                for row in rows:
+                    await self._run_schedule(row, client)
+
+    async def _run_schedule(self, row, client: aiohttp.ClientSession):
+        async with self.session_factory() as session:
+            values = {"last_error": None}
+            try:
+                async with scan_admission.slot(BACKGROUND):
+                    scan = await ScanService(session, client=client, priority=BACKGROUND).perform_scan(
+                        user_id=row.user_id, url_in=row.url
+                    )
+                values["last_scan_id"] = scan.id
+            except HTTPException as e:
+                values["last_error"] = str(e.detail)[:500]
+            except ScanError as e:
+                values["last_error"] = e.message[:500]
+            except Exception as e:
+                logger.error(f"Scheduled scan {row.id} for {row.url} failed: {e}")
+                values["last_error"] = "Unexpected error"
+            # Ends the lease taken by claim_due.
+            values["next_run_at"] = (
+                datetime.utcnow() + timedelta(seconds=row.interval_seconds) + _jitter(row.interval_seconds)
+            )
+            try:
+                await session.execute(update(ScanSchedule).where(ScanSchedule.id == row.id).values(**values))
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                logger.error(f"Could not record result of schedule {row.id}: {e}")
+
+
+scan_scheduler = ScanScheduler()
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, TypeVar
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
+
+from app.core.admission import uncounted_wait
+from app.db.session import async_engine
+
+# Configuration Helpers
+ADVISORY_LOCK_TIMEOUT = "20s"
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution. The first
+    caller starts the work as its own task; everyone, including that caller,
+    awaits it through asyncio.shield, so a caller that goes away (client
+    disconnect) is cancelled alone and the shared work keeps running for the
+    others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the outcome as retrieved even if every caller was cancelled.
+        if not task.cancelled():
+            task.exception()
+
+
+@asynccontextmanager
+async def advisory_lock(key: str):
+    """
+    Holds a Postgres session-level advisory lock on `key` for the duration of
+    the block, coordinating workers and nodes. Yields the locked connection,
+    or None if the lock could not be taken within ADVISORY_LOCK_TIMEOUT, in
+    which case the caller proceeds uncoordinated.
+    """
+    conn = await async_engine.connect()
+    try:
+        await conn.execute(text(f"SET lock_timeout = '{ADVISORY_LOCK_TIMEOUT}'"))
+        try:
+            with uncounted_wait():
+                await conn.execute(select(func.pg_advisory_lock(func.hashtext(key))))
+        except DBAPIError as e:
+            logger.warning(f"Advisory lock for {key} not acquired: {e}")
+            yield None
+            return
+        try:
+            yield conn
+        finally:
+            await asyncio.shield(conn.execute(select(func.pg_advisory_unlock(func.hashtext(key)))))
+    finally:
+        await asyncio.shield(conn.close())
+
+
+scan_flight = SingleFlight()
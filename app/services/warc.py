@@ -0,0 +1,204 @@
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+from app.services.decompression import DECODE_CHUNK_SIZE, MAX_DECODED_BYTES, DecodeError, StreamDecoder
+
+# Configuration Helpers
+WARC_MAX_RECORD_BYTES = MAX_DECODED_BYTES
+WARC_MAX_HEADER_BYTES = 64 * 1024
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+class WarcFormatError(Exception):
+    pass
+
+
+def _parse_headers(lines) -> Dict[str, str]:
+    headers: Dict[str, str] = {}
+    name = None
+    for line in lines:
+        if line[:1] in (" ", "\t") and name is not None:
+            headers[name] += " " + line.strip()
+            continue
+        if ":" not in line:
+            continue
+        name, value = line.split(":", 1)
+        name = name.strip().lower()
+        headers[name] = value.strip()
+    return headers
+
+
+@dataclass
+class WarcRecord:
+    # Header names are lower-cased.
+    headers: Dict[str, str]
+    # None when the record is larger than the reader's max_record_bytes.
+    block: Optional[bytes]
+
+    @property
+    def type(self) -> str:
+        return self.headers.get("warc-type", "").lower()
+
+    @property
+    def target_uri(self) -> str:
+        return self.headers.get("warc-target-uri", "").strip("<> ")
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "").lower()
+
+
+class WarcReader:
+    """
+    Incremental WARC parser. Bytes are fed as they arrive and complete
+    records come out, so only the record being read is held in memory (and
+    not even that for records over max_record_bytes, which are skipped).
+    Gzipped WARCs, one gzip member per record or one for the whole file,
+    are recognised by their magic bytes and inflated DECODE_CHUNK_SIZE
+    bytes at a time.
+    """
+
+    def __init__(self, max_record_bytes: int = WARC_MAX_RECORD_BYTES):
+        self.max_record_bytes = max_record_bytes
+        self._gzip: Optional[bool] = None
+        self._head = b""
+        self._inflater = None
+        self._buffer = bytearray()
+        self._headers: Optional[Dict[str, str]] = None
+        self._block: Optional[bytearray] = None
+        self._remaining = 0
+
+    def feed(self, data: bytes) -> Iterator[WarcRecord]:
+        if self._gzip is None:
+            data = self._head + data
+            if len(data) < len(_GZIP_MAGIC):
+                self._head = data
+                return
+            self._gzip = data.startswith(_GZIP_MAGIC)
+        if not self._gzip:
+            yield from self._parse(data)
+            return
+        while data:
+            if self._inflater is None:
+                self._inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            try:
+                piece = self._inflater.decompress(data, DECODE_CHUNK_SIZE)
+            except zlib.error as e:
+                raise WarcFormatError(f"Invalid gzip data: {e}")
+            if self._inflater.eof:
+                # Next gzip member, usually the next record.
+                data = self._inflater.unused_data
+                self._inflater = None
+            else:
+                data = self._inflater.unconsumed_tail
+            yield from self._parse(piece)
+
+    def finish(self):
+        if self._head and self._gzip is None:
+            raise WarcFormatError("Truncated WARC record")
+        if self._inflater is not None:
+            raise WarcFormatError("Truncated gzip data")
+        if self._headers is not None or self._buffer.strip():
+            raise WarcFormatError("Truncated WARC record")
+
+    def _parse(self, data: bytes) -> Iterator[WarcRecord]:
+        buffer = self._buffer
+        buffer += data
+        while True:
+            if self._headers is None:
+                # Records are followed by two CRLFs; skip them.
+                start = 0
+                while start < len(buffer) and buffer[start] in (0x0D, 0x0A):
+                    start += 1
+                del buffer[:start]
+                end = buffer.find(b"\r\n\r\n")
+                if end < 0:
+                    if len(buffer) > WARC_MAX_HEADER_BYTES:
+                        raise WarcFormatError("WARC record header too long")
+                    return
+                lines = bytes(buffer[:end]).decode("utf-8", errors="replace").split("\r\n")
+                del buffer[:end + 4]
+                if not lines[0].startswith("WARC/"):
+                    raise WarcFormatError(f"Not a WARC record: {lines[0][:40]!r}")
+                headers = _parse_headers(lines[1:])
+                try:
+                    length = int(headers["content-length"])
+                except (KeyError, ValueError):
+                    raise WarcFormatError("WARC record without a valid Content-Length")
+                self._headers = headers
+                self._remaining = length
+                self._block = bytearray() if length <= self.max_record_bytes else None
+
+            take = min(self._remaining, len(buffer))
+            if self._block is not None:
+                self._block += buffer[:take]
+            del buffer[:take]
+            self._remaining -= take
+            if self._remaining:
+                return
+            block = bytes(self._block) if self._block is not None else None
+            record = WarcRecord(self._headers, block)
+            self._headers = None
+            self._block = None
+            yield record
+
+
+@dataclass
+class HttpResponse:
+    status: int
+    # Header names are lower-cased.
+    headers: Dict[str, str]
+    body: bytes
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("content-type", "").lower()
+
+
+def _dechunk(body: bytes) -> bytes:
+    parts = []
+    pos = 0
+    while True:
+        line_end = body.find(b"\r\n", pos)
+        if line_end < 0:
+            raise DecodeError("Truncated chunked body")
+        size = int(body[pos:line_end].split(b";", 1)[0].strip() or b"0", 16)
+        if size == 0:
+            return b"".join(parts)
+        start = line_end + 2
+        parts.append(body[start:start + size])
+        pos = start + size + 2
+
+
+def read_http_response(block: bytes) -> Optional[HttpResponse]:
+    """
+    The HTTP response stored in a WARC "response" record, with transfer and
+    content encodings undone. None if the block is not an HTTP response or
+    its body cannot be decoded.
+    """
+    end = block.find(b"\r\n\r\n")
+    if end < 0:
+        return None
+    lines = block[:end].decode("latin-1").split("\r\n")
+    status_line = lines[0].split(" ", 2)
+    if len(status_line) < 2 or not status_line[0].startswith("HTTP/"):
+        return None
+    try:
+        status = int(status_line[1])
+    except ValueError:
+        return None
+    headers = _parse_headers(lines[1:])
+    body = block[end + 4:]
+    try:
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            body = _dechunk(body)
+        encoding = headers.get("content-encoding", "")
+        if encoding and encoding.lower() != "identity":
+            decoder = StreamDecoder(encoding)
+            decoder.feed(body)
+            body = decoder.finish()
+    except (DecodeError, ValueError):
+        return None
+    return HttpResponse(status, headers, body)
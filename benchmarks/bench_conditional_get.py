@@ -0,0 +1,77 @@
+"""
+Polling benchmark for the conditional GET support on GET /scans/.
+
+Simulates a frontend polling the history endpoint: once with no validator
+(every poll runs the query and serializes the page) and once replaying the
+ETag from the previous poll (every poll is a 304). The database is replaced
+by an in-memory stub with a configurable per-query latency, so the numbers
+isolate the work the 304 path skips.
+
+    python -m benchmarks.bench_conditional_get --requests 2000 --query-ms 2
+"""
+import argparse
+import time
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.api import deps
+from app.main import app
+from app.models.scans import Scans
+from app.models.user import User
+
+SCANS_URL = "/web-image-analyzer/api/v1/scans/"
+
+
+def build_db(query_ms: float):
+    scans = [
+        Scans(id=i, user_id=1, url=f"https://example.com/page/{i}", alt_images=i % 9, non_alt_images=3,
+              total_images=i % 9 + 3, created_at=datetime(2025, 1, 1))
+        for i in range(10)
+    ]
+    db = MagicMock()
+
+    def run_query():
+        time.sleep(query_ms / 1000)
+        return scans
+
+    db.query.return_value.filter.return_value.order_by.return_value.limit.return_value.all.side_effect = run_query
+    db.query.return_value.filter.return_value.scalar.return_value = 1
+    return db
+
+
+def poll(client: TestClient, requests: int, conditional: bool):
+    etag = None
+    statuses = {}
+    start = time.perf_counter()
+    for _ in range(requests):
+        headers = {"If-None-Match": etag} if conditional and etag else {}
+        response = client.get(SCANS_URL, headers=headers)
+        etag = response.headers.get("ETag", etag)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - start
+    return elapsed, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--query-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    db = build_db(args.query_ms)
+    app.dependency_overrides[deps.get_current_user] = lambda: User(id=1, email="bench@example.com", name="Bench", scan_version=1)
+    app.dependency_overrides[deps.get_read_db] = lambda: db
+    client = TestClient(app)
+
+    for label, conditional in (("unconditional", False), ("If-None-Match", True)):
+        elapsed, statuses = poll(client, args.requests, conditional)
+        print(
+            f"{label:>14}: {args.requests / elapsed:8.0f} req/s  "
+            f"{elapsed / args.requests * 1000:6.2f} ms/req  statuses={statuses}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+CPU and peak-memory benchmark for the fetch-to-parse path on large pages.
+
+Compares the old text path (decode the whole body to str the way
+aiohttp's response.text() does, then parse the str) with the bytes path
+(sniff the encoding from the first few KB and hand the raw bytes to lxml).
+Each page is tried with the charset declared in the Content-Type header,
+declared in a <meta> tag, and not declared at all. Peak memory is measured
+with tracemalloc, so it covers Python allocations (the decoded str, the
+soup tree) but not libxml2's own buffers.
+
+    python -m benchmarks.bench_parse_encoding --size-mb 8 --repeat 3
+"""
+import argparse
+import time
+import tracemalloc
+from unittest.mock import MagicMock
+
+from app.services.scan_service import ScanService, sniff_encoding
+
+
+def build_page(size_mb: float, meta_charset: bool) -> bytes:
+    head = '<html><head><meta charset="utf-8"><title>t</title></head><body>' if meta_charset else "<html><body>"
+    block = (
+        '<div class="card"><p>Café naïve résumé – lorem ipsum dolor sit amet</p>'
+        '<img src="/a.jpg" alt="café"><img src="/b.jpg"><a href="/next">next</a></div>\n'
+    )
+    target = int(size_mb * 1024 * 1024)
+    count = target // len(block.encode()) + 1
+    return (head + block * count + "</body></html>").encode()
+
+
+def text_path(service: ScanService, body: bytes, header_charset):
+    # response.text(): header charset, else aiohttp's fallback resolver (utf-8).
+    html = body.decode(header_charset or "utf-8", errors="replace")
+    return service.parse_page(html, "https://example.com/")
+
+
+def bytes_path(service: ScanService, body: bytes, header_charset):
+    return service.parse_page(body, "https://example.com/", encoding=sniff_encoding(body, header_charset))
+
+
+def measure(fn, service, body, header_charset, repeat: int):
+    cpu = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn(service, body, header_charset)
+        cpu.append(time.process_time() - start)
+    tracemalloc.start()
+    fn(service, body, header_charset)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(cpu), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    service = ScanService(db=MagicMock())
+    cases = [
+        ("header charset", build_page(args.size_mb, meta_charset=False), "utf-8"),
+        ("meta charset", build_page(args.size_mb, meta_charset=True), None),
+        ("undeclared", build_page(args.size_mb, meta_charset=False), None),
+    ]
+    print(f"{'page':<16}{'path':<8}{'cpu s':>10}{'peak MiB':>12}")
+    for label, body, header_charset in cases:
+        for name, fn in (("text", text_path), ("bytes", bytes_path)):
+            cpu, peak = measure(fn, service, body, header_charset, args.repeat)
+            print(f"{label:<16}{name:<8}{cpu:>10.3f}{peak / 2**20:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Cost of the accessibility rule engine versus the number of rules.
+
+Builds a large page once, then evaluates rule sets of growing size: the
+compiled single-pass RuleSet, and for comparison one find_all() traversal
+per rule (how the scanner used to apply its three rules). Extra rules are
+synthetic tag and attribute rules, half of which match something on the
+page. Parsing is excluded; only rule evaluation is timed.
+
+    python -m benchmarks.bench_rule_engine --elements 20000 --max-rules 64
+"""
+import argparse
+import time
+
+from bs4 import BeautifulSoup
+
+from app.services.a11y_rules import DEFAULT_RULES, Rule, RuleSet
+
+
+def build_page(elements: int) -> str:
+    parts = ["<html><body>"]
+    for i in range(elements):
+        kind = i % 5
+        if kind == 0:
+            parts.append(f'<img src="/{i}.jpg" alt="image {i}">')
+        elif kind == 1:
+            parts.append(f'<div class="card" data-k{i % 32}="1"><p>text {i}</p></div>')
+        elif kind == 2:
+            parts.append(f'<span style="color: red">{i}</span>')
+        elif kind == 3:
+            parts.append(f'<x-w{i % 32}><a href="/{i}">link</a></x-w{i % 32}>')
+        else:
+            parts.append('<svg role="img" aria-label="icon"><image href="/i.png"/></svg>')
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def synthetic_rules(count: int):
+    rules = list(DEFAULT_RULES)
+    for i in range(max(0, count - len(rules))):
+        if i % 2:
+            rules.append(Rule(f"attr-{i}", attribute=f"data-k{i // 2}"))
+        else:
+            rules.append(Rule(f"tag-{i}", tag=f"x-w{i // 2}"))
+    return rules[:count]
+
+
+def per_rule_traversals(soup, rules):
+    # One full walk per rule, like the old hard-coded loops.
+    total = 0
+    for rule in rules:
+        if rule.tag is not None:
+            found = soup.find_all(rule.tag)
+        else:
+            found = soup.find_all(True, attrs={rule.attribute: True})
+        total += sum(1 for el in found if rule.when(el))
+    return total
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--elements", type=int, default=20000)
+    parser.add_argument("--max-rules", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    soup = BeautifulSoup(build_page(args.elements), "lxml")
+    limit = args.elements * 2
+    print(f"{'rules':>6}{'single pass ms':>16}{'per-rule walks ms':>20}")
+    count = 1
+    while count <= args.max_rules:
+        rules = synthetic_rules(count)
+        rule_set = RuleSet(f"bench-{count}", rules)
+        single = timed(lambda: rule_set.evaluate(soup, limit=limit), args.repeat)
+        walks = timed(lambda: per_rule_traversals(soup, rules), args.repeat)
+        print(f"{count:>6}{single * 1000:>16.1f}{walks * 1000:>20.1f}")
+        count *= 2
+
+
+if __name__ == "__main__":
+    main()
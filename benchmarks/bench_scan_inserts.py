@@ -0,0 +1,83 @@
+"""
+Scan insert throughput: one transaction per scan (the default save path of
+ScanService.perform_scan) against the group-commit ScanWriteBuffer.
+
+Needs a migrated Postgres reachable through the usual POSTGRES_* settings.
+A throwaway user is created for the run and removed afterwards together
+with its scans.
+
+    python -m benchmarks.bench_scan_inserts --scans 5000 --concurrency 200
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import delete, update
+
+from app.db.session import AsyncSessionLocal
+from app.models.scans import Scans
+from app.models.user import User
+from app.services.scan_writer import ScanWriteBuffer
+
+
+def scan_values(user_id: int, i: int) -> dict:
+    now = datetime.utcnow()
+    return {
+        "user_id": user_id, "url": f"https://example.com/bench/{i}", "crawl_id": None,
+        "total_images": 10, "alt_images": 7, "non_alt_images": 3, "created_at": now, "updated_at": now,
+    }
+
+
+async def insert_direct(user_id: int, i: int):
+    # Mirrors the unbuffered save in perform_scan: add, bump version, commit, refresh.
+    async with AsyncSessionLocal() as db:
+        scan = Scans(**scan_values(user_id, i))
+        db.add(scan)
+        await db.execute(update(User).where(User.id == user_id).values(scan_version=User.scan_version + 1))
+        await db.commit()
+        await db.refresh(scan)
+
+
+async def run(label: str, scans: int, concurrency: int, insert_one):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            await insert_one(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(scans)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:>10}: {scans / elapsed:8.0f} inserts/s  ({elapsed:.2f}s for {scans})")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scans", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    async with AsyncSessionLocal() as db:
+        user = User(email=f"bench-{uuid.uuid4().hex}@example.com", name="bench", hashed_password="-")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+
+    try:
+        await run("direct", args.scans, args.concurrency, lambda i: insert_direct(user_id, i))
+
+        buffer = ScanWriteBuffer()
+        buffer.start()
+        await run("buffered", args.scans, args.concurrency, lambda i: buffer.submit(scan_values(user_id, i)))
+        await buffer.stop()
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(Scans).where(Scans.user_id == user_id))
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
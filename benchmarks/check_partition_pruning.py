@@ -0,0 +1,66 @@
+"""
+Verifies partition pruning for the scan history query.
+
+Runs EXPLAIN on the exact query built by ScanController.history_query and
+lists the scans partitions the plan touches. With --since, every partition
+that ends before that date must be pruned; the script exits non-zero if one
+is still scanned.
+
+Needs a migrated Postgres reachable through the usual POSTGRES_* settings.
+
+    python -m benchmarks.check_partition_pruning --user-id 1 --since 2026-09-01
+"""
+import argparse
+import json
+import sys
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+
+from app.controllers.scans import ScanController
+from app.db.session import SessionLocal
+from app.services.partition_service import add_months, partition_month
+
+
+def relations(plan: dict):
+    if "Relation Name" in plan:
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", []):
+        yield from relations(child)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--search", default=None)
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        query = ScanController(db).history_query(args.user_id, search=args.search, since=args.since)
+        sql = query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        all_partitions = db.execute(text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = 'scans' ORDER BY 1"
+        )).scalars().all()
+
+    plan = plan if isinstance(plan, list) else json.loads(plan)
+    scanned = sorted(set(relations(plan[0]["Plan"])))
+    print(f"partitions:  {len(all_partitions)}")
+    print(f"scanned:     {', '.join(scanned) or '-'}")
+
+    if args.since is not None:
+        too_old = [
+            name for name in scanned
+            if partition_month(name) and add_months(partition_month(name), 1) <= args.since.date()
+        ]
+        if too_old:
+            print(f"NOT PRUNED:  {', '.join(too_old)}")
+            sys.exit(1)
+        print("pruning OK")
+
+
+if __name__ == "__main__":
+    main()
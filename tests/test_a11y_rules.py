@@ -0,0 +1,64 @@
+import pytest
+from bs4 import BeautifulSoup
+from app.services.a11y_rules import RULE_PROFILES, Rule, RuleSet, evaluate, get_rule_set
+
+PAGE = """
+<img src="a.jpg" alt="A">
+<img src="b.jpg" alt="">
+<img src="c.jpg" alt="" role="presentation">
+<img src="d.jpg">
+<img src="e.jpg" aria-hidden="true">
+<div aria-hidden="true"><img src="f.jpg"><svg><image href="g.png"/></svg></div>
+<picture><source srcset="h.webp 1x, h2.webp 2x"><img src="h.jpg" alt="H"></picture>
+<picture><source srcset="i.webp"><img src="i.jpg"></picture>
+<input type="image" src="go.png" alt="Go">
+<input type="image" src="go.png">
+<input type="text">
+<div role="img" aria-label="Chart"><span></span></div>
+<span role="img"></span>
+<div class="lazy" data-src="j.jpg"></div>
+<svg role="img"><title>Logo</title><path/></svg>
+<div style="background-image: url(k.jpg)"></div>
+"""
+
+def counts(profile):
+    result = evaluate(BeautifulSoup(PAGE, "lxml"), profile)
+    return result.total_images, result.alt_images, result.non_alt_images
+
+def test_default_profile():
+    # a, b, c, d, picture h, picture i, 2 inputs, 2 role=img, lazy div, svg, background
+    assert counts("default") == (13, 7, 6)
+
+def test_strict_profile_rejects_bare_empty_alt():
+    total, alt, non_alt = counts("strict")
+    assert total == 13
+    assert alt == 6  # b.jpg's bare alt="" no longer counts
+
+def test_legacy_profile_matches_old_traversals():
+    # Only <img> (including hidden and <picture> ones), svg with <image>, and backgrounds.
+    assert counts("legacy") == (10, 4, 6)
+    html = '<img alt="x" style="background-image: url(a.jpg)">'
+    # The old separate traversals counted this element twice.
+    assert evaluate(BeautifulSoup(html, "lxml"), "legacy").total_images == 2
+    assert evaluate(BeautifulSoup(html, "lxml"), "default").total_images == 1
+
+def test_only_candidate_rules_are_tried():
+    calls = []
+
+    def when(el):
+        calls.append(el.name)
+        return True
+
+    rule_set = RuleSet("t", [Rule("video", tag="video", when=when), Rule("track", attribute="data-track", when=when)])
+    soup = BeautifulSoup("<div><p>x</p><video></video><span data-track='1'></span></div>", "lxml")
+    assert rule_set.evaluate(soup).total_images == 2
+    assert calls == ["video", "span"]
+
+def test_limit_and_validation():
+    soup = BeautifulSoup('<img alt="x">' * 20, "lxml")
+    assert get_rule_set("default").evaluate(soup, limit=5).total_images == 5
+    with pytest.raises(ValueError):
+        RuleSet("bad", [Rule("no-selector")])
+    with pytest.raises(ValueError):
+        get_rule_set("nope")
+    assert set(RULE_PROFILES) == {"legacy", "default", "strict"}
@@ -0,0 +1,106 @@
+import asyncio
+import pytest
+from app.core.admission import BACKGROUND, INTERACTIVE, AdmissionController, Overloaded
+from app.services.robots import HostPacer
+
+async def hold(controller, release, priority=INTERACTIVE, started=None):
+    async with controller.slot(priority):
+        if started is not None:
+            started.append(priority)
+        await release.wait()
+
+@pytest.mark.asyncio
+async def test_rejects_fast_when_queue_is_full():
+    controller = AdmissionController(initial_limit=2, min_limit=1, queue_size=1, queue_timeout=5)
+    release = asyncio.Event()
+    running = [asyncio.create_task(hold(controller, release)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert controller.in_flight == 2
+    assert controller.saturated
+
+    with pytest.raises(Overloaded) as exc:
+        async with controller.slot():
+            pass
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+
+    release.set()
+    await asyncio.gather(*running)
+    assert controller.in_flight == 0
+    assert not controller.saturated
+
+@pytest.mark.asyncio
+async def test_queued_scan_times_out_with_503():
+    controller = AdmissionController(initial_limit=1, min_limit=1, queue_timeout=0.01)
+    release = asyncio.Event()
+    running = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+    with pytest.raises(Overloaded):
+        async with controller.slot():
+            pass
+    assert controller.rejected == 1
+    release.set()
+    await running
+    async with controller.slot():
+        assert controller.in_flight == 1
+
+@pytest.mark.asyncio
+async def test_interactive_waiters_go_before_background():
+    controller = AdmissionController(initial_limit=1, min_limit=1, queue_timeout=5, background_share=1)
+    first, rest = asyncio.Event(), asyncio.Event()
+    started = []
+    running = [asyncio.create_task(hold(controller, first))]
+    await asyncio.sleep(0)
+    running.append(asyncio.create_task(hold(controller, rest, BACKGROUND, started)))
+    await asyncio.sleep(0)
+    running.append(asyncio.create_task(hold(controller, rest, INTERACTIVE, started)))
+    await asyncio.sleep(0)
+    first.set()
+    rest.set()
+    await asyncio.gather(*running)
+    assert started == [INTERACTIVE, BACKGROUND]
+
+@pytest.mark.asyncio
+async def test_background_only_gets_its_share():
+    controller = AdmissionController(initial_limit=4, min_limit=1, background_share=0.5)
+    release = asyncio.Event()
+    running = [asyncio.create_task(hold(controller, release, BACKGROUND)) for _ in range(4)]
+    await asyncio.sleep(0)
+    assert controller.background_in_flight == 2
+    async with controller.slot():
+        assert controller.in_flight == 3
+    release.set()
+    await asyncio.gather(*running)
+
+def test_limit_grows_when_fast_and_backs_off_when_slow():
+    controller = AdmissionController(initial_limit=10, min_limit=2, target_latency=1.0, backoff=0.5)
+    for _ in range(20):
+        controller._observe(0.1, in_flight=10)
+    assert controller.limit > 11
+
+    grown = controller.limit
+    for _ in range(20):
+        controller._observe(5.0, in_flight=10)
+    # Cut once: decreases are spaced at least target_latency apart.
+    assert controller.limit == pytest.approx(grown * 0.5)
+
+    controller.limit = 10
+    controller.latency = 0.1
+    controller._observe(0.1, in_flight=1)
+    assert controller.limit == 10
+
+@pytest.mark.asyncio
+async def test_paced_background_crawl_does_not_shrink_the_limit():
+    controller = AdmissionController(initial_limit=8, target_latency=0.05)
+    pacer = HostPacer()
+
+    async def crawl_page():
+        async with controller.slot(BACKGROUND):
+            # Later pages queue behind the host's crawl-delay, well past the target.
+            await pacer.wait("https://slow.example", 0.05, max_wait=None)
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(*(crawl_page() for _ in range(4)))
+    await asyncio.gather(*(crawl_page() for _ in range(4)))
+    assert controller.latency < controller.target_latency
+    assert controller.limit >= 8
@@ -0,0 +1,170 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.core.admission import scan_admission
+from app.models.crawls import Crawl
+from app.schemas.scan_schemas import CrawlCreate
+from app.services.scan_service import FetchResult, ScanService, normalize_url
+from app.services.crawl_service import CRAWL_MAX_ACTIVE_PER_USER, BloomFilter, CrawlFrontier, CrawlService
+
+def test_normalize_url():
+    assert normalize_url("HTTP://Example.com:80") == "http://example.com/"
+    assert normalize_url("https://example.com/a?b=2&a=1#frag") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("https://example.com:8443/x") == "https://example.com:8443/x"
+
+def test_bloom_filter_dedup():
+    seen = BloomFilter(capacity=1000)
+    assert seen.add("https://example.com/")
+    assert not seen.add("https://example.com/")
+    assert "https://example.com/" in seen
+    assert "https://example.com/other" not in seen
+
+def test_frontier_is_bounded():
+    frontier = CrawlFrontier(max_size=2)
+    assert frontier.push("a", 0)
+    assert frontier.push("b", 0)
+    assert not frontier.push("c", 0)
+    assert len(frontier) == 2
+    assert frontier.dropped == 1
+    assert frontier.pop() == ("a", 0)
+
+def test_parse_page_collects_links():
+    html = """
+    <a href="/about">About</a>
+    <a href="https://other.com/">Other</a>
+    <a href="#top">Top</a>
+    <a href="mailto:me@example.com">Mail</a>
+    <img src="a.jpg" alt="A">
+    """
+    service = ScanService(db=MagicMock())
+    analysis = service.parse_page(html, "https://example.com/index.html", collect_links=True)
+
+    assert analysis.total_images == 1
+    assert analysis.links == ["https://example.com/about", "https://other.com/"]
+
+@pytest.mark.asyncio
+async def test_run_crawl_stays_on_origin_and_respects_budget():
+    pages = {
+        "https://example.com/": '<a href="/a">a</a><a href="/b">b</a><a href="https://other.com/">x</a><img alt="">',
+        "https://example.com/a": '<a href="/">home</a><a href="/c">c</a><img>',
+        "https://example.com/b": '<img alt="b">',
+        "https://example.com/c": '<img alt="c">',
+    }
+    crawl = Crawl(
+        id=7, user_id=1, root_url="https://example.com/", status="pending",
+        max_depth=5, max_pages=3, concurrency=2, pages_scanned=0, pages_failed=0,
+    )
+    db = MagicMock()
+    db.get = AsyncMock(return_value=crawl)
+    db.commit = AsyncMock()
+    db.execute = AsyncMock()
+
+    async def fake_fetch(self, url, robots_checked=False):
+        return FetchResult(body=pages[url].encode())
+
+    with patch.object(ScanService, "validate_url", lambda self, url: None), \
+         patch.object(ScanService, "check_robots", AsyncMock()), \
+         patch.object(ScanService, "fetch_html", fake_fetch):
+        await CrawlService(db).run_crawl(crawl.id)
+
+    added = [call.args[0] for call in db.add.call_args_list]
+    assert crawl.status == "completed"
+    assert crawl.pages_scanned == 3
+    assert len(added) == 3
+    assert all(scan.crawl_id == 7 for scan in added)
+    assert {scan.url for scan in added} <= set(pages)
+
+@pytest.mark.asyncio
+async def test_run_crawl_follows_links_on_redirected_root_origin():
+    pages = {
+        "http://example.com/": '<a href="https://www.example.com/a">a</a><a href="https://other.com/">x</a>',
+        "https://www.example.com/a": '<img alt="a">',
+    }
+    crawl = Crawl(
+        id=8, user_id=1, root_url="http://example.com/", status="pending",
+        max_depth=2, max_pages=10, concurrency=2, pages_scanned=0, pages_failed=0,
+    )
+    db = MagicMock()
+    db.get = AsyncMock(return_value=crawl)
+    db.commit = AsyncMock()
+    db.execute = AsyncMock()
+
+    async def fake_fetch(self, url, robots_checked=False):
+        final_url = "https://www.example.com/" if url == "http://example.com/" else url
+        return FetchResult(body=pages[url].encode(), final_url=final_url)
+
+    with patch.object(ScanService, "validate_url", lambda self, url: None), \
+         patch.object(ScanService, "check_robots", AsyncMock()), \
+         patch.object(ScanService, "fetch_html", fake_fetch):
+        await CrawlService(db).run_crawl(crawl.id)
+
+    assert crawl.status == "completed"
+    assert {call.args[0].url for call in db.add.call_args_list} == set(pages)
+
+@pytest.mark.asyncio
+async def test_create_crawl_rejects_over_active_limit():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=MagicMock(scalar=MagicMock(return_value=CRAWL_MAX_ACTIVE_PER_USER)))
+    db.commit = AsyncMock()
+    crawl_in = CrawlCreate(url="https://example.com", max_depth=1, max_pages=10, concurrency=2)
+
+    with patch.object(ScanService, "validate_url", lambda self, url: None):
+        with pytest.raises(HTTPException) as exc:
+            await CrawlService(db).create_crawl(1, crawl_in)
+    assert exc.value.status_code == 429
+    db.add.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_crawl_page_waits_out_pacing_before_taking_a_slot():
+    in_flight = []
+
+    async def slow_host(self, url):
+        await asyncio.sleep(0.01)
+        in_flight.append(scan_admission.in_flight)
+
+    async def fake_fetch(self, url, robots_checked=False):
+        assert robots_checked
+        in_flight.append(scan_admission.in_flight)
+        return FetchResult(body=b"<img alt='a'>")
+
+    before = scan_admission.in_flight
+    with patch.object(ScanService, "validate_url", lambda self, url: None), \
+         patch.object(ScanService, "check_robots", slow_host), \
+         patch.object(ScanService, "fetch_html", fake_fetch):
+        _, _, analysis = await CrawlService(MagicMock())._scan_page(
+            ScanService(None), "https://example.com/", 0, collect_links=False
+        )
+
+    assert analysis.total_images == 1
+    assert in_flight == [before, before + 1]
+
+@pytest.mark.asyncio
+async def test_failed_crawl_cancels_pages_in_flight():
+    crawl = Crawl(
+        id=9, user_id=1, root_url="https://example.com/", status="pending",
+        max_depth=2, max_pages=10, concurrency=2, pages_scanned=0, pages_failed=0,
+    )
+    db = MagicMock()
+    db.get = AsyncMock(return_value=crawl)
+    # Running, root page saved, then the commit after /fast fails.
+    db.commit = AsyncMock(side_effect=[None, None, RuntimeError("connection lost"), None])
+    db.execute = AsyncMock()
+    db.rollback = AsyncMock()
+    stalled = []
+
+    async def fake_fetch(self, url, robots_checked=False):
+        if url == "https://example.com/":
+            return FetchResult(body=b'<a href="/slow">slow</a><a href="/fast">fast</a>')
+        if url == "https://example.com/fast":
+            return FetchResult(body=b"<img alt='fast'>")
+        stalled.append(asyncio.current_task())
+        await asyncio.sleep(10)
+
+    with patch.object(ScanService, "validate_url", lambda self, url: None), \
+         patch.object(ScanService, "check_robots", AsyncMock()), \
+         patch.object(ScanService, "fetch_html", fake_fetch):
+        await CrawlService(db).run_crawl(crawl.id)
+
+    assert crawl.status == "failed"
+    assert stalled and stalled[0].done()
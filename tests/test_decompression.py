@@ -0,0 +1,99 @@
+import gzip
+import zlib
+import pytest
+from app.services import decompression
+from app.services.decompression import BodyTooLarge, DecodeError, StreamDecoder
+
+PAGE = b"<html>" + b"<p>hello world</p>" * 2000 + b"</html>"
+
+def decode(encoding, data, chunk=1000, **limits):
+    decoder = StreamDecoder(encoding, **limits)
+    for i in range(0, len(data), chunk):
+        decoder.feed(data[i:i + chunk])
+    return decoder, decoder.finish()
+
+@pytest.mark.parametrize("encoding,compress", [
+    ("", lambda b: b),
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+    ("deflate", lambda b: zlib.compress(b, wbits=-zlib.MAX_WBITS)),
+])
+def test_decodes_in_chunks(encoding, compress):
+    wire = compress(PAGE)
+    decoder, body = decode(encoding, wire)
+    assert body == PAGE
+    assert decoder.bytes_on_wire == len(wire)
+    assert decoder.bytes_decoded == len(PAGE)
+
+def test_optional_encodings():
+    if decompression.brotli is not None:
+        assert decode("br", decompression.brotli.compress(PAGE))[1] == PAGE
+    if decompression.zstandard is not None:
+        assert decode("zstd", decompression.zstandard.ZstdCompressor().compress(PAGE))[1] == PAGE
+
+def test_size_cap():
+    with pytest.raises(BodyTooLarge):
+        decode("gzip", gzip.compress(b"a" * 100_000), max_bytes=50_000, max_ratio=10_000)
+
+def test_expansion_ratio_stops_bomb_early():
+    bomb = gzip.compress(b"\0" * (50 * 1024 * 1024))
+    decoder = StreamDecoder("gzip")
+    with pytest.raises(BodyTooLarge):
+        for i in range(0, len(bomb), 4096):
+            decoder.feed(bomb[i:i + 4096])
+        decoder.finish()
+    # Stopped long before the whole bomb was inflated.
+    assert decoder.bytes_decoded < 2 * 1024 * 1024 + decompression.DECODE_CHUNK_SIZE
+
+def test_unsupported_and_corrupt_bodies():
+    with pytest.raises(DecodeError):
+        StreamDecoder("compress")
+    with pytest.raises(DecodeError):
+        decode("gzip", b"not gzip at all")
+
+@pytest.mark.skipif(decompression.brotli is None, reason="brotli not installed")
+@pytest.mark.parametrize("chunk", [1000, decompression.DECODE_CHUNK_SIZE, 10 ** 7])
+def test_brotli_large_body_is_complete(chunk):
+    # Low-entropy, so each input chunk inflates to many output chunks.
+    page = b"<html>" + b"".join(b'<p>row %d <img src="/i%d.png"></p>' % (i, i % 50) for i in range(40_000)) + b"</html>"
+    assert len(page) > 1024 * 1024
+    _, body = decode("br", decompression.brotli.compress(page), chunk=chunk, max_ratio=10_000)
+    assert body == page
+
+@pytest.mark.skipif(decompression.brotli is None, reason="brotli not installed")
+def test_truncated_brotli_stream():
+    wire = decompression.brotli.compress(PAGE)
+    with pytest.raises(DecodeError):
+        decode("br", wire[:len(wire) // 2])
+
+@pytest.mark.parametrize("encoding,compress", [
+    ("gzip", gzip.compress),
+    ("deflate", zlib.compress),
+    ("deflate", lambda b: zlib.compress(b, wbits=-zlib.MAX_WBITS)),
+])
+def test_truncated_zlib_stream(encoding, compress):
+    wire = compress(PAGE)
+    with pytest.raises(DecodeError, match="Truncated"):
+        decode(encoding, wire[:len(wire) // 2])
+    # Only the gzip trailer (CRC and length) missing.
+    if encoding == "gzip":
+        with pytest.raises(DecodeError, match="Truncated"):
+            decode(encoding, wire[:-4])
+
+@pytest.mark.skipif(decompression.zstandard is None, reason="zstandard not installed")
+@pytest.mark.parametrize("compressor", [
+    lambda z: z.ZstdCompressor(),
+    lambda z: z.ZstdCompressor(write_checksum=True, write_content_size=False),
+])
+def test_zstd_stream_completeness(compressor):
+    zstandard = decompression.zstandard
+    page = b"<html>" + b"".join(b"<p>row %d</p>" % i for i in range(40_000)) + b"</html>"
+    wire = compressor(zstandard).compress(page)
+    # Two frames back to back, fed in chunks that split the headers.
+    assert decode("zstd", wire + wire, chunk=7, max_ratio=10_000)[1] == page + page
+    for cut in (3, len(wire) // 2, len(wire) - 1):
+        with pytest.raises(DecodeError, match="Truncated"):
+            decode("zstd", wire[:cut], max_ratio=10_000)
+
+def test_empty_body_is_not_truncated():
+    assert decode("gzip", b"")[1] == b""
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import MagicMock
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.services.image_probe import ImageProber, ProbeCache
+from app.services.scan_service import ScanError, ScanService
+
+def test_parse_page_collects_resolved_deduped_image_urls():
+    html = """
+    <base href="/static/">
+    <img src="a.png" alt="a"><img src="a.png"><img src="https://cdn.example.com/b.png">
+    <img src="data:image/png;base64,AAAA"><img>
+    """
+    analysis = ScanService(db=MagicMock()).parse_page(html, "https://example.com/page/", collect_images=True)
+    assert analysis.total_images == 5
+    assert analysis.image_urls == ["https://example.com/static/a.png", "https://cdn.example.com/b.png"]
+
+def test_probe_cache_ttl_and_lru(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.services.image_probe.time.monotonic", lambda: now[0])
+    cache = ProbeCache(max_size=2)
+    cache.set("a", True, ttl=10)
+    cache.set("b", False, ttl=10)
+    assert cache.get("a") is True
+    cache.set("c", True, ttl=10)
+    assert cache.get("b") is None  # evicted, least recently used
+    now[0] = 111.0
+    assert cache.get("a") is None
+
+@pytest.mark.asyncio
+async def test_probe_checks_status_falls_back_to_range_get_and_caches():
+    hits = []
+
+    async def ok(request):
+        hits.append(("ok", request.method))
+        return web.Response(body=b"x")
+
+    async def no_head(request):
+        hits.append(("no_head", request.method))
+        if request.method == "HEAD":
+            return web.Response(status=405)
+        assert request.headers["Range"] == "bytes=0-0"
+        return web.Response(status=206, body=b"x")
+
+    app = web.Application()
+    app.router.add_route("*", "/ok.png", ok)
+    app.router.add_route("*", "/no-head.png", no_head)
+    async with TestServer(app) as server:
+        base = str(server.make_url(""))
+        urls = [f"{base}/ok.png", f"{base}/no-head.png", f"{base}/missing.png", f"{base}/ok.png"]
+
+        def validate(url):
+            pass
+
+        prober = ImageProber()
+        try:
+            assert await prober.probe(urls, validate) == (3, 1)
+            assert ("no_head", "GET") in hits
+            hits.clear()
+            assert await prober.probe(urls, validate) == (3, 1)
+            assert hits == []
+        finally:
+            await prober.close()
+
+@pytest.mark.asyncio
+async def test_probe_skips_urls_failing_validation():
+    def validate(url):
+        raise ScanError("Target resolves to a private or disallowed IP address.")
+
+    prober = ImageProber()
+    assert await prober.probe(["http://127.0.0.1/a.png"], validate) == (0, 0)
+    assert len(prober.cache) == 0
@@ -0,0 +1,143 @@
+import asyncio
+import gzip
+import pytest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+from app.services.ingest_service import IngestPool, IngestService, parse_document
+from app.services.warc import WarcFormatError, WarcReader, read_http_response
+
+PAGE = b"<html><body><img src='a.png' alt='a'><img src='b.png'></body></html>"
+
+def warc_record(warc_type, uri, content_type, block):
+    head = (
+        f"WARC/1.1\r\nWARC-Type: {warc_type}\r\nWARC-Target-URI: {uri}\r\n"
+        f"Content-Type: {content_type}\r\nContent-Length: {len(block)}\r\n\r\n"
+    ).encode()
+    return head + block + b"\r\n\r\n"
+
+def http_response(body, status="200 OK", content_type="text/html; charset=utf-8", extra=""):
+    return f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n{extra}\r\n".encode() + body
+
+def sample_warc():
+    compressed = gzip.compress(PAGE)
+    chunked = b"%x\r\n%s\r\n0\r\n\r\n" % (len(compressed), compressed)
+    return [
+        warc_record("warcinfo", "", "application/warc-fields", b"software: test\r\n"),
+        warc_record("request", "https://example.com/", "application/http; msgtype=request", b"GET / HTTP/1.1\r\n\r\n"),
+        warc_record("response", "https://example.com/", "application/http; msgtype=response", http_response(PAGE)),
+        warc_record(
+            "response", "https://example.com/gz", "application/http; msgtype=response",
+            http_response(chunked, extra="Content-Encoding: gzip\r\nTransfer-Encoding: chunked\r\n"),
+        ),
+        warc_record("response", "https://example.com/404", "application/http; msgtype=response",
+                    http_response(PAGE, status="404 Not Found")),
+        warc_record("response", "https://example.com/logo.png", "application/http; msgtype=response",
+                    http_response(b"\x89PNG", content_type="image/png")),
+        warc_record("resource", "https://example.com/saved.html", "text/html", PAGE),
+    ]
+
+def feed_all(reader, data, chunk_size):
+    records = []
+    for i in range(0, len(data), chunk_size):
+        records.extend(reader.feed(data[i:i + chunk_size]))
+    reader.finish()
+    return records
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_reader_streams_plain_and_multi_member_gzip(compress):
+    records = sample_warc()
+    data = b"".join(gzip.compress(r) if compress else r for r in records)
+    parsed = feed_all(WarcReader(), data, chunk_size=7)
+    assert [r.type for r in parsed] == ["warcinfo", "request", "response", "response", "response", "response", "resource"]
+    assert read_http_response(parsed[3].block).body == PAGE
+
+def test_reader_skips_oversized_records_and_rejects_truncation():
+    data = b"".join(sample_warc())
+    parsed = feed_all(WarcReader(max_record_bytes=40), data, chunk_size=1000)
+    assert all(r.block is None for r in parsed if r.type == "response")
+    with pytest.raises(WarcFormatError):
+        feed_all(WarcReader(), data[:-40], chunk_size=1000)
+
+def make_db():
+    db = MagicMock()
+    inserted = MagicMock()
+    inserted.scalars.return_value.all.side_effect = lambda: list(range(1, len(db.execute.await_args_list[-1].args[1]) + 1))
+    db.execute = AsyncMock(return_value=inserted)
+    db.commit = AsyncMock()
+    db.rollback = AsyncMock()
+    return db
+
+async def stream(data, chunk_size=100):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+@pytest.mark.asyncio
+async def test_ingest_warc_scans_html_records():
+    db = make_db()
+    data = b"".join(gzip.compress(r) for r in sample_warc())
+    with ThreadPoolExecutor(2) as executor:
+        result = await IngestService(db, executor=executor).ingest_warc(1, stream(data))
+    assert (result.records, result.scans, result.skipped) == (7, 3, 2)
+    rows = db.execute.await_args_list[0].args[1]
+    assert sorted(row["url"] for row in rows) == [
+        "https://example.com/", "https://example.com/gz", "https://example.com/saved.html",
+    ]
+    assert all((row["total_images"], row["alt_images"], row["non_alt_images"]) == (2, 1, 1) for row in rows)
+    db.commit.assert_awaited_once()
+
+@pytest.mark.asyncio
+async def test_ingest_warc_rejects_garbage():
+    with ThreadPoolExecutor(1) as executor:
+        with pytest.raises(HTTPException) as exc:
+            await IngestService(make_db(), executor=executor).ingest_warc(1, stream(b"not a warc file\r\n\r\n"))
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_ingest_html_upload():
+    db = make_db()
+    with ThreadPoolExecutor(1) as executor:
+        scan = await IngestService(db, executor=executor).ingest_html(
+            1, "https://staging.internal.example/page", PAGE, content_type="text/html"
+        )
+    assert (scan.id, scan.total_images, scan.alt_images, scan.bytes_decoded) == (1, 2, 1, len(PAGE))
+    with pytest.raises(HTTPException) as exc:
+        await IngestService(db).ingest_html(1, "ftp://example.com/", PAGE)
+    assert exc.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_ingest_warc_recovers_from_a_dead_pool():
+    pool = IngestPool(workers=1)
+    records = [
+        warc_record("resource", f"https://example.com/{i}.html", "text/html", PAGE) for i in range(4)
+    ]
+
+    async def killing_stream():
+        yield records[0]
+        executor = pool.executor()
+        for process in list(executor._processes.values()):
+            process.kill()
+        while not executor._broken:
+            await asyncio.sleep(0.05)
+        for record in records[1:]:
+            yield record
+
+    db = make_db()
+    try:
+        with patch("app.services.ingest_service.ingest_pool", pool):
+            result = await IngestService(db).ingest_warc(1, killing_stream())
+    finally:
+        pool.close()
+    # Only the page being parsed when the pool died can be lost.
+    assert result.records == 4
+    assert result.scans >= 3
+    assert result.scans + result.skipped == 4
+    rows = db.execute.await_args_list[0].args[1]
+    assert {"https://example.com/1.html", "https://example.com/2.html", "https://example.com/3.html"} <= {
+        row["url"] for row in rows
+    }
+
+def test_parse_document_runs_in_a_process_pool():
+    with ProcessPoolExecutor(1, mp_context=get_context("spawn")) as executor:
+        assert executor.submit(parse_document, PAGE, "https://example.com/", None, "default").result() == (2, 1, 1)
@@ -0,0 +1,45 @@
+from datetime import date, datetime
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from app.controllers.scans import ScanController
+from app.services.partition_service import (
+    add_months,
+    detach_ddl,
+    expired_partitions,
+    partition_ddl,
+    partition_month,
+    partition_name,
+)
+
+def test_month_arithmetic():
+    assert add_months(date(2025, 11, 1), 2) == date(2026, 1, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+
+def test_partition_names_round_trip():
+    assert partition_name(date(2026, 3, 1)) == "scans_y2026m03"
+    assert partition_month("scans_y2026m03") == date(2026, 3, 1)
+    assert partition_month("scans") is None
+
+def test_partition_ddl_bounds():
+    ddl = partition_ddl(date(2025, 12, 1))
+    assert "scans_y2025m12 PARTITION OF scans" in ddl
+    assert "FROM ('2025-12-01') TO ('2026-01-01')" in ddl
+
+def test_detach_ddl_finalizes_pending_detach():
+    assert detach_ddl("scans_y2025m12") == "ALTER TABLE scans DETACH PARTITION scans_y2025m12 CONCURRENTLY"
+    assert detach_ddl("scans_y2025m12", pending=True) == "ALTER TABLE scans DETACH PARTITION scans_y2025m12 FINALIZE"
+
+def test_expired_partitions():
+    names = ["scans_y2025m12", "scans_y2026m01", "scans_y2026m02", "scans_y2026m10", "other"]
+    # Keep six months back from October 2026: April onwards stays.
+    assert expired_partitions(names, date(2026, 10, 19), 6) == ["scans_y2025m12", "scans_y2026m01", "scans_y2026m02"]
+    assert expired_partitions(names, date(2026, 10, 19), 9) == ["scans_y2025m12"]
+    assert expired_partitions(names, date(2026, 10, 19), 12) == []
+
+def test_history_query_allows_pruning():
+    controller = ScanController(Session())
+    query = controller.history_query(1, since=datetime(2026, 9, 1))
+    sql = str(query.statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+    assert "scans.created_at >= '2026-09-01 00:00:00'" in sql
+    assert "ORDER BY scans.created_at DESC, scans.id DESC" in sql
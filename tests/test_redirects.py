@@ -0,0 +1,88 @@
+import pytest
+from unittest.mock import MagicMock
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.core.config import settings
+from app.services.redirect_cache import RedirectCache
+from app.services.scan_service import MAX_REDIRECTS, ScanError, ScanService
+
+PAGE = b"<html><body><img src='a.png' alt='a'></body></html>"
+
+@pytest.fixture
+def server_hits(monkeypatch):
+    monkeypatch.setattr(settings, "SCAN_RESPECT_ROBOTS", False)
+    monkeypatch.setattr("app.services.scan_service.redirect_cache", RedirectCache())
+    return []
+
+def make_app(hits):
+    def redirect(status, location):
+        async def handler(request):
+            hits.append(request.path)
+            return web.Response(status=status, headers={"Location": location})
+        return handler
+
+    async def page(request):
+        hits.append(request.path)
+        return web.Response(body=PAGE, content_type="text/html")
+
+    app = web.Application()
+    app.router.add_get("/old", redirect(301, "/new"))
+    app.router.add_get("/moved", redirect(302, "/new"))
+    app.router.add_get("/loop", redirect(308, "/loop"))
+    app.router.add_get("/private", redirect(301, "http://10.0.0.1/admin"))
+    app.router.add_get("/new", page)
+    return app
+
+def scanner(validated):
+    service = ScanService(db=MagicMock())
+
+    def validate(url):
+        validated.append(url)
+        if "10.0.0.1" in url:
+            raise ScanError("Target resolves to a private or disallowed IP address.")
+
+    service.validate_url = validate
+    return service
+
+@pytest.mark.asyncio
+async def test_permanent_redirect_is_validated_and_memoized(server_hits):
+    validated = []
+    async with TestServer(make_app(server_hits)) as server:
+        base = str(server.make_url("")).rstrip("/")
+        page = await scanner(validated).fetch_html(f"{base}/old")
+        assert page.final_url == f"{base}/new"
+        assert page.body == PAGE
+        assert validated == [f"{base}/new"]
+        assert server_hits == ["/old", "/new"]
+
+        server_hits.clear()
+        page = await scanner(validated).fetch_html(f"{base}/old")
+        assert page.final_url == f"{base}/new"
+        assert server_hits == ["/new"]
+
+@pytest.mark.asyncio
+async def test_temporary_redirect_is_followed_every_time(server_hits):
+    async with TestServer(make_app(server_hits)) as server:
+        base = str(server.make_url("")).rstrip("/")
+        for _ in range(2):
+            page = await scanner([]).fetch_html(f"{base}/moved")
+            assert page.final_url == f"{base}/new"
+        assert server_hits == ["/moved", "/new", "/moved", "/new"]
+
+@pytest.mark.asyncio
+async def test_redirect_loop_stops_at_hop_limit(server_hits):
+    async with TestServer(make_app(server_hits)) as server:
+        base = str(server.make_url("")).rstrip("/")
+        with pytest.raises(ScanError) as exc:
+            await scanner([]).fetch_html(f"{base}/loop")
+        assert exc.value.status_code == 502
+        assert len(server_hits) == MAX_REDIRECTS + 1
+
+@pytest.mark.asyncio
+async def test_redirect_to_private_address_is_refused(server_hits):
+    async with TestServer(make_app(server_hits)) as server:
+        base = str(server.make_url("")).rstrip("/")
+        with pytest.raises(ScanError) as exc:
+            await scanner([]).fetch_html(f"{base}/private")
+        assert exc.value.status_code == 400
+        assert server_hits == ["/private"]
@@ -0,0 +1,145 @@
+import asyncio
+import pytest
+from app.core.admission import BACKGROUND
+from unittest.mock import MagicMock, patch
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from app.services.robots import (
+    HostPacer,
+    PacingTimeout,
+    RobotsDisallowed,
+    RobotsPolicy,
+    RobotsRules,
+    ROBOTS_MAX_CRAWL_DELAY,
+)
+from app.services.scan_service import ScanError, ScanService
+
+ROBOTS_TXT = """
+# comment
+User-agent: SomeBot
+Disallow: /
+
+User-agent: *
+Disallow: /private/
+Allow: /private/public
+Disallow: /*.pdf$
+Disallow: /search?
+Crawl-delay: 2
+
+Sitemap: https://example.com/sitemap.xml
+"""
+
+def test_longest_match_wins():
+    rules = RobotsRules.parse(ROBOTS_TXT)
+    assert rules.allowed("/")
+    assert not rules.allowed("/private/x")
+    assert rules.allowed("/private/public/page")
+    assert not rules.allowed("/docs/file.pdf")
+    assert rules.allowed("/docs/file.pdf?download=1")
+    assert not rules.allowed("/search?q=1")
+    assert rules.allowed("/robots.txt")
+    assert rules.crawl_delay == 2
+
+def test_equal_length_prefers_allow():
+    rules = RobotsRules([(False, "/page"), (True, "/page")])
+    assert rules.allowed("/page")
+
+def test_own_group_replaces_wildcard_group():
+    text = "User-agent: *\nDisallow: /\n\nUser-agent: webimageanalyzer/1.0\nUser-agent: other\nDisallow: /admin\nCrawl-delay: 999\n"
+    rules = RobotsRules.parse(text)
+    assert rules.allowed("/page")
+    assert not rules.allowed("/admin/users")
+    assert rules.crawl_delay == ROBOTS_MAX_CRAWL_DELAY
+
+def test_no_matching_group_allows_everything():
+    rules = RobotsRules.parse("User-agent: SomeBot\nDisallow: /\n")
+    assert rules.allowed("/anything")
+    assert rules.crawl_delay is None
+
+@pytest.mark.asyncio
+async def test_pacer_spaces_requests_and_refuses_long_waits():
+    pacer = HostPacer()
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.gather(*(pacer.wait("https://example.com", 0.05, max_wait=1) for _ in range(3)))
+    assert loop.time() - started >= 0.1
+    await pacer.wait("https://example.com", 0.5)
+    with pytest.raises(PacingTimeout):
+        await pacer.wait("https://example.com", 0.5, max_wait=0.1)
+
+@pytest.mark.asyncio
+async def test_pacer_lets_interactive_scans_ahead_of_crawl_reservations():
+    pacer = HostPacer()
+    loop = asyncio.get_running_loop()
+    sent = {}
+
+    async def fetch(name, priority):
+        await pacer.wait("https://example.com", 0.05, max_wait=None, priority=priority)
+        sent[name] = loop.time()
+
+    started = loop.time()
+    # A crawl reserves the host's next four slots.
+    crawl = [asyncio.create_task(fetch(f"page{i}", BACKGROUND)) for i in range(4)]
+    await asyncio.sleep(0.01)
+    await pacer.wait("https://example.com", 0.05, max_wait=0.06)
+    sent["scan"] = loop.time()
+    await asyncio.gather(*crawl)
+
+    assert sent["scan"] - started < 0.1
+    times = sorted(sent.values())
+    assert all(b - a >= 0.045 for a, b in zip(times, times[1:]))
+
+@pytest.mark.asyncio
+async def test_policy_fetches_robots_once_for_concurrent_checks():
+    fetches = []
+
+    async def robots(request):
+        fetches.append(request.path)
+        await asyncio.sleep(0.01)
+        return web.Response(text="User-agent: *\nDisallow: /private\n")
+
+    app = web.Application()
+    app.router.add_get("/robots.txt", robots)
+    async with TestServer(app) as server:
+        base = str(server.make_url("")).rstrip("/")
+        policy = RobotsPolicy(shared=False)
+        try:
+            await asyncio.gather(*(policy.check(f"{base}/page{i}", lambda url: None) for i in range(5)))
+            with pytest.raises(RobotsDisallowed):
+                await policy.check(f"{base}/private/x", lambda url: None)
+            assert fetches == ["/robots.txt"]
+        finally:
+            await policy.close()
+
+@pytest.mark.asyncio
+async def test_policy_failure_semantics():
+    async def missing(request):
+        return web.Response(status=404)
+
+    async def broken(request):
+        return web.Response(status=503)
+
+    for handler, allowed in ((missing, True), (broken, False)):
+        app = web.Application()
+        app.router.add_get("/robots.txt", handler)
+        async with TestServer(app) as server:
+            base = str(server.make_url("")).rstrip("/")
+            policy = RobotsPolicy(shared=False)
+            try:
+                rules = await policy.rules_for(base, lambda url: None)
+                assert rules.allowed("/page") is allowed
+            finally:
+                await policy.close()
+
+@pytest.mark.asyncio
+async def test_fetch_html_maps_robots_decisions_to_scan_errors():
+    scanner = ScanService(db=MagicMock())
+    with patch("app.services.scan_service.robots_policy.check", side_effect=RobotsDisallowed("no")):
+        with pytest.raises(ScanError) as exc:
+            await scanner.fetch_html("https://example.com/private")
+    assert exc.value.status_code == 424
+
+    with patch("app.services.scan_service.robots_policy.check", side_effect=PacingTimeout("slow down")):
+        with pytest.raises(ScanError) as exc:
+            await scanner.fetch_html("https://example.com/page")
+    assert exc.value.status_code == 429
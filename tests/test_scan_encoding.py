@@ -0,0 +1,28 @@
+import codecs
+from unittest.mock import MagicMock
+from app.services.scan_service import ScanService, sniff_encoding
+
+def test_sniff_prefers_bom_then_header_then_meta():
+    assert sniff_encoding(codecs.BOM_UTF8 + b"<html>", "iso-8859-1") == "utf-8"
+    assert sniff_encoding(b'<meta charset="shift_jis"><html>', "ISO-8859-1") == "cp1252"
+    assert sniff_encoding(b'<head><meta http-equiv="Content-Type" content="text/html; charset=Shift_JIS">') == "shift_jis"
+
+def test_sniff_ignores_unknown_and_late_declarations():
+    assert sniff_encoding(b"<html>caf\xc3\xa9", "no-such-charset") == "utf-8"
+    late = b"<html>" + b" " * 5000 + b'<meta charset="shift_jis">'
+    assert sniff_encoding(late) == "utf-8"
+
+def test_sniff_falls_back_to_windows_1252_for_invalid_utf8():
+    assert sniff_encoding(b"<p>caf\xe9</p>") == "cp1252"
+
+def test_sniff_tolerates_truncated_multibyte_character():
+    body = b"<p>" + "é".encode() * 40000
+    assert sniff_encoding(body) == "utf-8"
+
+def test_parse_page_from_bytes_matches_text():
+    html = '<meta charset="windows-1252"><img alt="caf\xe9"><img alt=""><img><svg aria-label="x"><image/></svg>'
+    service = ScanService(db=MagicMock())
+    from_text = service.parse_page(html, "https://example.com/")
+    from_bytes = service.parse_page(html.encode("cp1252"), "https://example.com/")
+    assert (from_bytes.total_images, from_bytes.alt_images, from_bytes.non_alt_images) == \
+        (from_text.total_images, from_text.alt_images, from_text.non_alt_images) == (4, 3, 1)
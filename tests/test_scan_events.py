@@ -0,0 +1,111 @@
+import asyncio
+import gc
+import json
+import pytest
+from unittest.mock import patch
+from sqlalchemy.dialects import postgresql
+from app.services.scan_events import ScanEventHub, crawl_event, notify_statement, scan_event
+
+
+def make_hub(**kwargs):
+    hub = ScanEventHub(**kwargs)
+    # No LISTEN connection in tests; events are published directly.
+    hub.start = lambda: None
+    return hub
+
+
+async def read_event(stream):
+    return await asyncio.wait_for(stream.__anext__(), timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_events_reach_only_their_user():
+    hub = make_hub()
+    mine, theirs = hub.stream(1), hub.stream(2)
+    assert (await read_event(mine)).startswith("retry:")
+    assert (await read_event(theirs)).startswith("retry:")
+
+    hub._on_notify(None, 0, "scan_completed", scan_event(1, 10, "https://example.com"))
+    hub._on_notify(None, 0, "scan_completed", crawl_event(2, 5, 3))
+
+    event = await read_event(mine)
+    assert event.startswith("event: scan\ndata: ")
+    assert json.loads(event.split("data: ", 1)[1])["scan_id"] == 10
+    assert (await read_event(theirs)).startswith("event: crawl\n")
+
+    await mine.aclose()
+    await theirs.aclose()
+    assert hub._count == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_sent_lagged_and_dropped():
+    hub = make_hub(buffer=2)
+    stream = hub.stream(1)
+    await read_event(stream)
+    for scan_id in range(3):
+        hub.publish(1, "scan", scan_event(1, scan_id, "https://example.com"))
+
+    assert hub._count == 0
+    assert (await read_event(stream)).startswith("event: lagged")
+    with pytest.raises(StopAsyncIteration):
+        await read_event(stream)
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_when_idle():
+    hub = make_hub(heartbeat_seconds=0.01)
+    stream = hub.stream(1)
+    await read_event(stream)
+    assert await read_event(stream) == ": ping\n\n"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_subscriber_limit():
+    hub = make_hub(max_subscribers=1)
+    stream = hub.stream(1)
+    await read_event(stream)
+    assert hub.full
+    with pytest.raises(OverflowError):
+        hub.subscribe(2)
+    await stream.aclose()
+    assert not hub.full
+
+
+@pytest.mark.asyncio
+async def test_open_stream_reserves_the_slot_up_front():
+    hub = make_hub(max_subscribers=2)
+    first = await hub.open_stream(1)
+    second = await hub.open_stream(1)
+    # Both slots are taken before either body is read.
+    with pytest.raises(OverflowError):
+        await hub.open_stream(2)
+
+    assert (await read_event(first)).startswith("retry:")
+    hub.publish(1, "scan", "{}")
+    assert await read_event(first) == "event: scan\ndata: {}\n\n"
+    await first.aclose()
+    assert hub._count == 1
+
+    # A response that is never sent still frees its slot once dropped.
+    del second
+    gc.collect()
+    await asyncio.sleep(0.01)
+    assert hub._count == 0
+
+
+def test_malformed_notification_is_ignored():
+    hub = make_hub()
+    with patch.object(hub, "publish") as publish:
+        hub._on_notify(None, 0, "scan_completed", "not json")
+        hub._on_notify(None, 0, "scan_completed", json.dumps({"type": "scan"}))
+    publish.assert_not_called()
+
+
+def test_notify_statement_sends_every_payload():
+    payloads = [scan_event(1, i, "https://example.com") for i in range(3)]
+    compiled = notify_statement(payloads).compile(dialect=postgresql.dialect())
+    assert "pg_notify" in str(compiled)
+    assert "unnest" in str(compiled)
+    assert compiled.params["payloads"] == payloads
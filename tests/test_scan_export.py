@@ -0,0 +1,71 @@
+import csv
+import gzip
+import io
+import json
+import tracemalloc
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+from app.services.export_service import ScanExportService, EXPORT_COLUMNS
+
+class FakeStreamResult:
+    """Yields rows lazily, like a server-side cursor."""
+    def __init__(self, count):
+        self.count = count
+
+    async def __aiter__(self):
+        created_at = datetime(2025, 1, 1)
+        for i in range(self.count):
+            yield (i + 1, f"https://example.com/page/{i}", i % 7, 3, None, created_at)
+
+def fake_session_factory(count):
+    session = MagicMock()
+    session.stream = AsyncMock(return_value=FakeStreamResult(count))
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory
+
+async def consume(service, **kwargs):
+    total = 0
+    async for chunk in service.stream(1, **kwargs):
+        total += len(chunk)
+    return total
+
+@pytest.mark.asyncio
+async def test_export_csv_rows():
+    service = ScanExportService(session_factory=fake_session_factory(3))
+    body = b"".join([chunk async for chunk in service.stream(1, "csv")]).decode()
+    rows = list(csv.reader(io.StringIO(body)))
+
+    assert tuple(rows[0]) == EXPORT_COLUMNS
+    assert len(rows) == 4
+    assert rows[1][:6] == ["1", "https://example.com/page/0", "3", "0", "3", "0"]
+
+@pytest.mark.asyncio
+async def test_export_ndjson_gzip():
+    service = ScanExportService(session_factory=fake_session_factory(5))
+    body = b"".join([chunk async for chunk in service.stream(1, "ndjson", compress=True)])
+    lines = gzip.decompress(body).decode().splitlines()
+
+    assert len(lines) == 5
+    assert json.loads(lines[4])["id"] == 5
+
+@pytest.mark.asyncio
+async def test_export_memory_is_flat():
+    async def peak_for(count, **kwargs):
+        service = ScanExportService(session_factory=fake_session_factory(count))
+        tracemalloc.start()
+        written = await consume(service, **kwargs)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return written, peak
+
+    small_written, small_peak = await peak_for(5_000)
+    large_written, large_peak = await peak_for(50_000)
+    assert large_written > small_written * 9
+    # 10x the rows must not mean meaningfully more memory.
+    assert large_peak < small_peak * 1.5
+
+    _, gzip_peak = await peak_for(50_000, export_format="ndjson", compress=True)
+    assert gzip_peak < small_peak * 3
@@ -0,0 +1,95 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import deps
+from app.core.profiling import NULL_PROFILER, ScanProfiler
+from app.models.scans import Scans
+from app.models.user import User
+from app.services.profiling_service import ScanProfileService, PROFILE_ID_HEADER
+from app.services.scan_service import ScanService
+
+SCANS_URL = "/web-image-analyzer/api/v1/scans/"
+
+def fake_db():
+    db = MagicMock()
+    db.commit = AsyncMock()
+    db.rollback = AsyncMock()
+
+    async def refresh(obj):
+        obj.id = 11
+
+    db.refresh = AsyncMock(side_effect=refresh)
+    return db
+
+def test_null_profiler_reuses_one_context():
+    assert NULL_PROFILER.stage("fetch") is NULL_PROFILER.stage("parse", cpu=True)
+
+def test_profiler_times_stages_and_profiles_cpu_stages():
+    profiler = ScanProfiler()
+    with profiler.stage("parse", cpu=True):
+        sorted(range(10_000), key=lambda x: -x)
+    with profiler.stage("fetch"):
+        pass
+    assert set(profiler.timings) == {"parse", "fetch"}
+    assert "sorted" in profiler.report()
+
+@pytest.mark.asyncio
+async def test_profile_scan_stores_profile():
+    scan = Scans(id=5, user_id=1, url="https://example.com/", alt_images=1, non_alt_images=0, total_images=1)
+
+    async def fake_perform_scan(self, user_id, url_in, profiler, probe_images=False, rule_profile=None):
+        with profiler.stage("parse", cpu=True):
+            sum(range(1000))
+        return scan
+
+    db = fake_db()
+    with patch.object(ScanService, "perform_scan", fake_perform_scan):
+        result, record = await ScanProfileService(db).profile_scan(1, "https://example.com/")
+
+    assert result is scan
+    assert record.id == 11 and record.scan_id == 5 and record.status_code == 201
+    assert "parse" in record.stage_timings
+    db.add.assert_called_once_with(record)
+
+@pytest.mark.asyncio
+async def test_failed_scan_is_profiled_and_reraised_with_id():
+    db = fake_db()
+    with patch.object(ScanService, "perform_scan", AsyncMock(side_effect=HTTPException(status_code=502, detail="Upstream"))):
+        with pytest.raises(HTTPException) as exc:
+            await ScanProfileService(db).profile_scan(1, "https://example.com/")
+
+    assert exc.value.status_code == 502
+    assert exc.value.headers[PROFILE_ID_HEADER] == "11"
+    assert db.add.call_args.args[0].scan_id is None
+
+@pytest.fixture
+def client():
+    user = User(id=1, email="test@example.com", name="Test", scan_version=0, is_superuser=False)
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    app.dependency_overrides[deps.get_async_db] = lambda: MagicMock()
+    yield TestClient(app), user
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(overrides)
+
+def test_profiling_requires_superuser(client):
+    test_client, user = client
+    with patch.object(ScanProfileService, "profile_scan") as profile_scan:
+        response = test_client.post(SCANS_URL, json={"url": "https://example.com"}, headers={"X-Scan-Profile": "1"})
+        assert response.status_code == 403
+        profile_scan.assert_not_called()
+        assert test_client.get(SCANS_URL + "profiles/1").status_code == 403
+
+def test_superuser_gets_profile_id_header(client):
+    test_client, user = client
+    user.is_superuser = True
+    scan = Scans(id=5, user_id=1, url="https://example.com/", alt_images=1, non_alt_images=0,
+                 total_images=1, created_at=datetime(2025, 1, 1))
+    record = MagicMock(id=11)
+    with patch.object(ScanProfileService, "profile_scan", AsyncMock(return_value=(scan, record))):
+        response = test_client.post(SCANS_URL + "?profile=true", json={"url": "https://example.com"})
+    assert response.status_code == 201
+    assert response.headers[PROFILE_ID_HEADER] == "11"
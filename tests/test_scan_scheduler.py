@@ -0,0 +1,70 @@
+import pytest
+from collections import namedtuple
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.scan_service import ScanService
+from app.services.schedule_service import SCHEDULER_LEASE_SECONDS, ScanScheduler
+
+Row = namedtuple("Row", ["id", "user_id", "url", "interval_seconds"])
+
+def fake_session_factory():
+    session = MagicMock()
+    session.execute = AsyncMock()
+    session.commit = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, session
+
+@pytest.mark.asyncio
+async def test_run_once_groups_by_host():
+    rows = [
+        Row(1, 1, "https://a.example.com/one", 3600),
+        Row(2, 2, "https://b.example.com/", 3600),
+        Row(3, 1, "https://a.example.com/two", 3600),
+    ]
+    factory, session = fake_session_factory()
+    scheduler = ScanScheduler(session_factory=factory, concurrency=2)
+    clients = {}
+
+    async def fake_perform_scan(self, user_id, url_in):
+        clients.setdefault(url_in.split("/")[2], set()).add(id(self.client))
+        return MagicMock(id=100 + len(clients))
+
+    with patch.object(ScanScheduler, "claim_due", AsyncMock(return_value=rows)), \
+         patch.object(ScanService, "perform_scan", fake_perform_scan):
+        assert await scheduler.run_once() == 3
+
+    # Both a.example.com URLs went through the same HTTP session.
+    assert len(clients["a.example.com"]) == 1
+    assert clients["a.example.com"] != clients["b.example.com"]
+    # One result update per schedule.
+    assert session.execute.await_count == 3
+
+@pytest.mark.asyncio
+async def test_run_once_records_errors():
+    from fastapi import HTTPException
+    factory, session = fake_session_factory()
+    scheduler = ScanScheduler(session_factory=factory)
+
+    with patch.object(ScanScheduler, "claim_due", AsyncMock(return_value=[Row(1, 1, "https://a.example.com/", 3600)])), \
+         patch.object(ScanService, "perform_scan", AsyncMock(side_effect=HTTPException(status_code=502, detail="Upstream server returned 500"))):
+        await scheduler.run_once()
+
+    stmt = session.execute.await_args.args[0]
+    assert stmt.compile().params["last_error"] == "Upstream server returned 500"
+    assert stmt.compile().params["next_run_at"] > datetime.utcnow() + timedelta(seconds=3500)
+
+@pytest.mark.asyncio
+async def test_claim_takes_a_lease_instead_of_the_next_run():
+    factory, session = fake_session_factory()
+    result = MagicMock()
+    result.all.return_value = [Row(1, 1, "https://a.example.com/", 7 * 24 * 3600)]
+    session.execute = AsyncMock(return_value=result)
+
+    before = datetime.utcnow()
+    assert await ScanScheduler(session_factory=factory).claim_due() == result.all.return_value
+    (claimed,) = session.execute.await_args_list[1].args[1]
+    # A crashed node's claim comes due again after the lease, not a week later.
+    lease = claimed["next_run_at"] - before
+    assert timedelta(seconds=SCHEDULER_LEASE_SECONDS) <= lease < timedelta(seconds=SCHEDULER_LEASE_SECONDS + 5)
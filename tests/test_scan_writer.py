@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
+from app.services.scan_writer import ScanWriteBuffer
+
+def fake_session_factory(fail=False, poison=None):
+    session = MagicMock()
+    next_id = iter(range(1, 10_000))
+    batches = []
+
+    async def execute(stmt, params=None):
+        if fail:
+            raise RuntimeError("database is down")
+        if stmt.is_insert and poison is not None and any(p["url"] == poison for p in params):
+            raise IntegrityError("INSERT INTO scans", params, Exception("no partition of relation found for row"))
+        if stmt.is_insert:
+            batches.append(len(params))
+            result = MagicMock()
+            result.scalars.return_value.all.return_value = [next(next_id) for _ in params]
+            return result
+        return MagicMock()
+
+    session.execute = AsyncMock(side_effect=execute)
+    session.commit = AsyncMock()
+    factory = MagicMock()
+    factory.return_value.__aenter__ = AsyncMock(return_value=session)
+    factory.return_value.__aexit__ = AsyncMock(return_value=False)
+    return factory, session, batches
+
+def row(user_id):
+    return {"user_id": user_id, "url": "https://example.com", "alt_images": 1, "non_alt_images": 0, "total_images": 1}
+
+@pytest.mark.asyncio
+async def test_concurrent_submits_share_one_insert():
+    factory, session, batches = fake_session_factory()
+    buffer = ScanWriteBuffer(session_factory=factory, max_rows=100, max_delay=0.05)
+    buffer.start()
+
+    ids = await asyncio.gather(*(buffer.submit(row(i % 3)) for i in range(20)))
+    await buffer.stop()
+
+    assert batches == [20]
+    assert ids == list(range(1, 21))
+    assert session.commit.await_count == 1
+    # One scan_version bump per distinct user.
+    update_params = session.execute.await_args_list[1].args[1]
+    assert sorted((p["uid"], p["n"]) for p in update_params) == [(0, 7), (1, 7), (2, 6)]
+    # And one notification per scan, in the same transaction.
+    notify = session.execute.await_args_list[2].args[0]
+    assert len(notify.compile().params["payloads"]) == 20
+
+@pytest.mark.asyncio
+async def test_batches_are_capped_at_max_rows():
+    factory, _, batches = fake_session_factory()
+    buffer = ScanWriteBuffer(session_factory=factory, max_rows=8, max_delay=0.05)
+    buffer.start()
+    await asyncio.gather(*(buffer.submit(row(1)) for i in range(20)))
+    await buffer.stop()
+
+    assert sum(batches) == 20
+    assert max(batches) <= 8
+
+@pytest.mark.asyncio
+async def test_stop_flushes_pending_rows():
+    factory, _, batches = fake_session_factory()
+    buffer = ScanWriteBuffer(session_factory=factory, max_rows=100, max_delay=60)
+    buffer.start()
+    pending = [asyncio.create_task(buffer.submit(row(1))) for _ in range(5)]
+    await asyncio.sleep(0)
+    await buffer.stop()
+
+    assert [task.result() for task in pending] == [1, 2, 3, 4, 5]
+    assert not buffer.running
+
+@pytest.mark.asyncio
+async def test_flush_errors_reach_every_caller():
+    factory, _, _ = fake_session_factory(fail=True)
+    buffer = ScanWriteBuffer(session_factory=factory, max_delay=0.01)
+    buffer.start()
+    results = await asyncio.gather(*(buffer.submit(row(1)) for _ in range(3)), return_exceptions=True)
+    await buffer.stop()
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+@pytest.mark.asyncio
+async def test_poisoned_row_fails_alone():
+    factory, session, batches = fake_session_factory(poison="https://bad.example")
+    buffer = ScanWriteBuffer(session_factory=factory, max_rows=100, max_delay=0.05)
+    buffer.start()
+    rows = [row(1) for _ in range(16)]
+    rows[5]["url"] = "https://bad.example"
+    results = await asyncio.gather(*(buffer.submit(r) for r in rows), return_exceptions=True)
+    await buffer.stop()
+
+    assert isinstance(results[5], IntegrityError)
+    assert all(isinstance(r, int) for i, r in enumerate(results) if i != 5)
+    assert len(set(results) - {results[5]}) == 15
+    assert sum(batches) == 15
+    assert session.commit.await_count < 15
+
+@pytest.mark.asyncio
+async def test_submit_requires_running_buffer():
+    with pytest.raises(RuntimeError):
+        await ScanWriteBuffer().submit(row(1))
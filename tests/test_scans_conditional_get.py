@@ -0,0 +1,77 @@
+import pytest
+from datetime import datetime
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+from app.main import app
+from app.api import deps
+from app.models.scans import Scans
+from app.models.user import User
+
+SCANS_URL = "/web-image-analyzer/api/v1/scans/"
+
+@pytest.fixture
+def client():
+    user = User(id=1, email="test@example.com", name="Test", scan_version=3)
+    db = MagicMock()
+    scans = [
+        Scans(id=i, user_id=1, url=f"https://example.com/{i}", alt_images=1, non_alt_images=1,
+              total_images=2, created_at=datetime(2025, 1, 1))
+        for i in range(1, 4)
+    ]
+    query = db.query.return_value.filter.return_value
+    query.order_by.return_value.limit.return_value.all.return_value = scans
+    query.first.return_value = scans[0]
+    query.scalar.return_value = 3
+
+    overrides = dict(app.dependency_overrides)
+    app.dependency_overrides[deps.get_current_user] = lambda: user
+    app.dependency_overrides[deps.get_read_db] = lambda: db
+    yield TestClient(app), user, db
+    app.dependency_overrides.clear()
+    app.dependency_overrides.update(overrides)
+
+def test_list_returns_etag_and_304(client):
+    test_client, user, db = client
+    first = test_client.get(SCANS_URL)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    db.query.reset_mock()
+    second = test_client.get(SCANS_URL, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+    assert second.headers["Cache-Control"] == first.headers["Cache-Control"] == "private, no-cache"
+    # Short-circuited after reading the version, before the scan query ran.
+    db.query.assert_called_once_with(User.scan_version)
+
+def test_etag_changes_with_scan_version_and_search(client):
+    test_client, user, db = client
+    etag = test_client.get(SCANS_URL).headers["ETag"]
+    assert test_client.get(SCANS_URL, params={"search": "x"}).headers["ETag"] != etag
+
+    db.query.return_value.filter.return_value.scalar.return_value = 4
+    response = test_client.get(SCANS_URL, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_single_scan_304(client):
+    test_client, user, db = client
+    etag = test_client.get(SCANS_URL + "1").headers["ETag"]
+    not_modified = test_client.get(SCANS_URL + "1", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["Cache-Control"] == "private, no-cache"
+    assert test_client.get(SCANS_URL + "2", headers={"If-None-Match": etag}).status_code == 200
+
+def test_etag_follows_the_serving_replica(client):
+    test_client, user, db = client
+    # The primary has moved on; the replica serving this read has not.
+    user.scan_version = 5
+    response = test_client.get(SCANS_URL)
+    assert response.headers["ETag"].startswith('"3-')
+
+    # A client holding the newer version's ETag is not told the stale rows are current.
+    db.query.return_value.filter.return_value.scalar.return_value = 5
+    current = test_client.get(SCANS_URL).headers["ETag"]
+    db.query.return_value.filter.return_value.scalar.return_value = 3
+    assert test_client.get(SCANS_URL, headers={"If-None-Match": current}).status_code == 200
+    assert test_client.get(SCANS_URL + "1", headers={"If-None-Match": current}).status_code == 200
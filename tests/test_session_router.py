@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.core.config import Settings
+from app.db.session import RecentWrites, SessionRouter
+
+def make_factory(path, name=None):
+    engine = create_engine(f"sqlite:///{path}", poolclass=NullPool)
+    if name is not None:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE node (name TEXT)"))
+            conn.execute(text("INSERT INTO node VALUES (:name)"), {"name": name})
+    return sessionmaker(bind=engine)
+
+def served_by(factory):
+    with factory() as db:
+        return db.execute(text("SELECT name FROM node")).scalar()
+
+@pytest.fixture
+def databases(tmp_path):
+    primary = make_factory(tmp_path / "primary.db", "primary")
+    replica_a = make_factory(tmp_path / "replica_a.db", "replica_a")
+    replica_b = make_factory(tmp_path / "replica_b.db", "replica_b")
+    return primary, replica_a, replica_b
+
+def test_round_robin_across_replicas(databases):
+    primary, replica_a, replica_b = databases
+    router = SessionRouter(primary, [replica_a, replica_b], RecentWrites(5), eject_seconds=30)
+
+    served = [served_by(router.reader(user_id=1)) for _ in range(4)]
+    assert served == ["replica_a", "replica_b", "replica_a", "replica_b"]
+
+def test_no_replicas_uses_primary(databases):
+    primary, _, _ = databases
+    router = SessionRouter(primary, [], RecentWrites(5), eject_seconds=30)
+    assert served_by(router.reader(user_id=1)) == "primary"
+
+def test_read_your_writes_stickiness(databases):
+    primary, replica_a, replica_b = databases
+    writes = RecentWrites(60)
+    router = SessionRouter(primary, [replica_a, replica_b], writes, eject_seconds=30)
+
+    writes.note(1)
+    assert served_by(router.reader(user_id=1)) == "primary"
+    assert served_by(router.reader(user_id=2)) == "replica_a"
+
+    expired = RecentWrites(0)
+    expired.note(1)
+    assert not expired.is_recent(1)
+
+def test_failed_replica_is_ejected(tmp_path, databases):
+    primary, replica_a, _ = databases
+    broken = make_factory(tmp_path / "missing" / "replica.db")
+    router = SessionRouter(primary, [broken, replica_a], RecentWrites(5), eject_seconds=30)
+
+    factory = router.reader(user_id=1)
+    assert factory is broken
+    with pytest.raises(OperationalError) as exc:
+        served_by(factory)
+    router.report_error(factory, exc.value)
+
+    assert [served_by(router.reader(user_id=1)) for _ in range(3)] == ["replica_a"] * 3
+
+    # Everything ejected falls back to the primary.
+    router.eject(replica_a)
+    assert served_by(router.reader(user_id=1)) == "primary"
+
+@pytest.mark.parametrize("value", [
+    "postgresql://u:p@replica-1/db,postgresql://u:p@replica-2/db",
+    '["postgresql://u:p@replica-1/db", "postgresql://u:p@replica-2/db"]',
+])
+def test_replica_uris_from_environment(monkeypatch, value):
+    monkeypatch.setenv("SQLALCHEMY_REPLICA_URIS", value)
+    config = Settings()
+    assert config.SQLALCHEMY_REPLICA_URIS == ["postgresql://u:p@replica-1/db", "postgresql://u:p@replica-2/db"]
+    assert config.SQLALCHEMY_ASYNC_REPLICA_URIS == [
+        "postgresql+asyncpg://u:p@replica-1/db", "postgresql+asyncpg://u:p@replica-2/db",
+    ]
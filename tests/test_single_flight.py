@@ -0,0 +1,157 @@
+import asyncio
+import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.core.config import settings
+from app.services.a11y_rules import DEFAULT_RULE_PROFILE
+from app.services.scan_service import FetchResult, PageAnalysis, ScanService, ScanError
+from app.services.single_flight import SingleFlight, scan_flight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "result"
+
+    results = await asyncio.gather(*(flight.do("key", work) for _ in range(10)))
+    assert results == ["result"] * 10
+    assert calls == 1
+    assert "key" not in flight
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(flight.do("key", work))
+    second = asyncio.create_task(flight.do("key", work))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == 42
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+@pytest.mark.asyncio
+async def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    attempts = 0
+
+    async def work():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0)
+        raise ScanError("Upstream server returned 500", status_code=502)
+
+    results = await asyncio.gather(flight.do("key", work), flight.do("key", work), return_exceptions=True)
+    assert all(isinstance(r, ScanError) for r in results)
+    assert attempts == 1
+
+    with pytest.raises(ScanError):
+        await flight.do("key", work)
+    assert attempts == 2
+
+@pytest.mark.asyncio
+async def test_perform_scan_fetches_same_url_once():
+    fetches = 0
+
+    async def fake_fetch(self, url):
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.01)
+        return FetchResult(body=b'<html><img src="a.png" alt="a"><img src="b.png"></html>')
+
+    def make_db():
+        db = MagicMock()
+        db.execute = AsyncMock()
+        db.flush = AsyncMock()
+        db.commit = AsyncMock()
+        db.refresh = AsyncMock()
+        return db
+
+    with patch.object(ScanService, "validate_url", lambda self, url: None), \
+         patch.object(ScanService, "fetch_html", fake_fetch):
+        scans = await asyncio.gather(
+            ScanService(make_db()).perform_scan(1, "https://Example.com/page?b=2&a=1"),
+            ScanService(make_db()).perform_scan(2, "https://example.com/page?a=1&b=2"),
+            ScanService(make_db()).perform_scan(3, "https://example.com/page?a=1&b=2#top"),
+        )
+
+    assert fetches == 1
+    assert [scan.user_id for scan in scans] == [1, 2, 3]
+    assert all(scan.alt_images == 1 and scan.non_alt_images == 1 for scan in scans)
+    assert len(scan_flight) == 0
+
+@pytest.mark.asyncio
+async def test_local_callers_take_the_advisory_lock_once():
+    locks = 0
+    fetches = 0
+    saved = []
+
+    @asynccontextmanager
+    async def fake_lock(key):
+        nonlocal locks
+        locks += 1
+        await asyncio.sleep(0.01)
+        yield MagicMock()
+
+    async def fake_fetch(self, url):
+        nonlocal fetches
+        fetches += 1
+        await asyncio.sleep(0.01)
+        return FetchResult(body=b'<html><img src="a.png" alt="a"><img src="b.png"></html>')
+
+    async def fake_recent(self, url, probe_images=False, rule_profile=DEFAULT_RULE_PROFILE):
+        return saved[0] if saved else None
+
+    def make_db():
+        db = MagicMock()
+        db.execute = AsyncMock()
+        db.flush = AsyncMock()
+        db.refresh = AsyncMock()
+        db.commit = AsyncMock(side_effect=lambda: saved.append(PageAnalysis(total_images=2, alt_images=1, non_alt_images=1)))
+        return db
+
+    with patch.object(settings, "SCAN_COALESCE_CROSS_WORKER", True), \
+         patch("app.services.scan_service.advisory_lock", fake_lock), \
+         patch.object(ScanService, "validate_url", lambda self, url: None), \
+         patch.object(ScanService, "fetch_html", fake_fetch), \
+         patch.object(ScanService, "_recent_analysis", fake_recent):
+        scans = await asyncio.gather(*(
+            ScanService(make_db()).perform_scan(user_id, "https://example.com/page") for user_id in range(1, 6)
+        ))
+
+    assert locks == 1
+    assert fetches == 1
+    assert [scan.user_id for scan in scans] == [1, 2, 3, 4, 5]
+    assert all(scan.alt_images == 1 and scan.non_alt_images == 1 for scan in scans)
+
+@pytest.mark.asyncio
+async def test_recent_analysis_matches_normalized_url_and_options():
+    db = MagicMock()
+    result = MagicMock()
+    result.all.return_value = [
+        ("https://example.com/other", 9, 9, 0, None, None, None),
+        ("https://EXAMPLE.com/page?b=2&a=1#top", 2, 1, 1, None, None, None),
+    ]
+    db.execute = AsyncMock(return_value=result)
+
+    analysis = await ScanService(db)._recent_analysis("https://example.com/page?a=1&b=2", rule_profile="wcag")
+    assert (analysis.total_images, analysis.rule_profile) == (2, "wcag")
+    sql = str(db.execute.call_args.args[0])
+    assert "scans.rule_profile =" in sql
+    assert "scans.probed_images IS NULL" in sql
+
+    result.all.return_value = result.all.return_value[:1]
+    assert await ScanService(db)._recent_analysis("https://example.com/page?a=1&b=2") is None